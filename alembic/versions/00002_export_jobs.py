@@ -0,0 +1,49 @@
+"""Add export job table
+
+Revision ID: 00002
+Revises: 00001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00002'
+down_revision: Union[str, None] = '00001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 创建 ExportJob 表
+    op.create_table(
+        'ExportJob',
+        sa.Column('ID', sa.String(), nullable=False),
+        sa.Column('BabyID', sa.String(), nullable=False),
+        sa.Column('Status', sa.String(), nullable=False),
+        sa.Column('Format', sa.String(), nullable=False),
+        sa.Column('Request', sa.Text(), nullable=False),
+        sa.Column('Progress', sa.Integer(), nullable=True, default=0),
+        sa.Column('FilePath', sa.String(), nullable=True),
+        sa.Column('FileSize', sa.Integer(), nullable=True),
+        sa.Column('RecordCount', sa.Integer(), nullable=True),
+        sa.Column('ErrorMessage', sa.Text(), nullable=True),
+        sa.Column('CreatedAt', sa.Float(), nullable=False),
+        sa.Column('StartedAt', sa.Float(), nullable=True),
+        sa.Column('FinishedAt', sa.Float(), nullable=True),
+        sa.Column('Timestamp', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['BabyID'], ['Baby.ID'], ),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index('ix_ExportJob_BabyID_CreatedAt', 'ExportJob', ['BabyID', 'CreatedAt'])
+    op.create_index('ix_ExportJob_Status', 'ExportJob', ['Status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ExportJob_Status', table_name='ExportJob')
+    op.drop_index('ix_ExportJob_BabyID_CreatedAt', table_name='ExportJob')
+    op.drop_table('ExportJob')
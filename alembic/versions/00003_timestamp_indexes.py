@@ -0,0 +1,34 @@
+"""Add BabyID/Timestamp indexes for incremental exports
+
+Revision ID: 00003
+Revises: 00002
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00003'
+down_revision: Union[str, None] = '00002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 增量导出按 (BabyID, Timestamp) 查询自上次导出以来新增或修改的记录（各模型的 __table_args__ 中声明了同名索引）
+EVENT_TABLES = [
+    'Nursing', 'Formula', 'Sleep', 'Diaper', 'Weight', 'Height', 'Head',
+    'Temperature', 'Playtime', 'Bath', 'Photo', 'Video',
+]
+
+
+def upgrade() -> None:
+    for table in EVENT_TABLES:
+        op.create_index(f'ix_{table}_BabyID_Timestamp', table, ['BabyID', 'Timestamp'])
+
+
+def downgrade() -> None:
+    for table in reversed(EVENT_TABLES):
+        op.drop_index(f'ix_{table}_BabyID_Timestamp', table_name=table)
@@ -0,0 +1,34 @@
+"""Add partial index on fever temperature readings
+
+Revision ID: 00004
+Revises: 00003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00004'
+down_revision: Union[str, None] = '00003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 发烧记录查询只扫描体温 >= FEVER_INDEX_THRESHOLD 的行
+# （须与 models.dto.FEVER_INDEX_THRESHOLD 一致；阈值调整后需要新的迁移重建索引）
+FEVER_INDEX = 'ix_Temperature_BabyID_Time_fever'
+FEVER_INDEX_THRESHOLD = 37.5
+
+
+def upgrade() -> None:
+    op.create_index(
+        FEVER_INDEX, 'Temperature', ['BabyID', 'Time'],
+        sqlite_where=sa.text(f'"Temperature" >= {FEVER_INDEX_THRESHOLD!r}')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(FEVER_INDEX, table_name='Temperature')
@@ -0,0 +1,41 @@
+"""Add feeding cadence table
+
+Revision ID: 00005
+Revises: 00004
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00005'
+down_revision: Union[str, None] = '00004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 创建 FeedingCadence 表（喂养记录写入时增量更新；已有记录运行 tools/rebuild_derived_data.py 回填）
+    op.create_table(
+        'FeedingCadence',
+        sa.Column('ID', sa.String(), nullable=False),
+        sa.Column('BabyID', sa.String(), nullable=False),
+        sa.Column('Bucket', sa.Integer(), nullable=False),
+        sa.Column('Count', sa.Integer(), nullable=False, default=0),
+        sa.Column('Mean', sa.Float(), nullable=False, default=0.0),
+        sa.Column('Variance', sa.Float(), nullable=False, default=0.0),
+        sa.Column('LastFeedTime', sa.Float(), nullable=True),
+        sa.Column('Timestamp', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['BabyID'], ['Baby.ID'], ),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index('ix_FeedingCadence_BabyID_Bucket', 'FeedingCadence', ['BabyID', 'Bucket'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_FeedingCadence_BabyID_Bucket', table_name='FeedingCadence')
+    op.drop_table('FeedingCadence')
@@ -0,0 +1,48 @@
+"""Add event aggregate table
+
+Revision ID: 00006
+Revises: 00005
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00006'
+down_revision: Union[str, None] = '00005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 创建 EventAggregate 表（记录写入时增量更新；已有记录运行 tools/rebuild_derived_data.py 回填）
+    op.create_table(
+        'EventAggregate',
+        sa.Column('ID', sa.String(), nullable=False),
+        sa.Column('BabyID', sa.String(), nullable=False),
+        sa.Column('EventType', sa.String(), nullable=False),
+        sa.Column('Period', sa.String(), nullable=False),
+        sa.Column('Count', sa.Integer(), nullable=False, default=0),
+        sa.Column('Total', sa.Float(), nullable=False, default=0.0),
+        sa.Column('Minimum', sa.Float(), nullable=True),
+        sa.Column('Maximum', sa.Float(), nullable=True),
+        sa.Column('Mean', sa.Float(), nullable=False, default=0.0),
+        sa.Column('M2', sa.Float(), nullable=False, default=0.0),
+        sa.Column('HourHistogram', sa.Text(), nullable=False),
+        sa.Column('Timestamp', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['BabyID'], ['Baby.ID'], ),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index(
+        'ix_EventAggregate_BabyID_EventType_Period', 'EventAggregate',
+        ['BabyID', 'EventType', 'Period'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_EventAggregate_BabyID_EventType_Period', table_name='EventAggregate')
+    op.drop_table('EventAggregate')
@@ -0,0 +1,43 @@
+"""Add feeding heatmap table
+
+Revision ID: 00007
+Revises: 00006
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00007'
+down_revision: Union[str, None] = '00006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 创建 FeedingHeatmap 表（喂养记录写入时增量更新；已有记录运行 tools/rebuild_derived_data.py 回填）
+    op.create_table(
+        'FeedingHeatmap',
+        sa.Column('ID', sa.String(), nullable=False),
+        sa.Column('BabyID', sa.String(), nullable=False),
+        sa.Column('FeedType', sa.String(), nullable=False),
+        sa.Column('WeekStart', sa.String(), nullable=False),
+        sa.Column('Counts', sa.LargeBinary(), nullable=False),
+        sa.Column('Amounts', sa.LargeBinary(), nullable=False),
+        sa.Column('Timestamp', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['BabyID'], ['Baby.ID'], ),
+        sa.PrimaryKeyConstraint('ID')
+    )
+    op.create_index(
+        'ix_FeedingHeatmap_BabyID_FeedType_WeekStart', 'FeedingHeatmap',
+        ['BabyID', 'FeedType', 'WeekStart'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_FeedingHeatmap_BabyID_FeedType_WeekStart', table_name='FeedingHeatmap')
+    op.drop_table('FeedingHeatmap')
@@ -0,0 +1,35 @@
+"""Add value count to event aggregates
+
+Revision ID: 00008
+Revises: 00007
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00008'
+down_revision: Union[str, None] = '00007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 均值和方差只计入有数值的事件，样本数单独保存
+    op.add_column(
+        'EventAggregate',
+        sa.Column('ValueCount', sa.Integer(), nullable=False, server_default='0')
+    )
+    # 已有的聚合按“没有最值即没有数值”近似填充；混有空值的周期运行 tools/rebuild_derived_data.py 重建
+    op.execute(
+        'UPDATE "EventAggregate" SET "ValueCount" = CASE WHEN "Minimum" IS NULL THEN 0 ELSE "Count" END'
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('EventAggregate') as batch_op:
+        batch_op.drop_column('ValueCount')
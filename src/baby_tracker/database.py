@@ -38,6 +38,34 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 只读查询（如导出时并发读取各表）使用独立的连接池，每个会话持有自己的连接，
+# 在 WAL 模式下可与写连接和彼此并发读取
+read_engine = create_engine(
+    DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 20,
+    },
+    pool_size=4,
+    max_overflow=4,
+    echo=False,
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# 后台任务（如导出任务的状态和进度）在工作线程中读写，同样使用独立的连接池：
+# 共享的 engine 只有一个连接，工作线程提交或关闭会话会提交或回滚请求线程进行中的事务
+job_engine = create_engine(
+    DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 20,
+    },
+    pool_size=4,
+    max_overflow=4,
+    echo=False,
+)
+JobSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=job_engine)
+
 # 声明基类
 Base = declarative_base()
 
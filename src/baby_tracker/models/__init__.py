@@ -12,19 +12,21 @@ from .base import BaseModel, TimestampMixin
 from .baby import Baby
 
 # 保持现有模型兼容性
-from .feeding import Nursing, Formula
+from .feeding import Nursing, Formula, FeedingCadence, FeedingHeatmap
 from .health import Sleep, Diaper
 from .activity import Playtime, Bath
 from .lookup import (
     SleepDesc, FeedDesc, DiaperDesc
 )
+from .export import ExportJob
+from .aggregate import EventAggregate
 
 # 新的 Dataclass DTO 和映射器
 try:
     from .dto import (
         BabyDTO, NursingDTO, FormulaDTO, SleepDTO, DiaperDTO,
         WeightDTO, HeightDTO, TemperatureDTO, FeedingStatsDTO, GrowthStatsDTO,
-        Gender, FinishSide
+        GrowthVelocityDTO, FeedingCadenceDTO, FeedingHeatmapDTO, EventAggregateDTO, Gender, FinishSide
     )
     from .mappers import (
         BabyMapper, NursingMapper, FormulaMapper, SleepMapper,
@@ -39,10 +41,11 @@ __all__ = [
     "BaseModel", "TimestampMixin", "Baby",
     
     # 现有模型（保持兼容性）
-    "Nursing", "Formula", 
+    "Nursing", "Formula", "FeedingCadence", "FeedingHeatmap",
     "Sleep", "Diaper", 
     "Playtime", "Bath",
     "SleepDesc", "FeedDesc", "DiaperDesc",
+    "ExportJob", "EventAggregate",
     "OtherActivityLocationSelection",
 ]
 
@@ -52,7 +55,7 @@ if _HAS_DTO:
         # DTOs
         'BabyDTO', 'NursingDTO', 'FormulaDTO', 'SleepDTO', 'DiaperDTO',
         'WeightDTO', 'HeightDTO', 'TemperatureDTO', 'FeedingStatsDTO', 'GrowthStatsDTO',
-        'Gender', 'FinishSide',
+        'GrowthVelocityDTO', 'FeedingCadenceDTO', 'FeedingHeatmapDTO', 'EventAggregateDTO', 'Gender', 'FinishSide',
         
         # Mappers
         'BabyMapper', 'NursingMapper', 'FormulaMapper', 'SleepMapper',
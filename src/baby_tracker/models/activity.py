@@ -2,7 +2,7 @@
 活动记录相关模型
 """
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from baby_tracker.models.base import BaseModel
 
@@ -26,6 +26,9 @@ class Playtime(BaseModel, ActivityMixin):
     """游戏时间记录表"""
     
     __tablename__ = 'Playtime'
+    __table_args__ = (
+        Index('ix_Playtime_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 游戏时长（分钟）
     duration = Column(Integer, name='Duration', default=0)
@@ -41,6 +44,9 @@ class Bath(BaseModel, ActivityMixin):
     """洗澡记录表"""
     
     __tablename__ = 'Bath'
+    __table_args__ = (
+        Index('ix_Bath_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 洗澡时长（分钟）
     duration = Column(Integer, name='Duration', default=0)
@@ -56,6 +62,9 @@ class Photo(BaseModel, ActivityMixin):
     """照片记录表"""
     
     __tablename__ = 'Photo'
+    __table_args__ = (
+        Index('ix_Photo_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 照片文件路径
     file_path = Column(String, name='FilePath', nullable=False)
@@ -71,6 +80,9 @@ class Video(BaseModel, ActivityMixin):
     """视频记录表"""
     
     __tablename__ = 'Video'
+    __table_args__ = (
+        Index('ix_Video_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 视频文件路径
     file_path = Column(String, name='FilePath', nullable=False)
@@ -0,0 +1,36 @@
+"""
+事件聚合相关模型
+"""
+from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey, Index
+from baby_tracker.models.base import BaseModel
+
+
+class EventAggregate(BaseModel):
+    """事件聚合表（每个宝宝、事件类型、统计周期一行，记录写入时增量更新）"""
+    
+    __tablename__ = 'EventAggregate'
+    __table_args__ = (
+        Index('ix_EventAggregate_BabyID_EventType_Period', 'BabyID', 'EventType', 'Period', unique=True),
+    )
+    
+    id = Column(String, primary_key=True, name='ID')
+    timestamp = Column(Float, name='Timestamp')
+    baby_id = Column(String, ForeignKey('Baby.ID'), name='BabyID', nullable=False)
+    
+    # 事件类型和统计周期（本地日期 YYYY-MM-DD）
+    event_type = Column(String, name='EventType', nullable=False)
+    period = Column(String, name='Period', nullable=False)
+    
+    # 次数、总量、最值
+    count = Column(Integer, name='Count', nullable=False, default=0)
+    total = Column(Float, name='Total', nullable=False, default=0.0)
+    minimum = Column(Float, name='Minimum', nullable=True)
+    maximum = Column(Float, name='Maximum', nullable=True)
+    
+    # Welford 均值和平方差和，用于合并计算方差（只计入有数值的事件，共 ValueCount 个）
+    value_count = Column(Integer, name='ValueCount', nullable=False, default=0)
+    mean = Column(Float, name='Mean', nullable=False, default=0.0)
+    m2 = Column(Float, name='M2', nullable=False, default=0.0)
+    
+    # 24 个小时的事件次数（逗号分隔）
+    hour_histogram = Column(Text, name='HourHistogram', nullable=False)
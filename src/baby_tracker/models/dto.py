@@ -8,6 +8,25 @@ from typing import Optional, List
 from enum import Enum
 
 
+# 各测量位置的发烧阈值（摄氏度），未知位置使用默认阈值（腋下）
+FEVER_THRESHOLDS = {
+    '腋下': 37.5,
+    '额头': 37.5,
+    '口腔': 37.8,
+    '耳温': 38.0,
+    '肛门': 38.0,
+}
+DEFAULT_FEVER_THRESHOLD = 37.5
+
+# 发烧部分索引的条件值：不高于任何测量位置的阈值，索引才包含全部发烧记录
+FEVER_INDEX_THRESHOLD = min(DEFAULT_FEVER_THRESHOLD, *FEVER_THRESHOLDS.values())
+
+
+def get_fever_threshold(location: Optional[str]) -> float:
+    """测量位置对应的发烧阈值"""
+    return FEVER_THRESHOLDS.get(location, DEFAULT_FEVER_THRESHOLD) if location else DEFAULT_FEVER_THRESHOLD
+
+
 class Gender(Enum):
     """性别枚举"""
     FEMALE = 0
@@ -21,6 +40,15 @@ class FinishSide(Enum):
     BOTH_UNKNOWN = 2
 
 
+class ExportJobStatus(Enum):
+    """导出任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 @dataclass
 class BabyDTO:
     """宝宝信息数据传输对象"""
@@ -208,20 +236,20 @@ class TemperatureDTO:
     
     @property
     def is_fever(self) -> bool:
-        """判断是否发烧（基于腋下体温37.5°C）"""
-        return self.temperature >= 37.5
+        """判断是否发烧（阈值取决于测量位置）"""
+        return self.temperature >= get_fever_threshold(self.location)
     
     @property
     def temperature_status(self) -> str:
         """体温状态"""
         if self.temperature < 36.0:
             return "偏低"
+        elif self.is_fever:
+            return "发烧"
         elif self.temperature <= 37.0:
             return "正常"
-        elif self.temperature <= 37.5:
-            return "稍高"
         else:
-            return "发烧"
+            return "稍高"
     
     @property
     def measurement_time(self) -> datetime:
@@ -255,6 +283,7 @@ class GrowthStatsDTO:
     latest_head: Optional[float] = None  # 厘米
     weight_trend: str = "stable"  # increasing, decreasing, stable
     height_trend: str = "stable"
+    head_trend: str = "stable"
     
     @property
     def latest_weight_kg(self) -> Optional[float]:
@@ -262,6 +291,67 @@ class GrowthStatsDTO:
         return self.latest_weight / 1000.0 if self.latest_weight else None
 
 
+@dataclass
+class GrowthVelocityDTO:
+    """生长速度数据传输对象（时间窗口内测量值的最小二乘斜率）"""
+    baby_id: str
+    window_days: int
+    weight_velocity: Optional[float] = None  # 克/天
+    height_velocity: Optional[float] = None  # 厘米/周
+    head_velocity: Optional[float] = None  # 厘米/周
+    weight_trend: str = "stable"  # increasing, decreasing, stable
+    height_trend: str = "stable"
+    head_trend: str = "stable"
+
+
+@dataclass
+class FeedingCadenceDTO:
+    """喂养节律数据传输对象（某个时段内喂养间隔的指数加权均值和方差，单位秒）"""
+    id: str = ""
+    baby_id: str = ""
+    bucket: int = 0  # 一天中的时段序号
+    count: int = 0  # 已计入的喂养间隔数
+    mean: float = 0.0
+    variance: float = 0.0
+    last_feed_time: Optional[float] = None  # 该时段内最近一次喂养时间（Unix 时间戳）
+    timestamp: float = field(default_factory=lambda: datetime.now().timestamp())
+    
+    @property
+    def std(self) -> float:
+        """喂养间隔的指数加权标准差（秒）"""
+        return self.variance ** 0.5 if self.variance > 0 else 0.0
+
+
+@dataclass
+class FeedingHeatmapDTO:
+    """喂养热力图数据传输对象（某个宝宝某类喂养在一周内的 星期 × 小时 矩阵）"""
+    id: str = ""
+    baby_id: str = ""
+    feed_type: str = ""  # nursing, formula
+    week_start: str = ""  # 周一的本地日期 YYYY-MM-DD
+    counts: bytes = b""  # 7 × 24 个 int32 次数（小端序）
+    amounts: bytes = b""  # 7 × 24 个 float64 数量（母乳为分钟，配方奶为毫升）
+    timestamp: float = field(default_factory=lambda: datetime.now().timestamp())
+
+
+@dataclass
+class EventAggregateDTO:
+    """事件聚合数据传输对象（某个宝宝某类事件在一个统计周期内的可合并累计量）"""
+    id: str = ""
+    baby_id: str = ""
+    event_type: str = ""  # nursing, formula, sleep, diaper, playtime, bath
+    period: str = ""  # 统计周期（本地日期 YYYY-MM-DD）
+    count: int = 0
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    value_count: int = 0  # 有数值的事件数（均值和方差的样本数）
+    mean: float = 0.0
+    m2: float = 0.0  # 与均值之差的平方和（Welford）
+    hour_histogram: List[int] = field(default_factory=lambda: [0] * 24)
+    timestamp: float = field(default_factory=lambda: datetime.now().timestamp())
+
+
 @dataclass
 class HeadDTO:
     """头围记录数据传输对象"""
@@ -360,3 +450,34 @@ class VideoDTO:
     def duration_minutes(self) -> float:
         """视频时长（分钟）"""
         return self.duration / 60.0
+
+
+@dataclass
+class ExportJobDTO:
+    """导出任务数据传输对象"""
+    id: str = ""
+    baby_id: str = ""
+    status: ExportJobStatus = ExportJobStatus.QUEUED
+    format: str = ""
+    request: str = ""  # 序列化后的导出请求（JSON）
+    progress: int = 0  # 已写出的记录行数
+    file_path: Optional[str] = None
+    file_size: Optional[int] = None
+    record_count: Optional[int] = None
+    error_message: Optional[str] = None
+    created_at: float = field(default_factory=lambda: datetime.now().timestamp())
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timestamp: float = field(default_factory=lambda: datetime.now().timestamp())
+    
+    @property
+    def is_finished(self) -> bool:
+        """任务是否已结束（成功、失败或取消）"""
+        return self.status in (ExportJobStatus.DONE, ExportJobStatus.FAILED, ExportJobStatus.CANCELLED)
+    
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """任务运行时长（秒）"""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or datetime.now().timestamp()) - self.started_at
@@ -0,0 +1,40 @@
+"""
+导出任务相关模型
+"""
+from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey, Index
+from baby_tracker.models.base import BaseModel
+
+
+class ExportJob(BaseModel):
+    """后台导出任务表"""
+    
+    __tablename__ = 'ExportJob'
+    __table_args__ = (
+        Index('ix_ExportJob_BabyID_CreatedAt', 'BabyID', 'CreatedAt'),
+        Index('ix_ExportJob_Status', 'Status'),
+    )
+    
+    id = Column(String, primary_key=True, name='ID')
+    timestamp = Column(Float, name='Timestamp')
+    baby_id = Column(String, ForeignKey('Baby.ID'), name='BabyID', nullable=False)
+    
+    # 任务状态（queued, running, done, failed, cancelled）
+    status = Column(String, name='Status', nullable=False, default='queued')
+    
+    # 导出格式及序列化后的导出请求（JSON）
+    format = Column(String, name='Format', nullable=False)
+    request = Column(Text, name='Request', nullable=False)
+    
+    # 进度（已写出的记录行数）
+    progress = Column(Integer, name='Progress', default=0)
+    
+    # 导出结果
+    file_path = Column(String, name='FilePath', nullable=True)
+    file_size = Column(Integer, name='FileSize', nullable=True)
+    record_count = Column(Integer, name='RecordCount', nullable=True)
+    error_message = Column(Text, name='ErrorMessage', nullable=True)
+    
+    # 任务时间（Unix 时间戳）
+    created_at = Column(Float, name='CreatedAt', nullable=False)
+    started_at = Column(Float, name='StartedAt', nullable=True)
+    finished_at = Column(Float, name='FinishedAt', nullable=True)
@@ -2,7 +2,7 @@
 喂养相关模型
 """
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from baby_tracker.models.base import BaseModel
 
@@ -27,6 +27,9 @@ class Nursing(BaseModel, FeedingMixin):
     """母乳喂养记录表"""
     
     __tablename__ = 'Nursing'
+    __table_args__ = (
+        Index('ix_Nursing_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 喂养描述（可能关联到FeedDesc表）
     desc_id = Column(String, ForeignKey('FeedDesc.ID'), name='DescID', nullable=True)
@@ -59,6 +62,9 @@ class Formula(BaseModel, FeedingMixin):
     """配方奶喂养记录表"""
     
     __tablename__ = 'Formula'
+    __table_args__ = (
+        Index('ix_Formula_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 喂养描述
     desc_id = Column(String, ForeignKey('FeedDesc.ID'), name='DescID', nullable=True)
@@ -104,3 +110,48 @@ class Solids(BaseModel, FeedingMixin):
     # 关系
     baby: "Baby" = relationship("Baby", back_populates="solid_feeding_sessions")
     feed_desc: Optional["FeedDesc"] = relationship("FeedDesc")
+
+
+class FeedingCadence(BaseModel):
+    """喂养节律表（每个宝宝每个时段一行，喂养记录写入时增量更新）"""
+    
+    __tablename__ = 'FeedingCadence'
+    __table_args__ = (
+        Index('ix_FeedingCadence_BabyID_Bucket', 'BabyID', 'Bucket', unique=True),
+    )
+    
+    id = Column(String, primary_key=True, name='ID')
+    timestamp = Column(Float, name='Timestamp')
+    baby_id = Column(String, ForeignKey('Baby.ID'), name='BabyID', nullable=False)
+    
+    # 一天中的时段序号（按上一次喂养的本地时间划分）
+    bucket = Column(Integer, name='Bucket', nullable=False)
+    
+    # 喂养间隔（秒）的指数加权均值和方差，以及已计入的间隔数
+    count = Column(Integer, name='Count', nullable=False, default=0)
+    mean = Column(Float, name='Mean', nullable=False, default=0.0)
+    variance = Column(Float, name='Variance', nullable=False, default=0.0)
+    
+    # 该时段内最近一次喂养时间（Unix 时间戳）
+    last_feed_time = Column(Float, name='LastFeedTime', nullable=True)
+
+
+class FeedingHeatmap(BaseModel):
+    """喂养热力图表（每个宝宝、喂养类型、周一行，喂养记录写入时增量更新）"""
+    
+    __tablename__ = 'FeedingHeatmap'
+    __table_args__ = (
+        Index('ix_FeedingHeatmap_BabyID_FeedType_WeekStart', 'BabyID', 'FeedType', 'WeekStart', unique=True),
+    )
+    
+    id = Column(String, primary_key=True, name='ID')
+    timestamp = Column(Float, name='Timestamp')
+    baby_id = Column(String, ForeignKey('Baby.ID'), name='BabyID', nullable=False)
+    
+    # 喂养类型（nursing, formula）和周一的本地日期
+    feed_type = Column(String, name='FeedType', nullable=False)
+    week_start = Column(String, name='WeekStart', nullable=False)
+    
+    # 星期 × 小时 矩阵：次数（int32）和数量（float64，母乳为分钟，配方奶为毫升）
+    counts = Column(LargeBinary, name='Counts', nullable=False)
+    amounts = Column(LargeBinary, name='Amounts', nullable=False)
@@ -2,9 +2,10 @@
 健康医疗相关模型
 """
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from baby_tracker.models.base import BaseModel
+from baby_tracker.models.dto import FEVER_INDEX_THRESHOLD, get_fever_threshold
 
 if TYPE_CHECKING:
     from baby_tracker.models.baby import Baby
@@ -27,6 +28,9 @@ class Sleep(BaseModel, HealthMixin):
     """睡眠记录表"""
     
     __tablename__ = 'Sleep'
+    __table_args__ = (
+        Index('ix_Sleep_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 睡眠描述（开始睡觉/醒来等）
     desc_id = Column(String, ForeignKey('SleepDesc.ID'), name='DescID', nullable=True)
@@ -43,6 +47,9 @@ class Diaper(BaseModel, HealthMixin):
     """尿布记录表"""
     
     __tablename__ = 'Diaper'
+    __table_args__ = (
+        Index('ix_Diaper_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 尿布类型描述
     desc_id = Column(String, ForeignKey('DiaperDesc.ID'), name='DescID', nullable=True)
@@ -56,6 +63,9 @@ class Height(BaseModel, HealthMixin):
     """身高记录表"""
     
     __tablename__ = 'Height'
+    __table_args__ = (
+        Index('ix_Height_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 身高值（厘米）
     height = Column(Float, name='Height', nullable=False)
@@ -68,6 +78,9 @@ class Weight(BaseModel, HealthMixin):
     """体重记录表"""
     
     __tablename__ = 'Weight'
+    __table_args__ = (
+        Index('ix_Weight_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 体重值（克）
     weight = Column(Float, name='Weight', nullable=False)
@@ -80,6 +93,9 @@ class Head(BaseModel, HealthMixin):
     """头围记录表"""
     
     __tablename__ = 'Head'
+    __table_args__ = (
+        Index('ix_Head_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+    )
     
     # 头围值（厘米）
     head = Column(Float, name='Head', nullable=False)
@@ -92,6 +108,14 @@ class Temperature(BaseModel, HealthMixin):
     """体温记录表"""
     
     __tablename__ = 'Temperature'
+    __table_args__ = (
+        Index('ix_Temperature_BabyID_Timestamp', 'BabyID', 'Timestamp'),
+        # 发烧记录查询只扫描可能发烧的行（与迁移 00004 一致）
+        Index(
+            'ix_Temperature_BabyID_Time_fever', 'BabyID', 'Time',
+            sqlite_where=text(f'"Temperature" >= {FEVER_INDEX_THRESHOLD!r}')
+        ),
+    )
     
     # 体温值（摄氏度）
     temperature = Column(Float, name='Temperature', nullable=False)
@@ -104,17 +128,17 @@ class Temperature(BaseModel, HealthMixin):
     
     @property
     def is_fever(self) -> bool:
-        """判断是否发烧（基于腋下体温37.5°C）"""
-        return self.temperature >= 37.5
+        """判断是否发烧（阈值取决于测量位置）"""
+        return self.temperature >= get_fever_threshold(self.location)
     
     @property
     def temperature_status(self) -> str:
         """体温状态"""
         if self.temperature < 36.0:
             return "偏低"
+        elif self.is_fever:
+            return "发烧"
         elif self.temperature <= 37.0:
             return "正常"
-        elif self.temperature <= 37.5:
-            return "稍高"
         else:
-            return "发烧"
+            return "稍高"
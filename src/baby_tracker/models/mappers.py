@@ -1,11 +1,14 @@
 """
 数据映射器 - 在 SQLAlchemy 模型和 dataclasses DTO 之间转换
 """
-from typing import Optional, List
+from dataclasses import fields
+from enum import Enum
+from typing import Optional, List, Dict, Any, get_args
 from baby_tracker.models.dto import (
     BabyDTO, NursingDTO, FormulaDTO, SleepDTO, DiaperDTO,
     WeightDTO, HeightDTO, TemperatureDTO, Gender, FinishSide,
-    HeadDTO, BathDTO, PlaytimeDTO, PhotoDTO, VideoDTO
+    HeadDTO, BathDTO, PlaytimeDTO, PhotoDTO, VideoDTO,
+    ExportJobDTO, ExportJobStatus, FeedingCadenceDTO, EventAggregateDTO, FeedingHeatmapDTO
 )
 
 
@@ -515,3 +518,273 @@ class VideoMapper(DataMapper):
             description=video_dto.description,
             timestamp=video_dto.timestamp
         )
+
+
+class ExportJobMapper(DataMapper):
+    """导出任务映射器"""
+    
+    @staticmethod
+    def to_dto(job_model) -> ExportJobDTO:
+        """将 ExportJob 模型转换为 ExportJobDTO"""
+        if not job_model:
+            return None
+        
+        return ExportJobDTO(
+            id=job_model.id,
+            baby_id=job_model.baby_id,
+            status=ExportJobStatus(job_model.status),
+            format=job_model.format,
+            request=job_model.request,
+            progress=job_model.progress or 0,
+            file_path=job_model.file_path,
+            file_size=job_model.file_size,
+            record_count=job_model.record_count,
+            error_message=job_model.error_message,
+            created_at=job_model.created_at,
+            started_at=job_model.started_at,
+            finished_at=job_model.finished_at,
+            timestamp=job_model.timestamp
+        )
+    
+    @staticmethod
+    def from_dto(job_dto: ExportJobDTO):
+        """将 ExportJobDTO 转换为 ExportJob 模型"""
+        from baby_tracker.models.export import ExportJob
+        
+        return ExportJob(
+            id=job_dto.id,
+            baby_id=job_dto.baby_id,
+            status=job_dto.status.value,
+            format=job_dto.format,
+            request=job_dto.request,
+            progress=job_dto.progress,
+            file_path=job_dto.file_path,
+            file_size=job_dto.file_size,
+            record_count=job_dto.record_count,
+            error_message=job_dto.error_message,
+            created_at=job_dto.created_at,
+            started_at=job_dto.started_at,
+            finished_at=job_dto.finished_at,
+            timestamp=job_dto.timestamp
+        )
+    
+    @staticmethod
+    def update_model_from_dto(job_model, job_dto: ExportJobDTO):
+        """使用 ExportJobDTO 更新 ExportJob 模型"""
+        job_model.status = job_dto.status.value
+        job_model.progress = job_dto.progress
+        job_model.file_path = job_dto.file_path
+        job_model.file_size = job_dto.file_size
+        job_model.record_count = job_dto.record_count
+        job_model.error_message = job_dto.error_message
+        job_model.started_at = job_dto.started_at
+        job_model.finished_at = job_dto.finished_at
+        job_model.timestamp = job_dto.timestamp
+
+
+class DTODictMapper:
+    """DTO 与带类型标签的纯字典之间的映射（用于 NDJSON 等无损导入导出）"""
+    
+    # 类型标签 -> DTO 类
+    types = {
+        'baby': BabyDTO,
+        'nursing': NursingDTO,
+        'formula': FormulaDTO,
+        'sleep': SleepDTO,
+        'diaper': DiaperDTO,
+        'weight': WeightDTO,
+        'height': HeightDTO,
+        'head': HeadDTO,
+        'temperature': TemperatureDTO,
+        'playtime': PlaytimeDTO,
+        'bath': BathDTO,
+        'photo': PhotoDTO,
+        'video': VideoDTO,
+    }
+    
+    @classmethod
+    def type_of(cls, dto) -> str:
+        """获取 DTO 对应的类型标签"""
+        for type_name, dto_class in cls.types.items():
+            if type(dto) is dto_class:
+                return type_name
+        raise ValueError(f"未知的DTO类型: {type(dto).__name__}")
+    
+    @staticmethod
+    def to_dict(dto) -> Dict[str, Any]:
+        """将 DTO 的全部字段转换为可JSON序列化的字典（枚举保存为值）"""
+        result = {}
+        for dto_field in fields(dto):
+            value = getattr(dto, dto_field.name)
+            result[dto_field.name] = value.value if isinstance(value, Enum) else value
+        return result
+    
+    @classmethod
+    def from_dict(cls, type_name: str, data: Dict[str, Any]):
+        """根据类型标签和字典还原 DTO（忽略未知字段，枚举按值还原）"""
+        dto_class = cls.types.get(type_name)
+        if dto_class is None:
+            raise ValueError(f"未知的记录类型: {type_name}")
+        
+        values = {}
+        for dto_field in fields(dto_class):
+            if dto_field.name not in data:
+                continue
+            value = data[dto_field.name]
+            enum_class = next(
+                (arg for arg in (dto_field.type, *get_args(dto_field.type))
+                 if isinstance(arg, type) and issubclass(arg, Enum)),
+                None
+            )
+            if enum_class is not None and value is not None:
+                value = enum_class(value)
+            values[dto_field.name] = value
+        return dto_class(**values)
+
+
+class FeedingCadenceMapper(DataMapper):
+    """喂养节律映射器"""
+    
+    @staticmethod
+    def to_dto(cadence_model) -> FeedingCadenceDTO:
+        """将 FeedingCadence 模型转换为 FeedingCadenceDTO"""
+        if not cadence_model:
+            return None
+        
+        return FeedingCadenceDTO(
+            id=cadence_model.id,
+            baby_id=cadence_model.baby_id,
+            bucket=cadence_model.bucket,
+            count=cadence_model.count or 0,
+            mean=cadence_model.mean or 0.0,
+            variance=cadence_model.variance or 0.0,
+            last_feed_time=cadence_model.last_feed_time,
+            timestamp=cadence_model.timestamp
+        )
+    
+    @staticmethod
+    def from_dto(cadence_dto: FeedingCadenceDTO):
+        """将 FeedingCadenceDTO 转换为 FeedingCadence 模型"""
+        from baby_tracker.models.feeding import FeedingCadence
+        
+        return FeedingCadence(
+            id=cadence_dto.id,
+            baby_id=cadence_dto.baby_id,
+            bucket=cadence_dto.bucket,
+            count=cadence_dto.count,
+            mean=cadence_dto.mean,
+            variance=cadence_dto.variance,
+            last_feed_time=cadence_dto.last_feed_time,
+            timestamp=cadence_dto.timestamp
+        )
+    
+    @staticmethod
+    def update_model_from_dto(cadence_model, cadence_dto: FeedingCadenceDTO):
+        """使用 FeedingCadenceDTO 更新 FeedingCadence 模型"""
+        cadence_model.count = cadence_dto.count
+        cadence_model.mean = cadence_dto.mean
+        cadence_model.variance = cadence_dto.variance
+        cadence_model.last_feed_time = cadence_dto.last_feed_time
+        cadence_model.timestamp = cadence_dto.timestamp
+
+
+class FeedingHeatmapMapper(DataMapper):
+    """喂养热力图映射器"""
+    
+    @staticmethod
+    def to_dto(heatmap_model) -> FeedingHeatmapDTO:
+        """将 FeedingHeatmap 模型转换为 FeedingHeatmapDTO"""
+        if not heatmap_model:
+            return None
+        
+        return FeedingHeatmapDTO(
+            id=heatmap_model.id,
+            baby_id=heatmap_model.baby_id,
+            feed_type=heatmap_model.feed_type,
+            week_start=heatmap_model.week_start,
+            counts=heatmap_model.counts,
+            amounts=heatmap_model.amounts,
+            timestamp=heatmap_model.timestamp
+        )
+    
+    @staticmethod
+    def from_dto(heatmap_dto: FeedingHeatmapDTO):
+        """将 FeedingHeatmapDTO 转换为 FeedingHeatmap 模型"""
+        from baby_tracker.models.feeding import FeedingHeatmap
+        
+        return FeedingHeatmap(
+            id=heatmap_dto.id,
+            baby_id=heatmap_dto.baby_id,
+            feed_type=heatmap_dto.feed_type,
+            week_start=heatmap_dto.week_start,
+            counts=heatmap_dto.counts,
+            amounts=heatmap_dto.amounts,
+            timestamp=heatmap_dto.timestamp
+        )
+    
+    @staticmethod
+    def update_model_from_dto(heatmap_model, heatmap_dto: FeedingHeatmapDTO):
+        """使用 FeedingHeatmapDTO 更新 FeedingHeatmap 模型"""
+        heatmap_model.counts = heatmap_dto.counts
+        heatmap_model.amounts = heatmap_dto.amounts
+        heatmap_model.timestamp = heatmap_dto.timestamp
+
+
+class EventAggregateMapper(DataMapper):
+    """事件聚合映射器"""
+    
+    @staticmethod
+    def to_dto(aggregate_model) -> EventAggregateDTO:
+        """将 EventAggregate 模型转换为 EventAggregateDTO"""
+        if not aggregate_model:
+            return None
+        
+        return EventAggregateDTO(
+            id=aggregate_model.id,
+            baby_id=aggregate_model.baby_id,
+            event_type=aggregate_model.event_type,
+            period=aggregate_model.period,
+            count=aggregate_model.count or 0,
+            total=aggregate_model.total or 0.0,
+            minimum=aggregate_model.minimum,
+            maximum=aggregate_model.maximum,
+            value_count=aggregate_model.value_count or 0,
+            mean=aggregate_model.mean or 0.0,
+            m2=aggregate_model.m2 or 0.0,
+            hour_histogram=[int(value) for value in aggregate_model.hour_histogram.split(',')],
+            timestamp=aggregate_model.timestamp
+        )
+    
+    @staticmethod
+    def from_dto(aggregate_dto: EventAggregateDTO):
+        """将 EventAggregateDTO 转换为 EventAggregate 模型"""
+        from baby_tracker.models.aggregate import EventAggregate
+        
+        return EventAggregate(
+            id=aggregate_dto.id,
+            baby_id=aggregate_dto.baby_id,
+            event_type=aggregate_dto.event_type,
+            period=aggregate_dto.period,
+            count=aggregate_dto.count,
+            total=aggregate_dto.total,
+            minimum=aggregate_dto.minimum,
+            maximum=aggregate_dto.maximum,
+            value_count=aggregate_dto.value_count,
+            mean=aggregate_dto.mean,
+            m2=aggregate_dto.m2,
+            hour_histogram=','.join(str(value) for value in aggregate_dto.hour_histogram),
+            timestamp=aggregate_dto.timestamp
+        )
+    
+    @staticmethod
+    def update_model_from_dto(aggregate_model, aggregate_dto: EventAggregateDTO):
+        """使用 EventAggregateDTO 更新 EventAggregate 模型"""
+        aggregate_model.count = aggregate_dto.count
+        aggregate_model.total = aggregate_dto.total
+        aggregate_model.minimum = aggregate_dto.minimum
+        aggregate_model.maximum = aggregate_dto.maximum
+        aggregate_model.value_count = aggregate_dto.value_count
+        aggregate_model.mean = aggregate_dto.mean
+        aggregate_model.m2 = aggregate_dto.m2
+        aggregate_model.hour_histogram = ','.join(str(value) for value in aggregate_dto.hour_histogram)
+        aggregate_model.timestamp = aggregate_dto.timestamp
@@ -7,12 +7,17 @@ Baby Tracker 仓储层
 - 喂养仓储：喂养记录相关数据访问
 - 健康仓储：健康记录相关数据访问
 - 活动仓储：活动记录相关数据访问
+- 导出任务仓储：后台导出任务记录
+- 事件聚合仓储：按周期保存的可合并统计
 """
 
 try:
     from .base_repository import BaseRepository
     from .baby_repository import BabyRepository
-    from .feeding_repository import NursingRepository, FormulaRepository, FeedingStatsRepository
+    from .feeding_repository import (
+        NursingRepository, FormulaRepository, FeedingStatsRepository, FeedingCadenceRepository,
+        FeedingHeatmapRepository
+    )
     from .health_repository import (
         SleepRepository, DiaperRepository, WeightRepository, 
         HeightRepository, HeadRepository, TemperatureRepository
@@ -20,6 +25,8 @@ try:
     from .activity_repository import (
         PlaytimeRepository, BathRepository, PhotoRepository, VideoRepository
     )
+    from .export_repository import ExportJobRepository
+    from .aggregate_repository import EventAggregateRepository
     
     __all__ = [
         'BaseRepository',
@@ -27,6 +34,8 @@ try:
         'NursingRepository',
         'FormulaRepository',
         'FeedingStatsRepository',
+        'FeedingCadenceRepository',
+        'FeedingHeatmapRepository',
         'SleepRepository',
         'DiaperRepository',
         'WeightRepository',
@@ -37,6 +46,8 @@ try:
         'BathRepository',
         'PhotoRepository',
         'VideoRepository',
+        'ExportJobRepository',
+        'EventAggregateRepository',
     ]
 except ImportError:
     __all__ = []
\ No newline at end of file
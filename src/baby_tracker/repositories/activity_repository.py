@@ -1,7 +1,7 @@
 """
 活动相关仓储 - 使用 dataclasses DTO
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
@@ -24,6 +24,9 @@ class PlaytimeRepository(BaseRepository[PlaytimeDTO, 'Playtime']):
     def _get_mapper(self):
         return PlaytimeMapper
     
+    def _get_daily_value(self):
+        return self.model_class.duration
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[PlaytimeDTO]:
         """根据宝宝ID查找游戏记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -96,6 +99,9 @@ class BathRepository(BaseRepository[BathDTO, 'Bath']):
     def _get_mapper(self):
         return BathMapper
     
+    def _get_daily_value(self):
+        return self.model_class.duration
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[BathDTO]:
         """根据宝宝ID查找洗澡记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -122,6 +128,25 @@ class BathRepository(BaseRepository[BathDTO, 'Bath']):
         
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
+    def get_bath_summary(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[int, int, Optional[float]]:
+        """单条聚合查询统计 (洗澡次数, 总时长, 平均水温)；未记录水温的不计入平均水温"""
+        count, total_duration, avg_temperature = self.db_session.query(
+            func.count(self.model_class.id),
+            func.coalesce(func.sum(self.model_class.duration), 0),
+            func.avg(func.nullif(self.model_class.water_temperature, 0))
+        ).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+            )
+        ).one()
+        return count, total_duration, avg_temperature
+    
     def get_bath_frequency(self, baby_id: str, days: int = 30) -> float:
         """计算洗澡频率（每周次数）"""
         end_date = datetime.now()
@@ -174,19 +199,14 @@ class PhotoRepository(BaseRepository[PhotoDTO, 'Photo']):
         
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
-    def get_photo_count_by_month(self, baby_id: str) -> dict:
-        """按月统计照片数量"""
-        result = {}
-        
-        # 获取所有照片记录
-        photos = self.find_by_baby_id(baby_id)
-        
-        for photo in photos:
-            photo_time = datetime.fromtimestamp(photo.time)
-            month_key = f"{photo_time.year}-{photo_time.month:02d}"
-            result[month_key] = result.get(month_key, 0) + 1
+    def get_photo_count_by_month(self, baby_id: str) -> Dict[str, int]:
+        """按本地月份（YYYY-MM）统计照片数量，单条 GROUP BY 查询"""
+        month = func.strftime('%Y-%m', self.model_class.time, 'unixepoch', 'localtime')
+        query = self.db_session.query(month, func.count(self.model_class.id)).filter(
+            self.model_class.baby_id == baby_id
+        ).group_by(month).order_by(month)
         
-        return result
+        return {month_key: count for month_key, count in query}
 
 
 class VideoRepository(BaseRepository[VideoDTO, 'Video']):
@@ -222,6 +242,14 @@ class VideoRepository(BaseRepository[VideoDTO, 'Video']):
         
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
+    def get_video_totals(self, baby_id: str) -> Tuple[int, int]:
+        """单条聚合查询统计 (视频数量, 总时长（秒）)"""
+        count, total_duration = self.db_session.query(
+            func.count(self.model_class.id),
+            func.coalesce(func.sum(self.model_class.duration), 0)
+        ).filter(self.model_class.baby_id == baby_id).one()
+        return count, total_duration
+    
     def get_total_video_duration(self, baby_id: str) -> int:
         """获取视频总时长（秒）"""
         result = self.db_session.query(func.sum(self.model_class.duration)).filter(
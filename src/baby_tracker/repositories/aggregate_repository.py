@@ -0,0 +1,82 @@
+"""
+事件聚合仓储 - 使用 dataclasses DTO
+"""
+from typing import Iterable, List, Optional
+from baby_tracker.models.dto import EventAggregateDTO
+from baby_tracker.models.mappers import EventAggregateMapper
+from baby_tracker.repositories.base_repository import BaseRepository
+
+
+class EventAggregateRepository(BaseRepository[EventAggregateDTO, 'EventAggregate']):
+    """事件聚合仓储"""
+    
+    def _get_model_class(self):
+        from baby_tracker.models.aggregate import EventAggregate
+        return EventAggregate
+    
+    def _get_mapper(self):
+        return EventAggregateMapper
+    
+    def get_period(self, baby_id: str, event_type: str, period: str) -> Optional[EventAggregateDTO]:
+        """获取一个统计周期的聚合（唯一索引查找）"""
+        model_instance = self._query(baby_id, event_type).filter(
+            self.model_class.period == period
+        ).first()
+        return self.mapper.to_dto(model_instance) if model_instance else None
+    
+    def find_by_period_range(
+        self,
+        baby_id: str,
+        event_type: str,
+        first_period: Optional[str] = None,
+        last_period: Optional[str] = None
+    ) -> List[EventAggregateDTO]:
+        """获取统计周期范围内（含两端，不指定则不限）的聚合，按周期排序"""
+        query = self._query(baby_id, event_type)
+        if first_period is not None:
+            query = query.filter(self.model_class.period >= first_period)
+        if last_period is not None:
+            query = query.filter(self.model_class.period <= last_period)
+        
+        model_instances = query.order_by(self.model_class.period.asc()).all()
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def find_by_periods(self, baby_id: str, event_type: str, periods: Iterable[str]) -> List[EventAggregateDTO]:
+        """获取指定统计周期的聚合，按周期排序"""
+        model_instances = self._query(baby_id, event_type).filter(
+            self.model_class.period.in_(list(periods))
+        ).order_by(self.model_class.period.asc()).all()
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def save(self, dto: EventAggregateDTO, commit: bool = True) -> None:
+        """新建或更新一个统计周期的聚合（commit 为 False 时由调用方提交）"""
+        model_instance = self.db_session.query(self.model_class).filter(
+            self.model_class.id == dto.id
+        ).first()
+        if model_instance is None:
+            self.db_session.add(self.mapper.from_dto(dto))
+        else:
+            self.mapper.update_model_from_dto(model_instance, dto)
+        self._save_changes(commit)
+    
+    def replace_periods(
+        self,
+        baby_id: str,
+        event_type: str,
+        periods: Optional[Iterable[str]],
+        dtos: List[EventAggregateDTO],
+        commit: bool = True
+    ) -> None:
+        """在一个事务中删除指定统计周期（None 表示全部周期）的旧聚合并写入新聚合（commit 为 False 时由调用方提交）"""
+        query = self._query(baby_id, event_type)
+        if periods is not None:
+            query = query.filter(self.model_class.period.in_(list(periods)))
+        query.delete(synchronize_session=False)
+        self.db_session.add_all([self.mapper.from_dto(dto) for dto in dtos])
+        self._save_changes(commit)
+    
+    def _query(self, baby_id: str, event_type: str):
+        return self.db_session.query(self.model_class).filter(
+            self.model_class.baby_id == baby_id,
+            self.model_class.event_type == event_type
+        )
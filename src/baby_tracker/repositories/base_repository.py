@@ -2,7 +2,10 @@
 基础仓储类 - 使用 dataclasses DTO
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, Generic, TypeVar, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Optional, Generic, TypeVar, Dict, Any, Iterator, Tuple, Sequence
+from sqlalchemy import Integer, and_, column, func, inspect, literal, null, select, table
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 from baby_tracker.database import get_db
 
@@ -29,11 +32,11 @@ class BaseRepository(ABC, Generic[T, M]):
         """获取对应的数据映射器"""
         pass
     
-    def create(self, dto: T) -> T:
-        """创建新记录"""
+    def create(self, dto: T, commit: bool = True) -> T:
+        """创建新记录（commit 为 False 时只写入当前事务，由调用方提交或回滚）"""
         model_instance = self.mapper.from_dto(dto)
         self.db_session.add(model_instance)
-        self.db_session.commit()
+        self._save_changes(commit)
         self.db_session.refresh(model_instance)
         return self.mapper.to_dto(model_instance)
     
@@ -52,8 +55,8 @@ class BaseRepository(ABC, Generic[T, M]):
         model_instances = query.all()
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
-    def update(self, record_id: str, dto: T) -> Optional[T]:
-        """更新记录"""
+    def update(self, record_id: str, dto: T, commit: bool = True) -> Optional[T]:
+        """更新记录（commit 为 False 时只写入当前事务，由调用方提交或回滚）"""
         model_instance = self.db_session.query(self.model_class).filter(
             self.model_class.id == record_id
         ).first()
@@ -62,12 +65,12 @@ class BaseRepository(ABC, Generic[T, M]):
             return None
         
         self.mapper.update_model_from_dto(model_instance, dto)
-        self.db_session.commit()
+        self._save_changes(commit)
         self.db_session.refresh(model_instance)
         return self.mapper.to_dto(model_instance)
     
-    def delete(self, record_id: str) -> bool:
-        """删除记录"""
+    def delete(self, record_id: str, commit: bool = True) -> bool:
+        """删除记录（commit 为 False 时只写入当前事务，由调用方提交或回滚）"""
         model_instance = self.db_session.query(self.model_class).filter(
             self.model_class.id == record_id
         ).first()
@@ -76,9 +79,16 @@ class BaseRepository(ABC, Generic[T, M]):
             return False
         
         self.db_session.delete(model_instance)
-        self.db_session.commit()
+        self._save_changes(commit)
         return True
     
+    def _save_changes(self, commit: bool) -> None:
+        """提交会话；commit 为 False 时只把改动刷新到当前事务，后续查询可以读到"""
+        if commit:
+            self.db_session.commit()
+        else:
+            self.db_session.flush()
+    
     def count(self) -> int:
         """获取记录总数"""
         return self.db_session.query(self.model_class).count()
@@ -100,6 +110,272 @@ class BaseRepository(ABC, Generic[T, M]):
             self.model_class.id == record_id
         ).first() is not None
     
+    def iter_by_date_range(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        descending: bool = True,
+        batch_size: int = 1000,
+        since_timestamp: Optional[float] = None
+    ) -> Iterator[T]:
+        """
+        按日期范围流式读取记录（分批从游标获取，不会一次性加载全部结果）
+        
+        指定 since_timestamp 时只返回 Timestamp 晚于该时间（之后新增或修改）的记录。
+        """
+        order = self.model_class.time.desc() if descending else self.model_class.time.asc()
+        query = self.db_session.query(self.model_class).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+            )
+        )
+        if since_timestamp is not None:
+            query = query.filter(self.model_class.timestamp > since_timestamp)
+        query = query.order_by(order).yield_per(batch_size)
+        
+        for instance in query:
+            yield self.mapper.to_dto(instance)
+    
+    def _get_daily_value(self):
+        """按天汇总时求和的数值表达式（None 表示只统计记录数）"""
+        return None
+    
+    def _local_day(self):
+        """记录时间的本地日期（YYYY-MM-DD）表达式"""
+        return func.date(self.model_class.time, 'unixepoch', 'localtime')
+    
+    def _local_bucket(self, bucket: str):
+        """记录时间按本地时间分组的标签表达式（hour / day / week / month）"""
+        time = self.model_class.time
+        if bucket == 'hour':
+            return func.strftime('%Y-%m-%d %H:00', time, 'unixepoch', 'localtime')
+        if bucket == 'day':
+            return self._local_day()
+        if bucket == 'week':
+            # 先前进到本周日（周日保持不变），再退回到周一
+            return func.date(time, 'unixepoch', 'localtime', 'weekday 0', '-6 days')
+        if bucket == 'month':
+            return func.strftime('%Y-%m-01', time, 'unixepoch', 'localtime')
+        raise ValueError(f"不支持的分组粒度: {bucket}")
+    
+    def get_bucketed_totals(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: str = 'day'
+    ) -> List[Tuple[str, int, float]]:
+        """
+        按本地时间的小时、日、周或月分组统计记录数和数值总和，单条 GROUP BY 查询
+        
+        返回按标签升序的 (分组标签, 记录数, 数值总和)，只包含有记录的分组；
+        标签依次为 YYYY-MM-DD HH:00、YYYY-MM-DD、所在周周一的 YYYY-MM-DD、YYYY-MM-01。
+        """
+        label = self._local_bucket(bucket)
+        value = self._get_daily_value()
+        total = func.coalesce(func.sum(value), 0) if value is not None else literal(0)
+        query = self.db_session.query(label, func.count(self.model_class.id), total).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+            )
+        ).group_by(label).order_by(label)
+        
+        return [(bucket_label, count, float(total or 0)) for bucket_label, count, total in query]
+    
+    def get_weekday_hour_totals(
+        self,
+        baby_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Tuple[str, int, int, int, float]]:
+        """
+        按本地时间的 (所在周周一, 星期, 小时) 分组统计记录数和数值总和，单条 GROUP BY 查询
+        
+        返回 (周一的 YYYY-MM-DD, 星期（0 为周一）, 小时, 记录数, 数值总和)，只包含有记录的分组；
+        不指定日期时统计宝宝的全部记录。
+        """
+        time = self.model_class.time
+        week = self._local_bucket('week')
+        weekday = (func.cast(func.strftime('%w', time, 'unixepoch', 'localtime'), Integer) + 6) % 7
+        hour = func.cast(func.strftime('%H', time, 'unixepoch', 'localtime'), Integer)
+        value = self._get_daily_value()
+        total = func.coalesce(func.sum(value), 0) if value is not None else literal(0)
+        query = self.db_session.query(week, weekday, hour, func.count(self.model_class.id), total).filter(
+            self.model_class.baby_id == baby_id
+        )
+        if start_date is not None:
+            query = query.filter(time >= start_date.timestamp())
+        if end_date is not None:
+            query = query.filter(time <= end_date.timestamp())
+        query = query.group_by(week, weekday, hour)
+        
+        return [
+            (week_start, int(day), int(hour), count, float(total or 0))
+            for week_start, day, hour, count, total in query
+        ]
+    
+    def get_daily_totals(
+        self,
+        baby_ids: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[str, str, int, float]]:
+        """
+        按 (宝宝, 本地日期) 分组统计记录数和数值总和，单条 GROUP BY 查询
+        
+        返回 (宝宝ID, YYYY-MM-DD, 记录数, 数值总和)；baby_ids 为 None 时统计全部宝宝。
+        """
+        day = self._local_day()
+        value = self._get_daily_value()
+        total = func.coalesce(func.sum(value), 0) if value is not None else literal(0)
+        query = self.db_session.query(
+            self.model_class.baby_id, day, func.count(self.model_class.id), total
+        ).filter(
+            self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+        )
+        if baby_ids is not None:
+            query = query.filter(self.model_class.baby_id.in_(baby_ids))
+        
+        return [
+            (baby_id, day_label, count, float(total or 0))
+            for baby_id, day_label, count, total in query.group_by(self.model_class.baby_id, day)
+        ]
+    
+    def get_daily_breakdown(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        group_column=None
+    ) -> List[Tuple[str, Any, int, Any]]:
+        """
+        按 (本地日期, 分组列) 统计记录数和数值总和，单条 GROUP BY 查询
+        
+        返回 (YYYY-MM-DD, 分组值, 记录数, 数值总和)；group_column 为 None 时只按日期分组，分组值为 None。
+        """
+        day = self._local_day()
+        value = self._get_daily_value()
+        total = func.coalesce(func.sum(value), 0) if value is not None else literal(0)
+        group = group_column if group_column is not None else null()
+        query = self.db_session.query(day, group, func.count(self.model_class.id), total).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+            )
+        )
+        query = query.group_by(day, group_column) if group_column is not None else query.group_by(day)
+        
+        return [tuple(row) for row in query.order_by(day)]
+    
+    def get_rolling_totals(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        windows: Sequence[int]
+    ) -> List[Tuple]:
+        """
+        每日 (记录数, 数值总和) 及其滑动窗口统计，单条 SQL
+        
+        递归 CTE 生成连续日历并左连接按本地日期分组的结果（没有记录的日期按 0 计），
+        再用 ROWS BETWEEN n-1 PRECEDING AND CURRENT ROW 窗口函数计算各窗口的合计和日均。
+        日历从 start_date 前 max(windows)-1 天开始，因此第一天的窗口也是完整的。
+        
+        返回按日期升序的行：(YYYY-MM-DD, 记录数, 数值总和, 之后每个窗口依次为
+        记录数合计, 数值合计, 记录数日均, 数值日均)。
+        """
+        first_day = start_date.date() - timedelta(days=max(windows, default=1) - 1)
+        last_day = end_date.date()
+        
+        calendar = select(literal(first_day.isoformat()).label('day')).cte('calendar', recursive=True)
+        calendar = calendar.union_all(
+            select(func.date(calendar.c.day, '+1 day')).where(calendar.c.day < last_day.isoformat())
+        )
+        
+        day = self._local_day()
+        value = self._get_daily_value()
+        lower = datetime.combine(first_day, datetime.min.time()).timestamp()
+        upper = datetime.combine(last_day + timedelta(days=1), datetime.min.time()).timestamp()
+        daily = select(
+            day.label('day'),
+            func.count(self.model_class.id).label('count'),
+            (func.sum(value) if value is not None else literal(0)).label('total')
+        ).where(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time >= lower,
+                self.model_class.time < upper
+            )
+        ).group_by(day).subquery('daily')
+        
+        series = select(
+            calendar.c.day,
+            func.coalesce(daily.c.count, 0).label('count'),
+            func.coalesce(daily.c.total, 0.0).label('total')
+        ).select_from(
+            calendar.outerjoin(daily, daily.c.day == calendar.c.day)
+        ).subquery('series')
+        
+        columns = [series.c.day, series.c.count, series.c.total]
+        for window in windows:
+            frame = {'order_by': series.c.day, 'rows': (-(window - 1), 0)}
+            columns += [
+                func.sum(series.c.count).over(**frame).label(f'count_sum_{window}'),
+                func.sum(series.c.total).over(**frame).label(f'total_sum_{window}'),
+                func.avg(series.c.count).over(**frame).label(f'count_avg_{window}'),
+                func.avg(series.c.total).over(**frame).label(f'total_avg_{window}'),
+            ]
+        rolling = select(*columns).subquery('rolling')
+        
+        query = select(rolling).where(
+            rolling.c.day >= start_date.date().isoformat()
+        ).order_by(rolling.c.day)
+        return [tuple(row) for row in self.db_session.execute(query)]
+    
+    def iter_by_baby_id(self, baby_id: str, batch_size: int = 1000) -> Iterator[T]:
+        """按时间升序流式读取宝宝的全部记录"""
+        query = self.db_session.query(self.model_class).filter(
+            self.model_class.baby_id == baby_id
+        ).order_by(self.model_class.time.asc()).yield_per(batch_size)
+        for instance in query:
+            yield self.mapper.to_dto(instance)
+    
+    def get_baby_times(self, record_ids: Sequence[str], chunk_size: int = 500) -> List[Tuple[str, float]]:
+        """已存在记录的 (宝宝ID, 时间)，按 chunk_size 个 ID 一组查询（不存在的 ID 被忽略）"""
+        rows = []
+        for start in range(0, len(record_ids), chunk_size):
+            rows.extend(self.db_session.query(self.model_class.baby_id, self.model_class.time).filter(
+                self.model_class.id.in_(record_ids[start:start + chunk_size])
+            ))
+        return [(baby_id, time) for baby_id, time in rows]
+    
+    def iter_times(self, baby_id: str, batch_size: int = 1000) -> Iterator[float]:
+        """按时间升序流式读取宝宝全部记录的时间（只读取 Time 一列）"""
+        query = self.db_session.query(self.model_class.time).filter(
+            self.model_class.baby_id == baby_id
+        ).order_by(self.model_class.time.asc()).yield_per(batch_size)
+        for (time,) in query:
+            yield time
+    
+    def get_latest_time_by_hour(self, baby_id: str) -> Dict[int, float]:
+        """宝宝每个本地小时（0-23）中最近一条记录的时间，单条 GROUP BY 查询"""
+        hour = func.cast(func.strftime('%H', self.model_class.time, 'unixepoch', 'localtime'), Integer)
+        rows = self.db_session.query(hour, func.max(self.model_class.time)).filter(
+            self.model_class.baby_id == baby_id
+        ).group_by(hour)
+        return {int(hour): time for hour, time in rows}
+    
+    def get_data_version(self, baby_id: str) -> Tuple[int, Optional[float]]:
+        """宝宝记录的数据版本：(记录数, 最大 Timestamp)，单条聚合查询"""
+        count, max_timestamp = self.db_session.query(
+            func.count(self.model_class.id),
+            func.max(self.model_class.timestamp)
+        ).filter(self.model_class.baby_id == baby_id).one()
+        return count, max_timestamp
+    
     def bulk_create(self, dtos: List[T]) -> List[T]:
         """批量创建记录"""
         model_instances = [self.mapper.from_dto(dto) for dto in dtos]
@@ -111,6 +387,53 @@ class BaseRepository(ABC, Generic[T, M]):
         
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
+    def get_desc_names(self) -> Dict[str, str]:
+        """
+        描述ID -> 名称（DescID 外键指向的查找表，如 DiaperDesc、SleepDesc）
+        
+        没有 DescID 列的记录类型返回空字典。
+        """
+        desc_column = self.model_class.__table__.columns.get('DescID')
+        if desc_column is None or not desc_column.foreign_keys:
+            return {}
+        lookup_name = next(iter(desc_column.foreign_keys)).target_fullname.split('.')[0]
+        lookup = table(lookup_name, column('ID'), column('Name'))
+        return dict(self.db_session.execute(select(lookup.c.ID, lookup.c.Name)).all())
+    
+    def bulk_insert(self, dtos: List[T]) -> int:
+        """批量插入记录（单个事务提交，不回读实例），返回插入的条数"""
+        if not dtos:
+            return 0
+        self.db_session.add_all([self.mapper.from_dto(dto) for dto in dtos])
+        self.db_session.commit()
+        return len(dtos)
+    
+    def bulk_upsert(self, dtos: List[T], commit: bool = True) -> int:
+        """
+        批量写入记录，主键已存在时更新该行（INSERT … ON CONFLICT(ID) DO UPDATE），返回写入的条数
+        
+        commit 为 False 时不提交，由调用方在同一事务中提交或回滚。
+        """
+        if not dtos:
+            return 0
+        attributes = [(attribute.key, attribute.columns[0].name) for attribute in inspect(self.model_class).column_attrs]
+        rows = []
+        for dto in dtos:
+            instance = self.mapper.from_dto(dto)
+            rows.append({name: getattr(instance, key) for key, name in attributes})
+        
+        model_table = self.model_class.__table__
+        primary_keys = {key_column.name for key_column in model_table.primary_key.columns}
+        statement = insert(model_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=sorted(primary_keys),
+            set_={name: statement.excluded[name] for _, name in attributes if name not in primary_keys}
+        )
+        self.db_session.execute(statement, rows)
+        if commit:
+            self.db_session.commit()
+        return len(dtos)
+    
     def close(self):
         """关闭数据库会话"""
         if self.db_session:
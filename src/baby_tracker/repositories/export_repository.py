@@ -0,0 +1,64 @@
+"""
+导出任务仓储 - 使用 dataclasses DTO
+"""
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from baby_tracker.models.dto import ExportJobDTO, ExportJobStatus
+from baby_tracker.models.mappers import ExportJobMapper
+from baby_tracker.repositories.base_repository import BaseRepository
+
+
+class ExportJobRepository(BaseRepository[ExportJobDTO, 'ExportJob']):
+    """导出任务仓储"""
+    
+    def _get_model_class(self):
+        from baby_tracker.models.export import ExportJob
+        return ExportJob
+    
+    def _get_mapper(self):
+        return ExportJobMapper
+    
+    def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[ExportJobDTO]:
+        """根据宝宝ID查找导出任务（最新的在前）"""
+        query = self.db_session.query(self.model_class).filter(
+            self.model_class.baby_id == baby_id
+        ).order_by(self.model_class.created_at.desc())
+        
+        if limit:
+            query = query.limit(limit)
+        
+        model_instances = query.all()
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def find_by_status(self, *statuses: ExportJobStatus) -> List[ExportJobDTO]:
+        """根据状态查找导出任务"""
+        model_instances = self.db_session.query(self.model_class).filter(
+            self.model_class.status.in_([status.value for status in statuses])
+        ).order_by(self.model_class.created_at.asc()).all()
+        
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def update_progress(self, job_id: str, progress: int) -> None:
+        """只更新任务进度（不回读记录）"""
+        self.db_session.query(self.model_class).filter(
+            self.model_class.id == job_id
+        ).update({
+            self.model_class.progress: progress,
+            self.model_class.timestamp: datetime.now().timestamp(),
+        }, synchronize_session=False)
+        self.db_session.commit()
+    
+    def fail_unfinished(self, error_message: str) -> int:
+        """将排队中或运行中的任务标记为失败（用于进程重启后清理），返回更新的条数"""
+        now = datetime.now().timestamp()
+        count = self.db_session.query(self.model_class).filter(
+            self.model_class.status.in_([ExportJobStatus.QUEUED.value, ExportJobStatus.RUNNING.value])
+        ).update({
+            self.model_class.status: ExportJobStatus.FAILED.value,
+            self.model_class.error_message: error_message,
+            self.model_class.finished_at: now,
+            self.model_class.timestamp: now,
+        }, synchronize_session=False)
+        self.db_session.commit()
+        return count
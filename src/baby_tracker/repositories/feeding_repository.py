@@ -1,12 +1,16 @@
 """
 喂养相关仓储 - 使用 dataclasses DTO
 """
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
-from baby_tracker.models.dto import NursingDTO, FormulaDTO, FeedingStatsDTO
-from baby_tracker.models.mappers import NursingMapper, FormulaMapper
+from baby_tracker.models.dto import (
+    NursingDTO, FormulaDTO, FeedingStatsDTO, FeedingCadenceDTO, FeedingHeatmapDTO
+)
+from baby_tracker.models.mappers import (
+    NursingMapper, FormulaMapper, FeedingCadenceMapper, FeedingHeatmapMapper
+)
 from baby_tracker.repositories.base_repository import BaseRepository
 
 
@@ -20,6 +24,11 @@ class NursingRepository(BaseRepository[NursingDTO, 'Nursing']):
     def _get_mapper(self):
         return NursingMapper
     
+    def _get_daily_value(self):
+        return (
+            self.model_class.left_duration + self.model_class.right_duration + self.model_class.both_duration
+        )
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[NursingDTO]:
         """根据宝宝ID查找喂养记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -95,6 +104,9 @@ class FormulaRepository(BaseRepository[FormulaDTO, 'Formula']):
     def _get_mapper(self):
         return FormulaMapper
     
+    def _get_daily_value(self):
+        return self.model_class.amount
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[FormulaDTO]:
         """根据宝宝ID查找配方奶记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -154,6 +166,115 @@ class FormulaRepository(BaseRepository[FormulaDTO, 'Formula']):
         return result or 0.0
 
 
+class FeedingCadenceRepository(BaseRepository[FeedingCadenceDTO, 'FeedingCadence']):
+    """喂养节律仓储（每个宝宝最多一天的时段数行）"""
+    
+    def _get_model_class(self):
+        from baby_tracker.models.feeding import FeedingCadence
+        return FeedingCadence
+    
+    def _get_mapper(self):
+        return FeedingCadenceMapper
+    
+    def find_by_baby_id(self, baby_id: str) -> List[FeedingCadenceDTO]:
+        """获取宝宝各时段的喂养节律（按时段排序）"""
+        model_instances = self.db_session.query(self.model_class).filter(
+            self.model_class.baby_id == baby_id
+        ).order_by(self.model_class.bucket.asc()).all()
+        
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def save_all(self, dtos: List[FeedingCadenceDTO], commit: bool = True) -> None:
+        """在一个事务中新建或更新多个时段的喂养节律（commit 为 False 时由调用方提交）"""
+        for dto in dtos:
+            model_instance = self.db_session.query(self.model_class).filter(
+                self.model_class.id == dto.id
+            ).first()
+            if model_instance is None:
+                self.db_session.add(self.mapper.from_dto(dto))
+            else:
+                self.mapper.update_model_from_dto(model_instance, dto)
+        self._save_changes(commit)
+    
+    def replace_all(self, baby_id: str, dtos: List[FeedingCadenceDTO]) -> None:
+        """在一个事务中用新的统计替换宝宝各时段的喂养节律"""
+        self.db_session.query(self.model_class).filter(
+            self.model_class.baby_id == baby_id
+        ).delete(synchronize_session=False)
+        self.db_session.add_all([self.mapper.from_dto(dto) for dto in dtos])
+        self.db_session.commit()
+
+
+class FeedingHeatmapRepository(BaseRepository[FeedingHeatmapDTO, 'FeedingHeatmap']):
+    """喂养热力图仓储"""
+    
+    def _get_model_class(self):
+        from baby_tracker.models.feeding import FeedingHeatmap
+        return FeedingHeatmap
+    
+    def _get_mapper(self):
+        return FeedingHeatmapMapper
+    
+    def get_week(self, baby_id: str, feed_type: str, week_start: str) -> Optional[FeedingHeatmapDTO]:
+        """获取一周的热力图（唯一索引查找）"""
+        model_instance = self.db_session.query(self.model_class).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.feed_type == feed_type,
+                self.model_class.week_start == week_start
+            )
+        ).first()
+        return self.mapper.to_dto(model_instance) if model_instance else None
+    
+    def find_by_week_range(
+        self,
+        baby_id: str,
+        feed_types: List[str],
+        first_week: str,
+        last_week: str
+    ) -> List[FeedingHeatmapDTO]:
+        """获取周范围内（含两端）各喂养类型的热力图"""
+        model_instances = self.db_session.query(self.model_class).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.feed_type.in_(feed_types),
+                self.model_class.week_start.between(first_week, last_week)
+            )
+        ).all()
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+    
+    def save(self, dto: FeedingHeatmapDTO, commit: bool = True) -> None:
+        """新建或更新一周的热力图（commit 为 False 时由调用方提交）"""
+        model_instance = self.db_session.query(self.model_class).filter(
+            self.model_class.id == dto.id
+        ).first()
+        if model_instance is None:
+            self.db_session.add(self.mapper.from_dto(dto))
+        else:
+            self.mapper.update_model_from_dto(model_instance, dto)
+        self._save_changes(commit)
+    
+    def replace_weeks(
+        self,
+        baby_id: str,
+        feed_type: str,
+        weeks: Optional[Iterable[str]],
+        dtos: List[FeedingHeatmapDTO]
+    ) -> None:
+        """在一个事务中删除指定周（None 表示全部周）的旧热力图并写入新热力图"""
+        query = self.db_session.query(self.model_class).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.feed_type == feed_type
+            )
+        )
+        if weeks is not None:
+            query = query.filter(self.model_class.week_start.in_(list(weeks)))
+        query.delete(synchronize_session=False)
+        self.db_session.add_all([self.mapper.from_dto(dto) for dto in dtos])
+        self.db_session.commit()
+
+
 class FeedingStatsRepository:
     """喂养统计仓储"""
     
@@ -1,17 +1,18 @@
 """
 健康相关仓储 - 使用 dataclasses DTO
 """
-from typing import List, Optional
+from abc import abstractmethod
+from typing import List, Optional, Tuple, Dict, Iterator
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, literal_column
 from sqlalchemy.orm import Session
 from baby_tracker.models.dto import (
-    SleepDTO, DiaperDTO, WeightDTO, HeightDTO, HeadDTO, TemperatureDTO
+    SleepDTO, DiaperDTO, WeightDTO, HeightDTO, HeadDTO, TemperatureDTO, FEVER_INDEX_THRESHOLD
 )
 from baby_tracker.models.mappers import (
     SleepMapper, DiaperMapper, WeightMapper, HeightMapper, HeadMapper, TemperatureMapper
 )
-from baby_tracker.repositories.base_repository import BaseRepository
+from baby_tracker.repositories.base_repository import BaseRepository, T, M
 
 
 class SleepRepository(BaseRepository[SleepDTO, 'Sleep']):
@@ -24,6 +25,9 @@ class SleepRepository(BaseRepository[SleepDTO, 'Sleep']):
     def _get_mapper(self):
         return SleepMapper
     
+    def _get_daily_value(self):
+        return self.model_class.duration
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[SleepDTO]:
         """根据宝宝ID查找睡眠记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -68,23 +72,61 @@ class SleepRepository(BaseRepository[SleepDTO, 'Sleep']):
         return result or 0
     
     def get_weekly_average_sleep(self, baby_id: str, end_date: datetime) -> float:
-        """获取一周内的平均睡眠时长（小时）"""
-        start_date = end_date - timedelta(days=7)
-        start_timestamp = start_date.timestamp()
-        end_timestamp = end_date.timestamp()
-        
-        result = self.db_session.query(
-            func.avg(func.sum(self.model_class.duration))
-        ).filter(
+        """获取一周内有睡眠记录的日子平均每天的睡眠时长（小时），保留以兼容旧调用，计算由 HealthService 完成"""
+        from baby_tracker.services.health_service import HealthService
+        return HealthService(self.db_session).get_weekly_average_sleep(baby_id, end_date)
+    
+    def iter_intervals(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        lookback_hours: int = 24,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple[float, float]]:
+        """
+        按开始时间升序流式读取睡眠区间 (开始, 结束)，单次有序查询
+        
+        包含在 start_date 之前 lookback_hours 小时内开始、可能跨入统计期间的睡眠。
+        """
+        end_column = self.model_class.time + func.coalesce(self.model_class.duration, 0) * 60
+        query = self.db_session.query(self.model_class.time, end_column).filter(
             and_(
                 self.model_class.baby_id == baby_id,
-                self.model_class.time.between(start_timestamp, end_timestamp)
+                self.model_class.time.between(
+                    start_date.timestamp() - lookback_hours * 3600, end_date.timestamp()
+                ),
+                self.model_class.duration > 0
             )
-        ).group_by(
-            func.strftime("%Y-%m-%d", func.datetime(self.model_class.time, 'unixepoch'))
-        ).scalar()
+        ).order_by(self.model_class.time.asc()).yield_per(batch_size)
         
-        return (result or 0) / 60  # 转换为小时
+        for start, end in query:
+            yield start, end
+    
+    def get_intervals_for_babies(
+        self,
+        baby_ids: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime,
+        lookback_hours: int = 24
+    ) -> Dict[str, List[Tuple[float, float]]]:
+        """一次查询多个宝宝的睡眠区间 (开始, 结束)，按宝宝分组、开始时间升序；baby_ids 为 None 时查询全部宝宝"""
+        end_column = self.model_class.time + func.coalesce(self.model_class.duration, 0) * 60
+        query = self.db_session.query(self.model_class.baby_id, self.model_class.time, end_column).filter(
+            and_(
+                self.model_class.time.between(
+                    start_date.timestamp() - lookback_hours * 3600, end_date.timestamp()
+                ),
+                self.model_class.duration > 0
+            )
+        )
+        if baby_ids is not None:
+            query = query.filter(self.model_class.baby_id.in_(baby_ids))
+        
+        intervals: Dict[str, List[Tuple[float, float]]] = {baby_id: [] for baby_id in baby_ids or []}
+        for baby_id, start, end in query.order_by(self.model_class.baby_id, self.model_class.time.asc()):
+            intervals.setdefault(baby_id, []).append((start, end))
+        return intervals
 
 
 class DiaperRepository(BaseRepository[DiaperDTO, 'Diaper']):
@@ -97,6 +139,20 @@ class DiaperRepository(BaseRepository[DiaperDTO, 'Diaper']):
     def _get_mapper(self):
         return DiaperMapper
     
+    def get_daily_counts_by_type(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[str, Optional[str], int]]:
+        """按 (本地日期, 类型) 统计尿布次数，返回 (YYYY-MM-DD, DescID, 次数)"""
+        return [
+            (day, desc_id, count)
+            for day, desc_id, count, _ in self.get_daily_breakdown(
+                baby_id, start_date, end_date, self.model_class.desc_id
+            )
+        ]
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[DiaperDTO]:
         """根据宝宝ID查找尿布记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -139,7 +195,68 @@ class DiaperRepository(BaseRepository[DiaperDTO, 'Diaper']):
         ).count()
 
 
-class WeightRepository(BaseRepository[WeightDTO, 'Weight']):
+class GrowthMeasurementRepository(BaseRepository[T, M]):
+    """生长测量记录仓储基类（体重、身高、头围）"""
+    
+    @abstractmethod
+    def _get_value_column(self):
+        """获取测量值对应的模型列"""
+        pass
+    
+    def get_measurements(
+        self,
+        baby_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Tuple[float, float]]:
+        """只查询 (时间, 测量值) 两列，按时间升序，不构造模型实例"""
+        query = self.db_session.query(self.model_class.time, self._get_value_column()).filter(
+            self.model_class.baby_id == baby_id
+        )
+        if start_date is not None:
+            query = query.filter(self.model_class.time >= start_date.timestamp())
+        if end_date is not None:
+            query = query.filter(self.model_class.time <= end_date.timestamp())
+        
+        return [(time, value) for time, value in query.order_by(self.model_class.time.asc())]
+    
+    def get_measurements_for_babies(
+        self,
+        baby_ids: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, List[Tuple[float, float]]]:
+        """一次查询多个宝宝的 (时间, 测量值) 序列，按宝宝分组、时间升序；baby_ids 为 None 时查询全部宝宝"""
+        query = self.db_session.query(
+            self.model_class.baby_id, self.model_class.time, self._get_value_column()
+        ).filter(
+            self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+        )
+        if baby_ids is not None:
+            query = query.filter(self.model_class.baby_id.in_(baby_ids))
+        rows = query.order_by(self.model_class.baby_id, self.model_class.time.asc())
+        
+        series: Dict[str, List[Tuple[float, float]]] = {baby_id: [] for baby_id in baby_ids or []}
+        for baby_id, time, value in rows:
+            series.setdefault(baby_id, []).append((time, value))
+        return series
+    
+    def find_by_date_range(self, baby_id: str, start_date: datetime, end_date: datetime) -> List[T]:
+        """根据日期范围查找记录"""
+        start_timestamp = start_date.timestamp()
+        end_timestamp = end_date.timestamp()
+        
+        model_instances = self.db_session.query(self.model_class).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_timestamp, end_timestamp)
+            )
+        ).order_by(self.model_class.time.desc()).all()
+        
+        return [self.mapper.to_dto(instance) for instance in model_instances]
+
+
+class WeightRepository(GrowthMeasurementRepository[WeightDTO, 'Weight']):
     """体重记录仓储"""
     
     def _get_model_class(self):
@@ -149,6 +266,9 @@ class WeightRepository(BaseRepository[WeightDTO, 'Weight']):
     def _get_mapper(self):
         return WeightMapper
     
+    def _get_value_column(self):
+        return self.model_class.weight
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[WeightDTO]:
         """根据宝宝ID查找体重记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -177,25 +297,23 @@ class WeightRepository(BaseRepository[WeightDTO, 'Weight']):
         start_timestamp = start_date.timestamp()
         end_timestamp = end_date.timestamp()
         
-        # 获取时间范围内的所有记录
-        records = self.db_session.query(self.model_class).filter(
+        # 只取时间范围内的第一条和最后一条体重
+        query = self.db_session.query(self.model_class.weight).filter(
             and_(
                 self.model_class.baby_id == baby_id,
                 self.model_class.time.between(start_timestamp, end_timestamp)
             )
-        ).order_by(self.model_class.time.asc()).all()
-        
-        if len(records) < 2:
+        )
+        if query.count() < 2:
             return 0
         
-        # 计算体重增长
-        first = records[0]
-        last = records[-1]
+        first = query.order_by(self.model_class.time.asc()).limit(1).scalar()
+        last = query.order_by(self.model_class.time.desc()).limit(1).scalar()
         
-        return last.weight - first.weight
+        return last - first
 
 
-class HeightRepository(BaseRepository[HeightDTO, 'Height']):
+class HeightRepository(GrowthMeasurementRepository[HeightDTO, 'Height']):
     """身高记录仓储"""
     
     def _get_model_class(self):
@@ -205,6 +323,9 @@ class HeightRepository(BaseRepository[HeightDTO, 'Height']):
     def _get_mapper(self):
         return HeightMapper
     
+    def _get_value_column(self):
+        return self.model_class.height
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[HeightDTO]:
         """根据宝宝ID查找身高记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -226,7 +347,7 @@ class HeightRepository(BaseRepository[HeightDTO, 'Height']):
         return self.mapper.to_dto(model_instance) if model_instance else None
 
 
-class HeadRepository(BaseRepository[HeadDTO, 'Head']):
+class HeadRepository(GrowthMeasurementRepository[HeadDTO, 'Head']):
     """头围记录仓储"""
     
     def _get_model_class(self):
@@ -236,6 +357,9 @@ class HeadRepository(BaseRepository[HeadDTO, 'Head']):
     def _get_mapper(self):
         return HeadMapper
     
+    def _get_value_column(self):
+        return self.model_class.head
+    
     def find_by_baby_id(self, baby_id: str, limit: Optional[int] = None) -> List[HeadDTO]:
         """根据宝宝ID查找头围记录"""
         query = self.db_session.query(self.model_class).filter(
@@ -260,6 +384,9 @@ class HeadRepository(BaseRepository[HeadDTO, 'Head']):
 class TemperatureRepository(BaseRepository[TemperatureDTO, 'Temperature']):
     """体温记录仓储"""
     
+    # 发烧部分索引的条件值（由各测量位置的发烧阈值得出，与 Temperature 模型上的索引一致）
+    FEVER_INDEX_THRESHOLD = FEVER_INDEX_THRESHOLD
+    
     def _get_model_class(self):
         from baby_tracker.models.health import Temperature
         return Temperature
@@ -280,7 +407,7 @@ class TemperatureRepository(BaseRepository[TemperatureDTO, 'Temperature']):
         return [self.mapper.to_dto(instance) for instance in model_instances]
     
     def find_fever_records(self, baby_id: str, days: int = 30) -> List[TemperatureDTO]:
-        """查找指定天数内的发烧记录"""
+        """查找指定天数内的发烧记录（部分索引筛出候选行后按各测量位置的阈值判断）"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
@@ -291,8 +418,36 @@ class TemperatureRepository(BaseRepository[TemperatureDTO, 'Temperature']):
             and_(
                 self.model_class.baby_id == baby_id,
                 self.model_class.time.between(start_timestamp, end_timestamp),
-                self.model_class.temperature >= 37.5
+                self._fever_condition()
             )
         ).order_by(self.model_class.time.desc()).all()
         
-        return [self.mapper.to_dto(instance) for instance in model_instances]
+        records = [self.mapper.to_dto(instance) for instance in model_instances]
+        return [record for record in records if record.is_fever]
+    
+    def iter_readings(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        fever_only: bool = False,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple[float, float, Optional[str]]]:
+        """按时间升序流式读取 (时间, 体温, 测量位置)，不构造模型实例"""
+        query = self.db_session.query(
+            self.model_class.time, self.model_class.temperature, self.model_class.location
+        ).filter(
+            and_(
+                self.model_class.baby_id == baby_id,
+                self.model_class.time.between(start_date.timestamp(), end_date.timestamp())
+            )
+        )
+        if fever_only:
+            query = query.filter(self._fever_condition())
+        
+        for time, temperature, location in query.order_by(self.model_class.time.asc()).yield_per(batch_size):
+            yield time, temperature, location
+    
+    def _fever_condition(self):
+        """发烧条件（阈值以字面量写入 SQL，保证查询规划器总能匹配部分索引）"""
+        return self.model_class.temperature >= literal_column(repr(self.FEVER_INDEX_THRESHOLD))
@@ -8,6 +8,10 @@ Baby Tracker 服务层
 - 活动服务：管理活动记录和统计
 - 分析服务：数据分析和可视化
 - 导出服务：数据导出功能
+- 导入服务：从导出文件导入数据
+- 导出任务服务：后台导出任务队列
+- 滚动统计服务：指标的移动合计和均值
+- 派生数据服务：按原始记录重建派生表
 """
 
 # 导入各个服务
@@ -32,7 +36,10 @@ except ImportError:
     pass
 
 try:
-    from .analytics_service import AnalyticsService, FeedingAnalysis, GrowthAnalysis, TemperatureAnalysis
+    from .analytics_service import (
+        AnalyticsService, FeedingAnalysis, GrowthAnalysis, TemperatureAnalysis, FeverEpisode,
+        BabySummary
+    )
 except ImportError:
     pass
 
@@ -41,6 +48,31 @@ try:
 except ImportError:
     pass
 
+try:
+    from .import_service import ImportService, ImportResult
+except ImportError:
+    pass
+
+try:
+    from .export_job_service import ExportJobManager, ExportCancelled
+except ImportError:
+    pass
+
+try:
+    from .chart_series import ChartSeries
+except ImportError:
+    pass
+
+try:
+    from .rolling_stats_service import RollingStatsService, RollingStats
+except ImportError:
+    pass
+
+try:
+    from .derived_data import DerivedDataService
+except ImportError:
+    pass
+
 __all__ = []
 
 # 添加可用的服务到导出列表
@@ -53,6 +85,19 @@ if 'HealthService' in globals():
 if 'ActivityService' in globals():
     __all__.append('ActivityService')
 if 'AnalyticsService' in globals():
-    __all__.extend(['AnalyticsService', 'FeedingAnalysis', 'GrowthAnalysis', 'TemperatureAnalysis'])
+    __all__.extend([
+        'AnalyticsService', 'FeedingAnalysis', 'GrowthAnalysis', 'TemperatureAnalysis', 'FeverEpisode',
+        'BabySummary'
+    ])
 if 'ExportService' in globals():
-    __all__.extend(['ExportService', 'ExportRequest', 'ExportResult'])
\ No newline at end of file
+    __all__.extend(['ExportService', 'ExportRequest', 'ExportResult'])
+if 'ImportService' in globals():
+    __all__.extend(['ImportService', 'ImportResult'])
+if 'ExportJobManager' in globals():
+    __all__.extend(['ExportJobManager', 'ExportCancelled'])
+if 'RollingStatsService' in globals():
+    __all__.extend(['RollingStatsService', 'RollingStats'])
+if 'ChartSeries' in globals():
+    __all__.append('ChartSeries')
+if 'DerivedDataService' in globals():
+    __all__.append('DerivedDataService')
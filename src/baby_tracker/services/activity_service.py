@@ -12,6 +12,7 @@ from baby_tracker.models.dto import (
 from baby_tracker.repositories import (
     PlaytimeRepository, BathRepository, PhotoRepository, VideoRepository
 )
+from baby_tracker.services.aggregators import EventAggregator
 
 
 class ActivityService:
@@ -24,6 +25,7 @@ class ActivityService:
         self.bath_repo = BathRepository(self.db_session)
         self.photo_repo = PhotoRepository(self.db_session)
         self.video_repo = VideoRepository(self.db_session)
+        self.aggregator = EventAggregator(self.db_session)
     
     # Playtime 相关方法
     def add_playtime_record(self, baby_id: str, duration: int, 
@@ -40,7 +42,9 @@ class ActivityService:
             time=time or datetime.now().timestamp()
         )
         
-        return self.playtime_repo.create(playtime_dto)
+        playtime_dto = self.playtime_repo.create(playtime_dto)
+        self.aggregator.record('playtime', playtime_dto)
+        return playtime_dto
     
     def get_playtime_records(self, baby_id: str, limit: Optional[int] = None) -> List[PlaytimeDTO]:
         """获取宝宝的游戏记录"""
@@ -51,22 +55,17 @@ class ActivityService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 获取日期范围内的所有游戏记录
-        playtime_records = self.playtime_repo.find_by_date_range(baby_id, start_date, end_date)
-        
-        # 按日期和类型分组
+        # 在 SQL 中按日期和类型分组统计时长
         daily_playtime = {}
         play_types = {}
-        
-        for record in playtime_records:
-            day = datetime.fromtimestamp(record.time).strftime('%Y-%m-%d')
-            if day not in daily_playtime:
-                daily_playtime[day] = 0
-            
-            daily_playtime[day] += record.duration
-            
-            if record.play_type:
-                play_types[record.play_type] = play_types.get(record.play_type, 0) + record.duration
+        record_count = 0
+        for day, play_type, count, duration in self.playtime_repo.get_daily_breakdown(
+            baby_id, start_date, end_date, self.playtime_repo.model_class.play_type
+        ):
+            daily_playtime[day] = daily_playtime.get(day, 0) + duration
+            if play_type:
+                play_types[play_type] = play_types.get(play_type, 0) + duration
+            record_count += count
         
         # 计算统计数据
         total_duration = sum(daily_playtime.values())
@@ -77,7 +76,7 @@ class ActivityService:
             'play_types': play_types,  # 各类型游戏时长
             'total_duration': total_duration,  # 总游戏时长（分钟）
             'avg_daily_duration': avg_duration,  # 平均每日游戏时长（分钟）
-            'record_count': len(playtime_records)  # 记录数量
+            'record_count': record_count  # 记录数量
         }
     
     # Bath 相关方法
@@ -95,7 +94,9 @@ class ActivityService:
             time=time or datetime.now().timestamp()
         )
         
-        return self.bath_repo.create(bath_dto)
+        bath_dto = self.bath_repo.create(bath_dto)
+        self.aggregator.record('bath', bath_dto)
+        return bath_dto
     
     def get_bath_records(self, baby_id: str, limit: Optional[int] = None) -> List[BathDTO]:
         """获取宝宝的洗澡记录"""
@@ -106,20 +107,15 @@ class ActivityService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 获取日期范围内的所有洗澡记录
-        bath_records = self.bath_repo.find_by_date_range(baby_id, start_date, end_date)
+        # 单条聚合查询得到次数、总时长和平均水温
+        bath_count, total_duration, avg_temperature = self.bath_repo.get_bath_summary(
+            baby_id, start_date, end_date
+        )
         
         # 计算统计数据
-        bath_count = len(bath_records)
         bath_frequency = bath_count / (days / 7)  # 每周次数
-        
-        # 计算平均洗澡时长和平均水温
-        total_duration = sum(record.duration for record in bath_records)
         avg_duration = total_duration / bath_count if bath_count else 0
         
-        temperatures = [record.water_temperature for record in bath_records if record.water_temperature]
-        avg_temperature = sum(temperatures) / len(temperatures) if temperatures else None
-        
         return {
             'bath_count': bath_count,
             'bath_frequency': bath_frequency,  # 每周洗澡次数
@@ -191,15 +187,12 @@ class ActivityService:
     
     def get_media_stats(self, baby_id: str) -> Dict[str, Any]:
         """获取媒体统计数据"""
-        # 获取照片统计
-        photos = self.photo_repo.find_by_baby_id(baby_id)
-        photo_count = len(photos)
+        # 获取照片统计（总数由按月计数合计，不再读取照片记录）
         photo_count_by_month = self.photo_repo.get_photo_count_by_month(baby_id)
+        photo_count = sum(photo_count_by_month.values())
         
         # 获取视频统计
-        videos = self.video_repo.find_by_baby_id(baby_id)
-        video_count = len(videos)
-        total_video_duration = self.video_repo.get_total_video_duration(baby_id)
+        video_count, total_video_duration = self.video_repo.get_video_totals(baby_id)
         
         return {
             'photo_count': photo_count,
@@ -0,0 +1,236 @@
+"""
+事件聚合器 - 按 (宝宝, 事件类型, 统计周期) 维护可合并的累计量
+
+每写入一条记录只更新所在周期的一行：次数、总量、最值、24 小时直方图以及 Welford 均值和平方差和
+（均值和方差只计入有数值的事件，例如配方奶量为空的记录只计入次数）。
+这些量都可以两两合并，查询任意一组周期时只合并已保存的部分结果，不再扫描原始记录。
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import uuid
+from baby_tracker.models.dto import EventAggregateDTO
+from baby_tracker.repositories.aggregate_repository import EventAggregateRepository
+
+
+# 事件类型 -> 取值函数（None 表示只统计次数和时段分布）
+EVENT_VALUES: Dict[str, Optional[Callable[[Any], float]]] = {}
+
+
+def register_accumulator(event_type: str, value: Optional[Callable[[Any], float]] = None) -> None:
+    """注册需要聚合的事件类型及其取值函数（参数为记录 DTO）"""
+    EVENT_VALUES[event_type] = value
+
+
+register_accumulator('nursing', lambda record: record.total_duration)  # 分钟
+register_accumulator('formula', lambda record: record.amount)  # 毫升
+register_accumulator('sleep', lambda record: record.duration)  # 分钟
+register_accumulator('diaper')
+register_accumulator('playtime', lambda record: record.duration)  # 分钟
+register_accumulator('bath', lambda record: record.duration)  # 分钟
+
+
+def period_of(time: float) -> str:
+    """Unix 时间戳所在的统计周期（本地日期）"""
+    return datetime.fromtimestamp(time).strftime('%Y-%m-%d')
+
+
+@dataclass
+class Accumulator:
+    """可合并的累计量"""
+    count: int = 0  # 事件数
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    value_count: int = 0  # 有数值的事件数（均值和方差的样本数）
+    mean: float = 0.0
+    m2: float = 0.0  # 与均值之差的平方和
+    hour_histogram: List[int] = field(default_factory=lambda: [0] * 24)
+    
+    @property
+    def variance(self) -> float:
+        """总体方差"""
+        return self.m2 / self.value_count if self.value_count else 0.0
+    
+    @property
+    def std(self) -> float:
+        """总体标准差"""
+        return self.variance ** 0.5
+    
+    def add(self, time: float, value: Optional[float] = None) -> None:
+        """计入一个事件（Welford 增量更新均值和平方差和）"""
+        self.count += 1
+        self.hour_histogram[datetime.fromtimestamp(time).hour] += 1
+        if value is None:
+            return
+        
+        self.value_count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        delta = value - self.mean
+        self.mean += delta / self.value_count
+        self.m2 += delta * (value - self.mean)
+    
+    def merge(self, other: "Accumulator") -> "Accumulator":
+        """合并另一个累计量（Chan 等人的并行方差公式），返回自身"""
+        if other.count == 0:
+            return self
+        
+        if other.value_count:
+            value_count = self.value_count + other.value_count
+            delta = other.mean - self.mean
+            self.mean += delta * other.value_count / value_count
+            self.m2 += other.m2 + delta * delta * self.value_count * other.value_count / value_count
+            self.value_count = value_count
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        if other.maximum is not None:
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self.hour_histogram = [a + b for a, b in zip(self.hour_histogram, other.hour_histogram)]
+        return self
+    
+    def peak_hours(self, top: int = 3) -> List[int]:
+        """事件最多的几个小时（没有事件的小时不计入）"""
+        hours = sorted(range(24), key=lambda hour: self.hour_histogram[hour], reverse=True)
+        return [hour for hour in hours[:top] if self.hour_histogram[hour] > 0]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为报表用的字典"""
+        return {
+            'count': self.count,
+            'value_count': self.value_count,
+            'total': self.total,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'mean': self.mean,
+            'std': self.std,
+            'hour_histogram': list(self.hour_histogram),
+            'peak_hours': [f"{hour:02d}:00" for hour in self.peak_hours()],
+        }
+    
+    @classmethod
+    def from_dto(cls, dto: EventAggregateDTO) -> "Accumulator":
+        """从持久化的聚合创建累计量"""
+        return cls(
+            count=dto.count,
+            total=dto.total,
+            minimum=dto.minimum,
+            maximum=dto.maximum,
+            value_count=dto.value_count,
+            mean=dto.mean,
+            m2=dto.m2,
+            hour_histogram=list(dto.hour_histogram)
+        )
+    
+    def to_dto(
+        self,
+        baby_id: str,
+        event_type: str,
+        period: str,
+        aggregate_id: Optional[str] = None
+    ) -> EventAggregateDTO:
+        """转换为持久化的聚合"""
+        return EventAggregateDTO(
+            id=aggregate_id or str(uuid.uuid4()),
+            baby_id=baby_id,
+            event_type=event_type,
+            period=period,
+            count=self.count,
+            total=self.total,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            value_count=self.value_count,
+            mean=self.mean,
+            m2=self.m2,
+            hour_histogram=list(self.hour_histogram)
+        )
+
+
+class EventAggregator:
+    """
+    事件聚合器
+    
+    新增记录时 O(1) 更新所在周期的聚合；记录被修改或删除时，
+    调用方用受影响周期内的记录重建这些周期（最值无法增量撤销）。
+    """
+    
+    def __init__(self, db_session=None):
+        self.repository = EventAggregateRepository(db_session)
+    
+    def record(self, event_type: str, record: Any, commit: bool = True) -> None:
+        """把一条新增的记录计入所在周期的聚合（commit 为 False 时由调用方提交）"""
+        period = period_of(record.time)
+        dto = self.repository.get_period(record.baby_id, event_type, period)
+        accumulator = Accumulator.from_dto(dto) if dto else Accumulator()
+        accumulator.add(record.time, self._value_of(event_type, record))
+        self.repository.save(accumulator.to_dto(
+            record.baby_id, event_type, period, dto.id if dto else None
+        ), commit=commit)
+    
+    def rebuild(
+        self,
+        event_type: str,
+        baby_id: str,
+        records: Iterable[Any],
+        periods: Optional[Iterable[str]] = None,
+        commit: bool = True
+    ) -> None:
+        """
+        用原始记录重建聚合
+        
+        指定 periods 时只替换这些周期（没有记录的周期被删除），
+        否则替换该宝宝该类事件的全部周期（用于回填已有的历史记录）。
+        commit 为 False 时由调用方提交。
+        """
+        accumulators: Dict[str, Accumulator] = {}
+        for record in records:
+            accumulator = accumulators.setdefault(period_of(record.time), Accumulator())
+            accumulator.add(record.time, self._value_of(event_type, record))
+        
+        self.repository.replace_periods(
+            baby_id,
+            event_type,
+            list(periods) if periods is not None else None,
+            [accumulator.to_dto(baby_id, event_type, period) for period, accumulator in accumulators.items()],
+            commit=commit
+        )
+    
+    def query(
+        self,
+        baby_id: str,
+        event_type: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Accumulator:
+        """合并日期范围内（含两端，不指定则不限）各周期的聚合"""
+        return self._merge(self.repository.find_by_period_range(
+            baby_id,
+            event_type,
+            start_date.strftime('%Y-%m-%d') if start_date else None,
+            end_date.strftime('%Y-%m-%d') if end_date else None
+        ))
+    
+    def query_periods(self, baby_id: str, event_type: str, periods: Iterable[str]) -> Accumulator:
+        """合并任意一组周期的聚合"""
+        return self._merge(self.repository.find_by_periods(baby_id, event_type, periods))
+    
+    @staticmethod
+    def _merge(dtos: Iterable[EventAggregateDTO]) -> Accumulator:
+        accumulator = Accumulator()
+        for dto in dtos:
+            accumulator.merge(Accumulator.from_dto(dto))
+        return accumulator
+    
+    @staticmethod
+    def _value_of(event_type: str, record: Any) -> Optional[float]:
+        if event_type not in EVENT_VALUES:
+            raise ValueError(f"未注册的事件类型: {event_type}")
+        value = EVENT_VALUES[event_type]
+        return value(record) if value else None
+    
+    def close(self):
+        """关闭数据库会话"""
+        self.repository.close()
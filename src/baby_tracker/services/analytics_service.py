@@ -1,15 +1,24 @@
 """
 分析服务 - 使用 dataclasses 进行数据分析和统计
 """
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from itertools import repeat
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from baby_tracker.services.baby_service import BabyService
 from baby_tracker.services.feeding_service import FeedingService
+from baby_tracker.services.health_service import HealthService
+from baby_tracker.services import growth_standards
+from baby_tracker.services.aggregators import EVENT_VALUES
+from baby_tracker.services.sleep_intervals import SleepSummary, summarize_sleep
+from baby_tracker.services.chart_series import (
+    BUCKET_FORMATS, DEFAULT_MAX_POINTS, ChartSeries, bucket_range, choose_bucket, lttb
+)
 from baby_tracker.models.dto import (
-    BabyDTO, NursingDTO, FormulaDTO, WeightDTO, HeightDTO, TemperatureDTO
+    BabyDTO, NursingDTO, FormulaDTO, WeightDTO, HeightDTO, TemperatureDTO, get_fever_threshold
 )
 
 
@@ -51,6 +60,41 @@ class GrowthAnalysis:
     who_standard_height: Dict[str, List[float]] = field(default_factory=dict)
 
 
+# 事件类图表指标 -> (数据来源, 取值列, 换算系数, 单位)；取值列 count 为记录数，total 为数值总和
+EVENT_SERIES = {
+    'feeding_sessions': (('nursing', 'formula'), 'count', 1.0, '次'),
+    'nursing_sessions': (('nursing',), 'count', 1.0, '次'),
+    'nursing_minutes': (('nursing',), 'total', 1.0, '分钟'),
+    'formula_sessions': (('formula',), 'count', 1.0, '次'),
+    'formula_amount': (('formula',), 'total', 1.0, '毫升'),
+    'sleep_hours': (('sleep',), 'total', 1 / 60, '小时'),
+    'diaper_count': (('diaper',), 'count', 1.0, '次'),
+}
+
+# 测量类图表指标 -> 单位（保留原始测量点，按需降采样）
+MEASUREMENT_SERIES = {
+    'weight': '克',
+    'height': '厘米',
+    'head': '厘米',
+    'temperature': '°C',
+}
+
+
+@dataclass
+class FeverEpisode:
+    """发烧事件：间隔不超过指定时长的连续发烧读数"""
+    start_time: datetime
+    end_time: datetime
+    peak_temperature: float
+    peak_location: Optional[str] = None
+    reading_count: int = 0
+    
+    @property
+    def duration_hours(self) -> float:
+        """从第一次到最后一次发烧读数的小时数"""
+        return (self.end_time - self.start_time).total_seconds() / 3600
+
+
 @dataclass
 class TemperatureAnalysis:
     """体温分析结果"""
@@ -60,19 +104,90 @@ class TemperatureAnalysis:
     max_temperature: float = 0.0
     min_temperature: float = 0.0
     fever_days: int = 0
-    fever_percentage: float = 0.0
+    fever_percentage: float = 0.0  # 有发烧读数的天数占有测量天数的百分比
+    reading_count: int = 0
+    fever_episodes: List[FeverEpisode] = field(default_factory=list)
     
     # 可视化相关数据
     temperature_data: Dict[str, List[float]] = field(default_factory=dict)
     is_fever_data: Dict[str, List[bool]] = field(default_factory=dict)
 
 
+@dataclass
+class BabySummary:
+    """批量分析中单个宝宝的汇总结果"""
+    baby_id: str
+    period_start: datetime
+    period_end: datetime
+    days: int = 0
+    
+    # 喂养
+    nursing_sessions: int = 0
+    nursing_minutes: float = 0.0
+    formula_sessions: int = 0
+    formula_amount: float = 0.0  # 毫升
+    total_sessions: int = 0
+    daily_average_sessions: float = 0.0
+    nursing_percentage: float = 0.0
+    formula_percentage: float = 0.0
+    
+    # 睡眠（合并重叠记录并裁剪到统计期间后的时长）
+    sleep_minutes: float = 0.0
+    daily_average_sleep_minutes: float = 0.0
+    longest_sleep_minutes: float = 0.0
+    average_wake_window_minutes: float = 0.0
+    
+    # 尿布
+    diaper_count: int = 0
+    daily_average_diapers: float = 0.0
+    
+    # 生长（期间内首末次测量及最小二乘速度：体重克/天，身高厘米/周）
+    weight_start: Optional[float] = None
+    weight_end: Optional[float] = None
+    weight_velocity: Optional[float] = None
+    height_start: Optional[float] = None
+    height_end: Optional[float] = None
+    height_velocity: Optional[float] = None
+    
+    # 可视化相关数据
+    daily_data: Dict[str, List[Any]] = field(default_factory=dict)
+    
+    @property
+    def weight_gain(self) -> Optional[float]:
+        """期间内体重增长（克）"""
+        if self.weight_start is None or self.weight_end is None:
+            return None
+        return self.weight_end - self.weight_start
+    
+    @property
+    def height_gain(self) -> Optional[float]:
+        """期间内身高增长（厘米）"""
+        if self.height_start is None or self.height_end is None:
+            return None
+        return self.height_end - self.height_start
+
+
+def _summarize_sleep_batch(
+    items: List[Tuple[str, List[Tuple[float, float]]]],
+    start_date: datetime,
+    end_date: datetime
+) -> Dict[str, SleepSummary]:
+    """汇总一批宝宝的睡眠区间（进程池工作函数，须为模块级函数以便序列化）"""
+    return {baby_id: summarize_sleep(intervals, start_date, end_date) for baby_id, intervals in items}
+
+
 class AnalyticsService:
     """数据分析服务"""
     
     def __init__(self, db_session=None):
         self.baby_service = BabyService(db_session)
         self.feeding_service = FeedingService(db_session)
+        self.health_service = HealthService(db_session)
+    
+    @staticmethod
+    def get_fever_threshold(location: Optional[str]) -> float:
+        """测量位置对应的发烧阈值"""
+        return get_fever_threshold(location)
     
     def get_feeding_analysis(
         self, 
@@ -127,21 +242,209 @@ class AnalyticsService:
         
         return analysis
     
+    def get_running_stats(
+        self,
+        baby_id: str,
+        event_types: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        各类事件的累计统计（次数、总量、最值、均值、标准差、24 小时分布）
+        
+        只合并已保存的按日聚合，不扫描原始记录；不指定日期时为全部历史
+        （聚合表上线前的记录须先用 tools/rebuild_derived_data.py 回填）。
+        """
+        aggregator = self.feeding_service.aggregator
+        return {
+            event_type: aggregator.query(baby_id, event_type, start_date, end_date).to_dict()
+            for event_type in (event_types or list(EVENT_VALUES))
+        }
+    
+    def analyze_babies(
+        self,
+        baby_ids: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime,
+        workers: int = 1
+    ) -> Dict[str, BabySummary]:
+        """
+        批量生成多个宝宝的喂养、睡眠、尿布和生长汇总（baby_ids 为 None 时为全部宝宝）
+        
+        每张事件表只执行一次按 (宝宝, 日期) 分组的查询，结果放入 宝宝 × 日期 矩阵后用 NumPy 按行汇总；
+        睡眠区间一次查询后逐个宝宝做扫描线汇总，workers 大于 1 时分批在进程池中执行。
+        查询次数与宝宝数量无关。
+        """
+        query_ids = baby_ids
+        if baby_ids is None:
+            baby_ids = [baby.id for baby in self.baby_service.get_all_babies()]
+        baby_index = {baby_id: index for index, baby_id in enumerate(baby_ids)}
+        
+        day_count = (end_date.date() - start_date.date()).days + 1
+        day_labels = [(start_date.date() + timedelta(days=day)).isoformat() for day in range(day_count)]
+        day_index = {label: index for index, label in enumerate(day_labels)}
+        
+        # 每张表一次分组查询
+        nursing_counts, nursing_minutes = self._daily_matrix(
+            self.feeding_service.nursing_repository.get_daily_totals(query_ids, start_date, end_date),
+            baby_index, day_index
+        )
+        formula_counts, formula_amounts = self._daily_matrix(
+            self.feeding_service.formula_repository.get_daily_totals(query_ids, start_date, end_date),
+            baby_index, day_index
+        )
+        diaper_counts, _ = self._daily_matrix(
+            self.health_service.diaper_repo.get_daily_totals(query_ids, start_date, end_date),
+            baby_index, day_index
+        )
+        
+        # 按宝宝汇总
+        nursing_sessions = nursing_counts.sum(axis=1)
+        formula_sessions = formula_counts.sum(axis=1)
+        total_sessions = nursing_sessions + formula_sessions
+        safe_sessions = np.maximum(total_sessions, 1)
+        nursing_percentage = np.where(total_sessions > 0, nursing_sessions / safe_sessions * 100, 0.0)
+        formula_percentage = np.where(total_sessions > 0, formula_sessions / safe_sessions * 100, 0.0)
+        nursing_totals = nursing_minutes.sum(axis=1)
+        formula_totals = formula_amounts.sum(axis=1)
+        diaper_totals = diaper_counts.sum(axis=1)
+        
+        growth = self._growth_endpoints(baby_ids, query_ids, start_date, end_date)
+        sleep_summaries = self._summarize_sleep_for_babies(
+            baby_ids,
+            self.health_service.sleep_repo.get_intervals_for_babies(query_ids, start_date, end_date),
+            start_date, end_date, workers
+        )
+        
+        results = {}
+        for index, baby_id in enumerate(baby_ids):
+            sleep = sleep_summaries[baby_id]
+            summary = BabySummary(
+                baby_id=baby_id,
+                period_start=start_date,
+                period_end=end_date,
+                days=day_count,
+                nursing_sessions=int(nursing_sessions[index]),
+                nursing_minutes=float(nursing_totals[index]),
+                formula_sessions=int(formula_sessions[index]),
+                formula_amount=float(formula_totals[index]),
+                total_sessions=int(total_sessions[index]),
+                daily_average_sessions=float(total_sessions[index]) / day_count,
+                nursing_percentage=float(nursing_percentage[index]),
+                formula_percentage=float(formula_percentage[index]),
+                sleep_minutes=sleep.total_minutes,
+                daily_average_sleep_minutes=sleep.total_minutes / day_count,
+                longest_sleep_minutes=sleep.longest_stretch_minutes,
+                average_wake_window_minutes=sleep.average_wake_window_minutes,
+                diaper_count=int(diaper_totals[index]),
+                daily_average_diapers=float(diaper_totals[index]) / day_count,
+                daily_data={
+                    'dates': [label[5:] for label in day_labels],
+                    'nursing': nursing_counts[index].astype(int).tolist(),
+                    'formula': formula_counts[index].astype(int).tolist(),
+                    'formula_amount': formula_amounts[index].tolist(),
+                    'sleep_minutes': [round(sleep.daily_minutes.get(label, 0.0)) for label in day_labels],
+                    'diapers': diaper_counts[index].astype(int).tolist(),
+                }
+            )
+            for name, value in growth[baby_id].items():
+                setattr(summary, name, value)
+            results[baby_id] = summary
+        
+        return results
+    
+    def get_series(
+        self,
+        baby_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: str = 'auto',
+        max_points: int = DEFAULT_MAX_POINTS
+    ) -> ChartSeries:
+        """
+        获取图表用的时间序列，点数不超过 max_points
+        
+        事件类指标在 SQL 中按 hour / day / week / month 分组（auto 时选择分组数不超过
+        max_points 的最细粒度），没有记录的分组补 0；测量类指标返回原始测量点并忽略 bucket。
+        点数超过 max_points 时用 LTTB 降采样。
+        """
+        if metric in MEASUREMENT_SERIES:
+            series = self._measurement_series(baby_id, metric, start_date, end_date)
+            return self._downsample(series, max_points)
+        if metric not in EVENT_SERIES:
+            raise ValueError(f"不支持的指标: {metric}")
+        
+        if bucket == 'auto':
+            bucket = choose_bucket(start_date, end_date, max_points)
+        sources, column, scale, unit = EVENT_SERIES[metric]
+        starts = bucket_range(start_date, end_date, bucket)
+        index = {start.strftime(BUCKET_FORMATS[bucket]): position for position, start in enumerate(starts)}
+        counts = np.zeros(len(starts))
+        totals = np.zeros(len(starts))
+        for source in sources:
+            repository = self._series_repository(source)
+            for label, count, total in repository.get_bucketed_totals(baby_id, start_date, end_date, bucket):
+                if label in index:
+                    counts[index[label]] += count
+                    totals[index[label]] += total
+        
+        series = ChartSeries(
+            metric=metric,
+            unit=unit,
+            bucket=bucket,
+            times=np.array([start.timestamp() for start in starts], dtype=np.float64),
+            values=(counts if column == 'count' else totals) * scale,
+            counts=counts,
+            source_points=len(starts)
+        )
+        return self._downsample(series, max_points)
+    
     def get_growth_analysis(
         self, 
         baby_id: str, 
         start_date: datetime, 
         end_date: datetime
     ) -> GrowthAnalysis:
-        """获取生长发育分析"""
+        """获取生长发育分析（百分位基于 WHO 儿童生长标准）"""
         # 创建分析结果对象
         analysis = GrowthAnalysis(
             period_start=start_date,
             period_end=end_date
         )
         
-        # TODO: 获取体重身高记录并分析
-        # 这里需要健康相关的仓储和服务来获取数据
+        baby = self.baby_service.get_baby(baby_id)
+        if not baby:
+            return analysis
+        
+        measurements = self.health_service.get_growth_measurements(baby_id, start_date, end_date)
+        
+        weights = measurements['weight']
+        if weights:
+            analysis.weight_start = weights[0][1]
+            analysis.weight_end = weights[-1][1]
+            analysis.weight_gain = analysis.weight_end - analysis.weight_start
+            # 体重以克记录，WHO 标准以千克计
+            analysis.weight_data, analysis.weight_percentile = self._prepare_growth_data(
+                'weight', baby, weights, scale=1000
+            )
+        
+        heights = measurements['height']
+        if heights:
+            analysis.height_start = heights[0][1]
+            analysis.height_end = heights[-1][1]
+            analysis.height_gain = analysis.height_end - analysis.height_start
+            analysis.height_data, analysis.height_percentile = self._prepare_growth_data(
+                'height', baby, heights
+            )
+        
+        if baby.dob:
+            analysis.who_standard_weight = self._prepare_who_standard_data(
+                'weight', baby, start_date, end_date, scale=1000
+            )
+            analysis.who_standard_height = self._prepare_who_standard_data(
+                'height', baby, start_date, end_date
+            )
         
         return analysis
     
@@ -149,17 +452,78 @@ class AnalyticsService:
         self, 
         baby_id: str, 
         start_date: datetime, 
-        end_date: datetime
+        end_date: datetime,
+        episode_gap_hours: float = 24.0
     ) -> TemperatureAnalysis:
-        """获取体温分析"""
+        """
+        获取体温分析
+        
+        按时间顺序单次扫描体温读数（流式读取，不保存全部读数）。发烧按测量位置的阈值判断，
+        相邻两次发烧读数间隔不超过 episode_gap_hours 时归入同一次发烧事件。
+        """
         # 创建分析结果对象
         analysis = TemperatureAnalysis(
             period_start=start_date,
             period_end=end_date
         )
         
-        # TODO: 获取体温记录并分析
-        # 这里需要健康相关的仓储和服务来获取数据
+        total = 0.0
+        daily_max: Dict[str, float] = {}
+        fever_dates = set()
+        gap_seconds = episode_gap_hours * 3600
+        episode: Optional[FeverEpisode] = None
+        last_fever_time = None
+        
+        for time, temperature, location in self.health_service.iter_temperature_readings(
+            baby_id, start_date, end_date
+        ):
+            analysis.reading_count += 1
+            total += temperature
+            if analysis.reading_count == 1:
+                analysis.min_temperature = analysis.max_temperature = temperature
+            else:
+                analysis.min_temperature = min(analysis.min_temperature, temperature)
+                analysis.max_temperature = max(analysis.max_temperature, temperature)
+            
+            day = datetime.fromtimestamp(time).strftime('%Y-%m-%d')
+            daily_max[day] = max(daily_max.get(day, temperature), temperature)
+            
+            if temperature < self.get_fever_threshold(location):
+                continue
+            
+            fever_dates.add(day)
+            if episode is None or time - last_fever_time > gap_seconds:
+                episode = FeverEpisode(
+                    start_time=datetime.fromtimestamp(time),
+                    end_time=datetime.fromtimestamp(time),
+                    peak_temperature=temperature,
+                    peak_location=location
+                )
+                analysis.fever_episodes.append(episode)
+            episode.end_time = datetime.fromtimestamp(time)
+            episode.reading_count += 1
+            if temperature > episode.peak_temperature:
+                episode.peak_temperature = temperature
+                episode.peak_location = location
+            last_fever_time = time
+        
+        if analysis.reading_count == 0:
+            return analysis
+        
+        analysis.average_temperature = total / analysis.reading_count
+        analysis.fever_days = len(fever_dates)
+        analysis.fever_percentage = len(fever_dates) / len(daily_max) * 100
+        
+        # 准备每日最高体温用于图表
+        dates = sorted(daily_max)
+        analysis.temperature_data = {
+            'dates': dates,
+            'max': [daily_max[day] for day in dates]
+        }
+        analysis.is_fever_data = {
+            'dates': dates,
+            'values': [day in fever_dates for day in dates]
+        }
         
         return analysis
     
@@ -295,7 +659,165 @@ class AnalyticsService:
             'formula': formula_counts
         }
     
+    @staticmethod
+    def _daily_matrix(
+        rows: List[Tuple[str, str, int, float]],
+        baby_index: Dict[str, int],
+        day_index: Dict[str, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """把按 (宝宝, 日期) 分组的 (记录数, 总和) 放入 宝宝 × 日期 矩阵，不在范围内的行被忽略"""
+        shape = (len(baby_index), len(day_index))
+        counts = np.zeros(shape)
+        totals = np.zeros(shape)
+        cells = [
+            (baby_index[baby_id], day_index[day], count, total)
+            for baby_id, day, count, total in rows
+            if baby_id in baby_index and day in day_index
+        ]
+        if cells:
+            babies, days, row_counts, row_totals = (np.array(column) for column in zip(*cells))
+            counts[babies, days] = row_counts
+            totals[babies, days] = row_totals
+        return counts, totals
+    
+    def _growth_endpoints(
+        self,
+        baby_ids: List[str],
+        query_ids: Optional[List[str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        每个测量项目一次查询，得到各宝宝期间内的首末次测量值和最小二乘速度
+        
+        query_ids 为 None 时查询不按宝宝过滤（统计全部宝宝），避免把所有宝宝ID放进 IN 列表。
+        """
+        results: Dict[str, Dict[str, Optional[float]]] = {baby_id: {} for baby_id in baby_ids}
+        repositories = {'weight': self.health_service.weight_repo, 'height': self.health_service.height_repo}
+        for measure, repository in repositories.items():
+            series = repository.get_measurements_for_babies(query_ids, start_date, end_date)
+            series_list = [series.get(baby_id, []) for baby_id in baby_ids]
+            velocities = self.health_service.fit_growth_velocities(measure, series_list)
+            for baby_id, points, velocity in zip(baby_ids, series_list, velocities):
+                if points:
+                    results[baby_id][f"{measure}_start"] = points[0][1]
+                    results[baby_id][f"{measure}_end"] = points[-1][1]
+                if not np.isnan(velocity):
+                    results[baby_id][f"{measure}_velocity"] = float(velocity)
+        return results
+    
+    @staticmethod
+    def _summarize_sleep_for_babies(
+        baby_ids: List[str],
+        intervals: Dict[str, List[Tuple[float, float]]],
+        start_date: datetime,
+        end_date: datetime,
+        workers: int = 1
+    ) -> Dict[str, SleepSummary]:
+        """逐个宝宝汇总睡眠区间，workers 大于 1 时把宝宝分批交给进程池"""
+        items = [(baby_id, intervals.get(baby_id, [])) for baby_id in baby_ids]
+        if workers <= 1 or len(items) < 2:
+            return _summarize_sleep_batch(items, start_date, end_date)
+        
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+        chunks = [items[offset:offset + chunk_size] for offset in range(0, len(items), chunk_size)]
+        summaries: Dict[str, SleepSummary] = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in executor.map(_summarize_sleep_batch, chunks, repeat(start_date), repeat(end_date)):
+                summaries.update(batch)
+        return summaries
+    
+    def _series_repository(self, source: str):
+        """事件类图表指标的数据来源仓储"""
+        return {
+            'nursing': self.feeding_service.nursing_repository,
+            'formula': self.feeding_service.formula_repository,
+            'sleep': self.health_service.sleep_repo,
+            'diaper': self.health_service.diaper_repo,
+        }[source]
+    
+    def _measurement_series(
+        self,
+        baby_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> ChartSeries:
+        """测量类指标的原始 (时间, 测量值) 序列"""
+        if metric == 'temperature':
+            readings = self.health_service.iter_temperature_readings(baby_id, start_date, end_date)
+            points = [(time, temperature) for time, temperature, _ in readings]
+        else:
+            repository = getattr(self.health_service, f"{metric}_repo")
+            points = repository.get_measurements(baby_id, start_date, end_date)
+        
+        data = np.array(points, dtype=np.float64).reshape(len(points), 2)
+        return ChartSeries(
+            metric=metric,
+            unit=MEASUREMENT_SERIES[metric],
+            bucket='raw',
+            times=data[:, 0],
+            values=data[:, 1],
+            source_points=len(points)
+        )
+    
+    @staticmethod
+    def _downsample(series: ChartSeries, max_points: int) -> ChartSeries:
+        """点数超过 max_points 时按 LTTB 保留点"""
+        if len(series.times) <= max_points:
+            return series
+        keep = lttb(series.times, series.values, max_points)
+        series.times = series.times[keep]
+        series.values = series.values[keep]
+        if series.counts is not None:
+            series.counts = series.counts[keep]
+        return series
+    
+    def _prepare_growth_data(
+        self,
+        measure: str,
+        baby: BabyDTO,
+        series: List[Tuple[float, float]],
+        scale: float = 1
+    ) -> Tuple[Dict[str, List[Any]], Optional[float]]:
+        """准备测量序列图表数据，并一次性计算整条序列的 WHO 百分位，返回 (图表数据, 最新百分位)"""
+        times = np.array([time for time, _ in series], dtype=np.float64)
+        values = np.array([value for _, value in series], dtype=np.float64)
+        
+        data = {
+            'dates': [datetime.fromtimestamp(time).strftime('%Y-%m-%d') for time in times],
+            'values': values.tolist()
+        }
+        if not baby.dob:
+            return data, None
+        
+        age_days = (times - baby.dob) / 86400
+        percentiles = growth_standards.percentiles(measure, baby.gender, age_days, values / scale)
+        data['percentiles'] = [None if np.isnan(p) else round(float(p), 1) for p in percentiles]
+        return data, data['percentiles'][-1]
+    
+    def _prepare_who_standard_data(
+        self,
+        measure: str,
+        baby: BabyDTO,
+        start_date: datetime,
+        end_date: datetime,
+        scale: float = 1
+    ) -> Dict[str, List[Any]]:
+        """准备分析期间每天的 WHO 百分位曲线（p3/p15/p50/p85/p97），超出标准月龄范围的为 None"""
+        days = np.arange(start_date.timestamp(), end_date.timestamp() + 1, 86400, dtype=np.float64)
+        age_days = (days - baby.dob) / 86400
+        
+        data: Dict[str, List[Any]] = {
+            'dates': [datetime.fromtimestamp(day).strftime('%Y-%m-%d') for day in days]
+        }
+        for label, z in growth_standards.PERCENTILE_LINES.items():
+            values = growth_standards.reference_values(measure, baby.gender, age_days, z) * scale
+            data[label] = [None if np.isnan(v) else round(float(v), 1) for v in values]
+        return data
+    
     def close(self):
         """关闭服务"""
         self.baby_service.close()
         self.feeding_service.close()
+        self.health_service.db_session.close()
@@ -6,7 +6,10 @@ from datetime import datetime, timedelta
 import uuid
 from baby_tracker.models.dto import BabyDTO, Gender
 from baby_tracker.repositories.baby_repository import BabyRepository
-from baby_tracker.repositories.feeding_repository import FeedingStatsRepository
+from baby_tracker.repositories.feeding_repository import (
+    FeedingStatsRepository, FeedingCadenceRepository
+)
+from baby_tracker.services.feeding_cadence import predict_next_feed
 
 
 class BabyService:
@@ -15,6 +18,7 @@ class BabyService:
     def __init__(self, db_session=None):
         self.baby_repository = BabyRepository(db_session)
         self.feeding_stats_repository = FeedingStatsRepository(db_session)
+        self.feeding_cadence_repository = FeedingCadenceRepository(db_session)
     
     def create_baby(
         self, 
@@ -117,11 +121,28 @@ class BabyService:
                 'formula_amount': today_feeding_stats.total_formula_amount,
                 'average_session_duration': today_feeding_stats.average_session_duration,
             },
+            'next_feeding': self._get_next_feeding(baby_id),
             'milestones': self._calculate_milestones(baby),
         }
         
         return dashboard_data
     
+    def _get_next_feeding(self, baby_id: str) -> Optional[Dict[str, Any]]:
+        """根据喂养节律表预测下一次喂养时间（不扫描喂养记录）"""
+        prediction = predict_next_feed(self.feeding_cadence_repository.find_by_baby_id(baby_id))
+        if prediction is None:
+            return None
+        
+        return {
+            'last_feed_at': prediction.last_feed_at.strftime('%Y-%m-%d %H:%M'),
+            'expected_at': prediction.expected_at.strftime('%Y-%m-%d %H:%M'),
+            'earliest_at': prediction.earliest_at.strftime('%Y-%m-%d %H:%M'),
+            'latest_at': prediction.latest_at.strftime('%Y-%m-%d %H:%M'),
+            'interval_minutes': round(prediction.interval_minutes),
+            'spread_minutes': round(prediction.spread_minutes),
+            'sample_count': prediction.sample_count,
+        }
+    
     def _calculate_milestones(self, baby: BabyDTO) -> Dict[str, Any]:
         """计算宝宝里程碑"""
         age_days = baby.age_in_days
@@ -0,0 +1,141 @@
+"""
+图表序列 - 按时间粒度分组的序列和 LTTB 降采样
+
+事件类指标（喂养、睡眠、尿布）在 SQL 中按小时、日、周或月分组，auto 粒度选择分组数
+不超过点数上限的最细粒度；测量类指标（体重、体温等）保留原始测量点，
+超过点数上限时用 Largest-Triangle-Three-Buckets 算法降采样，保留曲线的形状和极值。
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+DEFAULT_MAX_POINTS = 500
+
+# 分组粒度（由细到粗）及每个分组的近似秒数，用于 auto 粒度的选择
+BUCKET_SECONDS = {
+    'hour': 3600,
+    'day': 86400,
+    'week': 86400 * 7,
+    'month': 86400 * 30.44,
+}
+
+# 分组标签格式（须与 BaseRepository._local_bucket 的 SQL 表达式一致）
+BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%m-%d',
+    'month': '%Y-%m-01',
+}
+
+
+@dataclass
+class ChartSeries:
+    """图表序列（times 为各点或各分组开始的 Unix 时间戳）"""
+    metric: str
+    unit: str
+    bucket: str  # hour / day / week / month，原始测量点为 raw
+    times: np.ndarray
+    values: np.ndarray
+    counts: Optional[np.ndarray] = None  # 各分组的记录数（原始测量点为 None）
+    source_points: int = 0  # 降采样前的点数
+    
+    @property
+    def downsampled(self) -> bool:
+        """是否经过了降采样"""
+        return len(self.times) < self.source_points
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为图表用的字典"""
+        label_format = BUCKET_FORMATS.get(self.bucket, '%Y-%m-%d %H:%M')
+        data = {
+            'metric': self.metric,
+            'unit': self.unit,
+            'bucket': self.bucket,
+            'labels': [datetime.fromtimestamp(time).strftime(label_format) for time in self.times],
+            'values': self.values.round(2).tolist(),
+            'source_points': self.source_points,
+        }
+        if self.counts is not None:
+            data['counts'] = self.counts.astype(int).tolist()
+        return data
+
+
+def choose_bucket(start_date: datetime, end_date: datetime, max_points: int) -> str:
+    """分组数不超过 max_points 的最细粒度（都超过时为 month）"""
+    span = max((end_date - start_date).total_seconds(), 0)
+    for bucket, seconds in BUCKET_SECONDS.items():
+        if span / seconds + 1 <= max_points:
+            return bucket
+    return 'month'
+
+
+def bucket_start(moment: datetime, bucket: str) -> datetime:
+    """时间所在分组的开始时间（本地时间）"""
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'day':
+        return day
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"不支持的分组粒度: {bucket}")
+
+
+def bucket_range(start_date: datetime, end_date: datetime, bucket: str) -> List[datetime]:
+    """日期范围内（含两端所在分组）的全部分组开始时间"""
+    starts = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        starts.append(current)
+        if bucket == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        elif bucket == 'week':
+            current += timedelta(days=7)
+        elif bucket == 'day':
+            current += timedelta(days=1)
+        else:
+            current += timedelta(hours=1)
+    return starts
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标（升序）
+    
+    首末两点总是保留；中间的点均分为 threshold-2 个桶，每个桶保留与上一个保留点、
+    下一个桶的平均点构成的三角形面积最大的点。点数不超过 threshold 时全部保留。
+    """
+    count = len(times)
+    if threshold >= count or count <= 2:
+        return np.arange(count)
+    if threshold < 3:
+        return np.array([0, count - 1])
+    
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    every = (count - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    previous = 0
+    
+    for index in range(threshold - 2):
+        range_start = int(index * every) + 1
+        range_end = int((index + 1) * every) + 1
+        average_start = range_end
+        average_end = min(int((index + 2) * every) + 1, count)
+        average_time = times[average_start:average_end].mean()
+        average_value = values[average_start:average_end].mean()
+        
+        areas = np.abs(
+            (times[previous] - average_time) * (values[range_start:range_end] - values[previous])
+            - (times[previous] - times[range_start:range_end]) * (average_value - values[previous])
+        )
+        previous = range_start + int(np.argmax(areas))
+        selected[index + 1] = previous
+    
+    selected[-1] = count - 1
+    return selected
@@ -0,0 +1,161 @@
+"""
+派生数据服务 - 按原始记录重建由服务层增量维护的派生表
+
+喂养节律、事件聚合和喂养热力图只在记录通过服务层写入时增量更新。派生表上线前的历史记录，以及批量导入、
+数据迁移等不经过服务层写入的记录，需要用这里的方法按原始记录重建。
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+from sqlalchemy.orm import Session
+from baby_tracker.models.dto import FeedingCadenceDTO
+from baby_tracker.repositories import (
+    BabyRepository, NursingRepository, FormulaRepository, SleepRepository, DiaperRepository,
+    PlaytimeRepository, BathRepository
+)
+from baby_tracker.repositories.feeding_repository import FeedingCadenceRepository
+from baby_tracker.services.aggregators import EVENT_VALUES, EventAggregator, period_of
+from baby_tracker.services.feeding_cadence import replay_feeds
+from baby_tracker.services.feeding_heatmap import FeedingHeatmapStore
+
+
+# 计入喂养节律的记录类型
+FEEDING_TYPES = ('nursing', 'formula')
+
+
+class DerivedDataService:
+    """派生数据服务"""
+    
+    def __init__(self, db_session: Optional[Session] = None):
+        from baby_tracker.database import get_db
+        self.db_session = db_session or next(get_db())
+        self.baby_repo = BabyRepository(self.db_session)
+        self.repositories = {
+            'nursing': NursingRepository(self.db_session),
+            'formula': FormulaRepository(self.db_session),
+            'sleep': SleepRepository(self.db_session),
+            'diaper': DiaperRepository(self.db_session),
+            'playtime': PlaytimeRepository(self.db_session),
+            'bath': BathRepository(self.db_session),
+        }
+        self.feeding_cadence_repository = FeedingCadenceRepository(self.db_session)
+        self.aggregator = EventAggregator(self.db_session)
+        self.heatmap_store = FeedingHeatmapStore(self.db_session)
+    
+    def rebuild_all(self, baby_ids: Optional[Iterable[str]] = None) -> int:
+        """重建全部（或指定）宝宝的派生数据，返回处理的宝宝数"""
+        if baby_ids is None:
+            baby_ids = [baby.id for baby in self.baby_repo.get_all()]
+        count = 0
+        for baby_id in baby_ids:
+            self.rebuild_feeding_cadence(baby_id)
+            for feed_type in FEEDING_TYPES:
+                self.rebuild_feeding_heatmap(baby_id, feed_type)
+            for event_type in EVENT_VALUES:
+                self.rebuild_event_aggregates(baby_id, event_type)
+            count += 1
+        return count
+    
+    def refresh_after_import(self, touched: Dict[str, Set[Tuple[str, str]]]) -> None:
+        """
+        批量写入记录后更新派生数据
+        
+        touched 为 记录类型 -> {(宝宝ID, 本地日期)}，即写入的记录所在的宝宝和日期。
+        只重建这些日期的事件聚合和所在周的喂养热力图；喂养节律依赖记录的先后顺序，按宝宝整体重放。
+        """
+        for record_type, items in touched.items():
+            if record_type not in EVENT_VALUES:
+                continue
+            periods_by_baby: Dict[str, Set[str]] = {}
+            for baby_id, period in items:
+                periods_by_baby.setdefault(baby_id, set()).add(period)
+            for baby_id, periods in sorted(periods_by_baby.items()):
+                self.rebuild_event_aggregates(baby_id, record_type, periods)
+        
+        for feed_type in FEEDING_TYPES:
+            weeks_by_baby: Dict[str, Set[str]] = {}
+            for baby_id, period in touched.get(feed_type, ()):
+                day = date.fromisoformat(period)
+                weeks_by_baby.setdefault(baby_id, set()).add((day - timedelta(days=day.weekday())).isoformat())
+            for baby_id, weeks in sorted(weeks_by_baby.items()):
+                self.rebuild_feeding_heatmap(baby_id, feed_type, weeks)
+        
+        feeding_babies = {
+            baby_id
+            for record_type in FEEDING_TYPES
+            for baby_id, _ in touched.get(record_type, ())
+        }
+        for baby_id in sorted(feeding_babies):
+            self.rebuild_feeding_cadence(baby_id)
+    
+    def rebuild_feeding_cadence(self, baby_id: str) -> List[FeedingCadenceDTO]:
+        """按时间顺序重放宝宝的全部喂养记录，替换该宝宝的喂养节律"""
+        feed_times = heapq.merge(*(
+            self.repositories[record_type].iter_times(baby_id) for record_type in FEEDING_TYPES
+        ))
+        cadences = replay_feeds(baby_id, feed_times)
+        self.feeding_cadence_repository.replace_all(baby_id, cadences)
+        return cadences
+    
+    def rebuild_feeding_heatmap(
+        self,
+        baby_id: str,
+        feed_type: str,
+        weeks: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        用一条按 (周, 星期, 小时) 分组的查询重建宝宝一种喂养类型的热力图
+        
+        不指定 weeks 时替换全部周；否则只统计这些周所跨的范围，并只替换这些周。
+        """
+        repository = self.repositories[feed_type]
+        if weeks is None:
+            self.heatmap_store.rebuild(feed_type, baby_id, repository.get_weekday_hour_totals(baby_id))
+            return
+        
+        weeks = sorted(set(weeks))
+        if not weeks:
+            return
+        start_date = datetime.strptime(weeks[0], '%Y-%m-%d')
+        end_date = datetime.strptime(weeks[-1], '%Y-%m-%d') + timedelta(days=7, microseconds=-1)
+        wanted = set(weeks)
+        totals = [
+            row for row in repository.get_weekday_hour_totals(baby_id, start_date, end_date)
+            if row[0] in wanted
+        ]
+        self.heatmap_store.rebuild(feed_type, baby_id, totals, weeks=weeks)
+    
+    def rebuild_event_aggregates(
+        self,
+        baby_id: str,
+        event_type: str,
+        periods: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        用原始记录重建宝宝一类事件的按日聚合
+        
+        不指定 periods 时替换全部周期；否则读取这些日期所跨的范围，只用落在这些日期内的记录替换它们。
+        """
+        repository = self.repositories[event_type]
+        if periods is None:
+            self.aggregator.rebuild(event_type, baby_id, repository.iter_by_baby_id(baby_id))
+            return
+        
+        periods = sorted(set(periods))
+        if not periods:
+            return
+        start_date = datetime.strptime(periods[0], '%Y-%m-%d')
+        end_date = datetime.strptime(periods[-1], '%Y-%m-%d').replace(
+            hour=23, minute=59, second=59, microsecond=999999
+        )
+        wanted = set(periods)
+        records = (
+            record
+            for record in repository.iter_by_date_range(baby_id, start_date, end_date, descending=False)
+            if period_of(record.time) in wanted
+        )
+        self.aggregator.rebuild(event_type, baby_id, records, periods=periods)
+    
+    def close(self):
+        """关闭服务"""
+        self.db_session.close()
@@ -0,0 +1,286 @@
+"""
+导出缓存 - 按请求内容和数据版本缓存导出文件，并合并相同的并发导出
+"""
+from concurrent.futures import Future
+from dataclasses import asdict
+from typing import Dict, List, Optional, Any, Callable, TYPE_CHECKING
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+if TYPE_CHECKING:
+    from baby_tracker.services.export_service import ExportRequest, ExportResult
+
+
+class ExportCache:
+    """
+    导出结果缓存
+    
+    缓存键由导出请求的内容（不含文件名）决定，每个键保存一份清单，记录生成该文件时
+    宝宝数据的版本。导出文件按内容哈希另存一份到缓存目录（artifacts/），清单同时记录
+    缓存文件的大小和修改时间；命中时只比对这两项（不重新计算哈希），并把缓存文件硬链接
+    到本次请求的输出文件名（不支持硬链接时复制）。导出服务写入输出文件前会先断开硬链接，
+    用户可见的导出文件被覆盖或追加不会影响缓存；缓存文件被其他方式改动时大小或修改时间
+    不再一致，视为未命中。
+    数据版本变化（记录增删改）后旧版本的缓存文件自动失效，并在新文件生成后删除。
+    同一进程内相同键和版本的并发导出只会执行一次，其余调用等待并共享结果。
+    """
+    
+    # 进行中的导出（所有缓存实例共享）
+    _lock = threading.Lock()
+    _inflight: Dict[str, Future] = {}
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+    
+    @staticmethod
+    def request_key(request: "ExportRequest") -> str:
+        """根据导出请求的内容生成缓存键（文件名和缓存开关不影响导出内容）"""
+        data = request.to_dict()
+        data.pop('filename', None)
+        data.pop('use_cache', None)
+        data['format'] = str(data.get('format', '')).lower()
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(
+        self,
+        request_key: str,
+        version: str,
+        output_stem: Optional[str] = None
+    ) -> Optional["ExportResult"]:
+        """
+        获取与数据版本一致且缓存文件未被改动的结果，并把缓存文件链接到输出路径
+        
+        output_stem 为本次请求的输出路径前缀（导出目录/文件名），
+        为 None 时链接到生成缓存时的原始路径。
+        """
+        manifest = self._read_manifest(request_key)
+        if manifest is None or manifest.get('version') != version or 'artifacts' not in manifest:
+            return None
+        
+        artifacts = manifest['artifacts']
+        for artifact in artifacts:
+            if self._signature(self._blob_path(artifact['blob'])) != artifact.get('signature'):
+                return None
+        
+        paths = [self._materialize(artifact, output_stem) for artifact in artifacts]
+        result = self._result_from_dict(manifest['result'])
+        result.file_path = ", ".join(paths) if paths else None
+        result.cached = True
+        return result
+    
+    def put(
+        self,
+        request_key: str,
+        version: str,
+        result: "ExportResult",
+        output_stem: Optional[str] = None
+    ) -> None:
+        """按内容哈希保存导出文件和清单，并删除同一请求旧版本的缓存文件"""
+        previous = self._read_manifest(request_key)
+        
+        os.makedirs(os.path.join(self.cache_dir, 'artifacts'), exist_ok=True)
+        artifacts = [self._store(path, output_stem) for path in result.artifact_paths]
+        
+        manifest_path = self._manifest_path(request_key)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': version, 'result': self._result_to_dict(result), 'artifacts': artifacts},
+                f, ensure_ascii=False
+            )
+        os.replace(temp_path, manifest_path)
+        
+        if previous is not None:
+            current_blobs = {artifact['blob'] for artifact in artifacts}
+            for artifact in previous.get('artifacts', []):
+                if artifact['blob'] not in current_blobs:
+                    self._remove(self._blob_path(artifact['blob']))
+    
+    def get_or_build(
+        self,
+        request_key: str,
+        version: str,
+        build: Callable[[], "ExportResult"],
+        output_stem: Optional[str] = None
+    ) -> "ExportResult":
+        """
+        获取缓存结果，未命中时执行导出
+        
+        相同键和版本的并发调用只有一个会执行 build，其余等待其结果；
+        若该次导出失败（例如被取消），等待者会自行重新导出。
+        命中缓存的结果都链接到 output_stem 对应的输出路径（见 get）。
+        """
+        flight_key = f"{request_key}:{version}"
+        while True:
+            result = self.get(request_key, version, output_stem)
+            if result is not None:
+                return result
+            
+            with self._lock:
+                future = self._inflight.get(flight_key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[flight_key] = future
+            
+            if not owner:
+                result = future.result()
+                if result.success:
+                    # 输出文件名可能与执行导出的请求不同，从缓存链接一份
+                    return self.get(request_key, version, output_stem) or result
+                continue
+            
+            try:
+                # 上一次相同的导出可能在检查缓存之后刚刚完成
+                result = self.get(request_key, version, output_stem)
+                if result is None:
+                    result = build()
+                if result.success and not result.cached:
+                    self.put(request_key, version, result, output_stem)
+                future.set_result(result)
+                return result
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight.pop(flight_key, None)
+    
+    def _manifest_path(self, request_key: str) -> str:
+        return os.path.join(self.cache_dir, f"{request_key}.json")
+    
+    def _read_manifest(self, request_key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存清单（不存在或已损坏时返回 None）"""
+        try:
+            with open(self._manifest_path(request_key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _blob_path(self, blob: str) -> str:
+        return os.path.join(self.cache_dir, 'artifacts', blob)
+    
+    def _store(self, path: str, output_stem: Optional[str]) -> Dict[str, Any]:
+        """把导出文件（或目录）按内容哈希复制到缓存目录，返回清单中的条目"""
+        digest = self._digest(path)
+        blob = digest if os.path.isdir(path) else f"{digest}{os.path.splitext(path)[1]}"
+        blob_path = self._blob_path(blob)
+        if not os.path.exists(blob_path):
+            temp_path = f"{blob_path}.tmp"
+            self._remove(temp_path)
+            if os.path.isdir(path):
+                shutil.copytree(path, temp_path)
+            else:
+                shutil.copyfile(path, temp_path)
+            os.replace(temp_path, blob_path)
+        
+        suffix = path[len(output_stem):] if output_stem and path.startswith(output_stem) else None
+        return {
+            'blob': blob,
+            'digest': digest,
+            'signature': self._signature(blob_path),
+            'path': path,
+            'suffix': suffix,
+        }
+    
+    def _materialize(self, artifact: Dict[str, Any], output_stem: Optional[str]) -> str:
+        """把缓存文件硬链接到输出路径（目录逐个文件链接），返回输出路径"""
+        if output_stem is not None and artifact['suffix'] is not None:
+            path = f"{output_stem}{artifact['suffix']}"
+        else:
+            path = artifact['path']
+        
+        blob_path = self._blob_path(artifact['blob'])
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.isdir(blob_path):
+            self._remove(path)
+            shutil.copytree(blob_path, path, copy_function=self._link)
+        else:
+            temp_path = f"{path}.tmp"
+            self._remove(temp_path)
+            self._link(blob_path, temp_path)
+            os.replace(temp_path, path)
+        return path
+    
+    @staticmethod
+    def _link(source: str, target: str) -> None:
+        """创建硬链接（文件系统不支持时复制）"""
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    
+    @staticmethod
+    def _signature(path: str) -> Optional[List[List[Any]]]:
+        """
+        缓存文件的 [相对路径, 大小, 修改时间（纳秒）] 列表（目录按相对路径排序），不存在时为 None
+        
+        只读取文件元数据，用于命中时确认缓存文件没有被改动。
+        """
+        if not os.path.exists(path):
+            return None
+        if os.path.isdir(path):
+            relatives = sorted(
+                os.path.relpath(os.path.join(root, name), path)
+                for root, _, names in os.walk(path) for name in names
+            )
+        else:
+            relatives = ['']
+        signature = []
+        for relative in relatives:
+            stat = os.stat(os.path.join(path, relative) if relative else path)
+            signature.append([relative.replace(os.sep, '/'), stat.st_size, stat.st_mtime_ns])
+        return signature
+    
+    @staticmethod
+    def _digest(path: str) -> str:
+        """文件内容的 SHA-256（目录按相对路径排序后依次计入各文件的路径和内容）"""
+        digest = hashlib.sha256()
+        
+        def update(file_path: str) -> None:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        
+        if os.path.isdir(path):
+            relatives = sorted(
+                os.path.relpath(os.path.join(root, name), path)
+                for root, _, names in os.walk(path) for name in names
+            )
+            for relative in relatives:
+                digest.update(relative.replace(os.sep, '/').encode('utf-8') + b'\0')
+                update(os.path.join(path, relative))
+        else:
+            update(path)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _result_to_dict(result: "ExportResult") -> Dict[str, Any]:
+        data = asdict(result)
+        data['export_date'] = result.export_date.timestamp()
+        data.pop('cached', None)
+        return data
+    
+    @staticmethod
+    def _result_from_dict(data: Dict[str, Any]) -> "ExportResult":
+        from baby_tracker.services.export_service import ExportResult
+        data = dict(data)
+        data['export_date'] = datetime.fromtimestamp(data['export_date'])
+        return ExportResult(**data)
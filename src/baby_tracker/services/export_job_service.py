@@ -0,0 +1,253 @@
+"""
+导出任务服务 - 在后台线程池中执行导出，并持久化任务状态
+"""
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable
+from datetime import datetime
+import json
+import os
+import shutil
+import threading
+import uuid
+from baby_tracker.models.dto import ExportJobDTO, ExportJobStatus
+from baby_tracker.repositories.export_repository import ExportJobRepository
+from baby_tracker.services.export_service import ExportService, ExportRequest, ExportResult
+
+
+class ExportCancelled(Exception):
+    """导出任务已被取消"""
+
+
+class ExportJobManager:
+    """
+    后台导出任务管理器
+    
+    导出在有界线程池中执行，每个任务使用独立的数据库会话，
+    任务状态（queued/running/done/failed/cancelled）和进度保存在 ExportJob 表中。
+    默认的会话来自 JobSessionLocal 连接池，每个会话持有自己的连接，
+    不与请求线程共享 SessionLocal 的单个连接。
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 2,
+        session_factory: Optional[Callable[[], Any]] = None,
+        export_service_factory: Optional[Callable[[Any], ExportService]] = None
+    ):
+        from baby_tracker.database import JobSessionLocal, ReadSessionLocal
+        self.session_factory = session_factory or JobSessionLocal
+        # 默认各表在独立的只读会话上并发读取
+        self.export_service_factory = export_service_factory or (
+            lambda session: ExportService(session, session_factory=ReadSessionLocal)
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export-job")
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        
+        # 上次进程退出时未完成的任务不会再被执行
+        with self._job_repository() as repository:
+            repository.fail_unfinished("导出服务重启，任务已中断")
+    
+    def submit(
+        self,
+        request: ExportRequest,
+        progress_callback: Optional[Callable[[str, int], None]] = None
+    ) -> ExportJobDTO:
+        """
+        提交导出任务
+        
+        Args:
+            request: 导出请求
+            progress_callback: 进度回调，参数为 (任务ID, 已写出的记录行数)
+        
+        Returns:
+            处于排队状态的任务记录
+        """
+        job_dto = ExportJobDTO(
+            id=str(uuid.uuid4()),
+            baby_id=request.baby_id,
+            status=ExportJobStatus.QUEUED,
+            format=request.format.lower(),
+            request=self._serialize_request(request),
+            created_at=datetime.now().timestamp()
+        )
+        with self._job_repository() as repository:
+            job_dto = repository.create(job_dto)
+        
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_dto.id] = cancel_event
+            future = self.executor.submit(
+                self._run_job, job_dto.id, request, cancel_event, progress_callback
+            )
+            self._futures[job_dto.id] = future
+        future.add_done_callback(lambda _, job_id=job_dto.id: self._forget(job_id))
+        
+        return job_dto
+    
+    def get_job(self, job_id: str) -> Optional[ExportJobDTO]:
+        """获取任务记录"""
+        with self._job_repository() as repository:
+            return repository.get_by_id(job_id)
+    
+    def list_jobs(self, baby_id: str, limit: Optional[int] = None) -> List[ExportJobDTO]:
+        """获取宝宝的导出任务（最新的在前）"""
+        with self._job_repository() as repository:
+            return repository.find_by_baby_id(baby_id, limit)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务
+        
+        排队中的任务直接取消；运行中的任务在下一次进度回调时中止，
+        并清理未完成的导出文件。导出在取消后才完成（例如命中缓存、没有进度回调）时，
+        任务同样标记为已取消，生成的文件被删除。
+        """
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        
+        if cancel_event is None or future is None or future.done():
+            return False
+        
+        cancel_event.set()
+        if future.cancel():
+            # 任务尚未开始执行
+            self._finish_job(job_id, ExportJobStatus.CANCELLED, error_message="任务已取消")
+        return True
+    
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[ExportJobDTO]:
+        """等待任务结束并返回最终的任务记录（超时返回当前记录）"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        return self.get_job(job_id)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池（不再接受新任务）"""
+        if not wait:
+            with self._lock:
+                job_ids = list(self._futures.keys())
+            for job_id in job_ids:
+                self.cancel(job_id)
+        self.executor.shutdown(wait=wait)
+    
+    def _run_job(
+        self,
+        job_id: str,
+        request: ExportRequest,
+        cancel_event: threading.Event,
+        progress_callback: Optional[Callable[[str, int], None]]
+    ) -> None:
+        """在工作线程中执行导出"""
+        if cancel_event.is_set():
+            self._finish_job(job_id, ExportJobStatus.CANCELLED, error_message="任务已取消")
+            return
+        
+        with self._job_repository() as repository:
+            job_dto = repository.get_by_id(job_id)
+            job_dto.status = ExportJobStatus.RUNNING
+            job_dto.started_at = datetime.now().timestamp()
+            job_dto.timestamp = job_dto.started_at
+            repository.update(job_id, job_dto)
+        
+        def on_progress(rows_written: int) -> None:
+            if cancel_event.is_set():
+                raise ExportCancelled("任务已取消")
+            with self._job_repository() as progress_repository:
+                progress_repository.update_progress(job_id, rows_written)
+            if progress_callback:
+                progress_callback(job_id, rows_written)
+        
+        # 标记为运行中之后才收到的取消请求
+        if cancel_event.is_set():
+            self._finish_job(job_id, ExportJobStatus.CANCELLED, error_message="任务已取消")
+            return
+        
+        session = self.session_factory()
+        try:
+            export_service = self.export_service_factory(session)
+            result = export_service.export_baby_data(request, progress_callback=on_progress)
+        except Exception as e:
+            result = ExportResult(success=False, error_message=f"导出过程中发生错误: {str(e)}")
+        finally:
+            session.close()
+        
+        if result.success and cancel_event.is_set():
+            # 导出完成前已被取消：不交付文件（追加模式的文件包含之前的数据，保留）
+            if not request.append:
+                self._remove_artifacts(result.artifact_paths)
+            self._finish_job(job_id, ExportJobStatus.CANCELLED, error_message="任务已取消")
+        elif result.success:
+            self._finish_job(job_id, ExportJobStatus.DONE, result=result)
+            if progress_callback:
+                progress_callback(job_id, result.record_count or 0)
+        elif cancel_event.is_set():
+            self._finish_job(job_id, ExportJobStatus.CANCELLED, error_message="任务已取消")
+        else:
+            self._finish_job(job_id, ExportJobStatus.FAILED, error_message=result.error_message)
+    
+    def _finish_job(
+        self,
+        job_id: str,
+        status: ExportJobStatus,
+        result: Optional[ExportResult] = None,
+        error_message: Optional[str] = None
+    ) -> None:
+        """保存任务的最终状态"""
+        with self._job_repository() as repository:
+            job_dto = repository.get_by_id(job_id)
+            if job_dto is None:
+                return
+            
+            now = datetime.now().timestamp()
+            job_dto.status = status
+            job_dto.finished_at = now
+            job_dto.timestamp = now
+            job_dto.error_message = error_message
+            if result is not None:
+                job_dto.file_path = result.file_path
+                job_dto.file_size = result.file_size
+                job_dto.record_count = result.record_count
+                job_dto.progress = result.record_count or 0
+            repository.update(job_id, job_dto)
+    
+    @staticmethod
+    def _remove_artifacts(paths: List[str]) -> None:
+        """删除导出生成的文件或目录"""
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+    
+    def _forget(self, job_id: str) -> None:
+        """任务结束后释放内存中的句柄（任务记录仍保存在数据库中）"""
+        with self._lock:
+            self._cancel_events.pop(job_id, None)
+            self._futures.pop(job_id, None)
+    
+    @contextmanager
+    def _job_repository(self):
+        """
+        为一次任务记录读写创建短生命周期的会话
+        
+        只有 session_factory 为每个会话提供独立连接（如默认的 JobSessionLocal）时才能在多个线程中安全使用。
+        """
+        session = self.session_factory()
+        try:
+            yield ExportJobRepository(session)
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _serialize_request(request: ExportRequest) -> str:
+        """将导出请求序列化为 JSON（日期保存为 Unix 时间戳）"""
+        return json.dumps(request.to_dict(), ensure_ascii=False)
@@ -1,14 +1,55 @@
 """
 导出服务 - 使用 dataclasses 进行数据导出
 """
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, BinaryIO
+from dataclasses import dataclass, field, fields as dataclass_fields, replace
+from enum import Enum
+from typing import (
+    Dict, List, Optional, Any, BinaryIO, Callable, Iterable, Iterator, Tuple, TextIO, get_args
+)
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import csv
+import gzip
+import heapq
+import io
+import itertools
+import json
 import os
-import pandas as pd
+import queue
+import shutil
+import threading
+import zipfile
 from baby_tracker.services.baby_service import BabyService
 from baby_tracker.services.feeding_service import FeedingService
-from baby_tracker.models.dto import BabyDTO
+from baby_tracker.services.health_service import HealthService
+from baby_tracker.services.activity_service import ActivityService
+from baby_tracker.services.export_cache import ExportCache
+from baby_tracker.models.dto import (
+    ExportJobStatus, BabyDTO, NursingDTO, FormulaDTO, SleepDTO, DiaperDTO, WeightDTO, HeightDTO,
+    HeadDTO, TemperatureDTO, PlaytimeDTO, BathDTO, PhotoDTO, VideoDTO
+)
+from baby_tracker.models.mappers import DTODictMapper
+from baby_tracker.repositories.export_repository import ExportJobRepository
+
+
+# 喂养记录表的列顺序（母乳和配方奶记录共用，缺失的列留空）
+FEEDING_COLUMNS = [
+    '日期', '时间', '喂养类型',
+    '左侧时长(分钟)', '右侧时长(分钟)', '两侧时长(分钟)', '总时长(分钟)', '结束侧',
+    '数量(毫升)', '备注'
+]
+
+# 其他记录表的列顺序
+SLEEP_COLUMNS = ['日期', '开始时间', '类型', '时长(分钟)', '时长(小时)', '备注']
+DIAPER_COLUMNS = ['日期', '时间', '类型', '备注']
+GROWTH_COLUMNS = ['日期', '时间', '测量项目', '数值', '单位', '备注']
+TEMPERATURE_COLUMNS = ['日期', '时间', '体温(°C)', '测量位置', '状态', '备注']
+
+# 后台读取线程写完一个表的标记
+_SECTION_END = object()
+
+# Parquet 导出中按字典编码（分类）存储的低基数字段
+PARQUET_CATEGORICAL_FIELDS = {'baby_id', 'desc_id', 'location', 'play_type'}
 
 
 @dataclass
@@ -17,14 +58,31 @@ class ExportRequest:
     baby_id: str
     start_date: datetime
     end_date: datetime
-    format: str = "excel"  # excel, csv, pdf
+    format: str = "excel"  # excel, csv, zip, parquet, ndjson, pdf
     include_feeding: bool = True
     include_sleep: bool = True
     include_diaper: bool = True
     include_growth: bool = True
     include_temperature: bool = False
     include_photos: bool = False
+    include_activity: bool = False  # 游戏、洗澡记录
+    compress: bool = False  # ndjson 格式是否使用 gzip 压缩
+    use_cache: bool = True  # 数据未变化时直接返回上次生成的文件
+    # 增量导出：只导出 Timestamp 晚于水位线（或指定导出任务开始时间）的新增/修改记录
+    since_timestamp: Optional[float] = None
+    since_export_id: Optional[str] = None
+    append: bool = False  # 追加到同名的已有文件末尾（仅 csv、ndjson）
     filename: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典（日期保存为 Unix 时间戳）"""
+        data = {}
+        for request_field in dataclass_fields(self):
+            value = getattr(self, request_field.name)
+            if isinstance(value, datetime):
+                value = value.timestamp()
+            data[request_field.name] = value
+        return data
 
 
 @dataclass
@@ -36,21 +94,84 @@ class ExportResult:
     export_date: datetime = field(default_factory=datetime.now)
     file_size: Optional[int] = None
     record_count: Optional[int] = None
+    cached: bool = False  # 结果来自导出缓存
+    watermark: Optional[float] = None  # 下一次增量导出应使用的 since_timestamp
+    
+    @property
+    def artifact_paths(self) -> List[str]:
+        """导出生成的文件或目录（CSV导出和多文件的缓存命中在 file_path 中以逗号分隔）"""
+        if not self.file_path:
+            return []
+        return [path for path in self.file_path.split(", ") if path]
 
 
 class ExportService:
     """数据导出服务"""
     
-    def __init__(self, db_session=None):
+    # Excel 单个工作表的最大行数（含表头）
+    excel_max_rows = 1048576
+    
+    # Parquet 压缩算法及单个行组的最大行数（行组默认按自然月划分）
+    parquet_compression = "zstd"
+    parquet_max_row_group = 100000
+    
+    # 每写出多少行调用一次进度回调
+    progress_interval = 500
+    
+    # PDF 每个表格块的最大行数，明细行数上限（超过后只保留汇总），以及改为按周分组的导出天数
+    pdf_table_chunk_rows = 200
+    pdf_max_detail_rows = 5000
+    pdf_week_grouping_days = 31
+    
+    # 并发读取各表的线程数，以及每批传回的行数和每个表最多缓冲的批数
+    section_workers = 4
+    section_batch_rows = 500
+    section_buffer_batches = 4
+    
+    def __init__(self, db_session=None, session_factory: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            db_session: 共享的数据库会话
+            session_factory: 创建只读会话的工厂，各表在独立会话上并发读取；
+                未指定时，自行创建会话的服务使用 ReadSessionLocal，
+                传入共享会话的服务依次在该会话上读取
+        """
+        if session_factory is None and db_session is None:
+            from baby_tracker.database import ReadSessionLocal
+            session_factory = ReadSessionLocal
+        self.session_factory = session_factory
         self.baby_service = BabyService(db_session)
         self.feeding_service = FeedingService(db_session)
+        self.health_service = HealthService(db_session)
+        self.activity_service = ActivityService(db_session)
+        self.export_job_repo = ExportJobRepository(db_session)
         self.export_dir = "data/exports"
+        self.cache = ExportCache(os.path.join(self.export_dir, "cache"))
+        self._progress_callback: Optional[Callable[[int], None]] = None
+        self._rows_written = 0
         
         # 确保导出目录存在
         os.makedirs(self.export_dir, exist_ok=True)
     
-    def export_baby_data(self, request: ExportRequest) -> ExportResult:
-        """导出宝宝数据"""
+    def export_baby_data(
+        self,
+        request: ExportRequest,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> ExportResult:
+        """
+        导出宝宝数据
+        
+        Args:
+            request: 导出请求
+            progress_callback: 进度回调，参数为已写出的记录行数；
+                回调中抛出的异常会中止导出并清理未完成的文件
+        
+        默认文件名和增量导出起点写入请求的副本，调用方的 request 不会被修改。
+        """
+        request = replace(request)
+        self._progress_callback = progress_callback
+        self._rows_written = 0
+        
         # 获取宝宝信息
         baby = self.baby_service.get_baby(request.baby_id)
         if not baby:
@@ -64,12 +185,63 @@ class ExportService:
             date_range = f"{request.start_date.strftime('%Y%m%d')}-{request.end_date.strftime('%Y%m%d')}"
             request.filename = f"{baby.name}_数据导出_{date_range}"
         
+        if request.append and request.format.lower() not in ("csv", "ndjson"):
+            return ExportResult(
+                success=False,
+                error_message=f"追加模式仅支持 csv 和 ndjson 格式: {request.format}"
+            )
+        
+        # 先取水位线再读取数据，导出期间写入的记录会在下一次增量导出中包含
+        watermark = datetime.now().timestamp()
+        
+        try:
+            # 以指定导出任务的开始时间作为增量导出的起点
+            if request.since_export_id and request.since_timestamp is None:
+                export_job = self.export_job_repo.get_by_id(request.since_export_id)
+                if not export_job or export_job.status != ExportJobStatus.DONE:
+                    return ExportResult(
+                        success=False,
+                        error_message=f"未找到已完成的导出任务: {request.since_export_id}"
+                    )
+                request.since_timestamp = export_job.started_at
+            
+            if not request.use_cache or request.append:
+                result = self._export_by_format(request, baby)
+            else:
+                # 相同请求在数据未变化时复用已生成的文件，相同的并发请求只导出一次
+                result = self.cache.get_or_build(
+                    ExportCache.request_key(request),
+                    self._get_data_version(request, baby),
+                    lambda: self._with_watermark(self._export_by_format(request, baby), watermark),
+                    os.path.join(self.export_dir, request.filename)
+                )
+            return self._with_watermark(result, watermark)
+        except Exception as e:
+            return ExportResult(
+                success=False,
+                error_message=f"导出过程中发生错误: {str(e)}"
+            )
+    
+    @staticmethod
+    def _with_watermark(result: ExportResult, watermark: float) -> ExportResult:
+        """为成功的导出结果设置增量导出水位线（缓存命中时保留生成文件时的水位线）"""
+        if result.success and result.watermark is None:
+            result.watermark = watermark
+        return result
+    
+    def _export_by_format(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
+        """根据请求格式调用对应的导出方法"""
         try:
-            # 根据请求格式调用对应的导出方法
             if request.format.lower() == "excel":
                 return self._export_to_excel(request, baby)
             elif request.format.lower() == "csv":
                 return self._export_to_csv(request, baby)
+            elif request.format.lower() == "zip":
+                return self._export_to_zip(request, baby)
+            elif request.format.lower() == "parquet":
+                return self._export_to_parquet(request, baby)
+            elif request.format.lower() == "ndjson":
+                return self._export_to_ndjson(request, baby)
             elif request.format.lower() == "pdf":
                 return self._export_to_pdf(request, baby)
             else:
@@ -83,50 +255,54 @@ class ExportService:
                 error_message=f"导出过程中发生错误: {str(e)}"
             )
     
+    def _get_data_version(self, request: ExportRequest, baby: BabyDTO) -> str:
+        """
+        请求涉及数据的版本
+        
+        由宝宝信息的 Timestamp 和每种记录的 (记录数, 最大 Timestamp) 组成，
+        新增、修改（写入时更新 Timestamp）和删除记录都会改变版本。
+        """
+        parts = [f"baby:{baby.timestamp}"]
+        for event_type, _, repository in self._get_event_sources(request):
+            count, max_timestamp = repository.get_data_version(request.baby_id)
+            parts.append(f"{event_type}:{count}:{max_timestamp}")
+        return "|".join(parts)
+    
     def _export_to_excel(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
-        """导出为Excel格式"""
+        """导出为Excel格式（openpyxl 只写模式，逐行流式写入）"""
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            return ExportResult(
+                success=False,
+                error_message="导出Excel需要安装openpyxl库。请使用命令: pip install openpyxl"
+            )
+        
         # Excel文件路径
         file_path = os.path.join(self.export_dir, f"{request.filename}.xlsx")
         
-        # 创建Excel写入器，支持多个工作表
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            record_count = 0
-            
-            # 添加宝宝基本信息表
-            baby_info = pd.DataFrame([{
-                "名称": "宝宝姓名",
-                "值": baby.name
-            }, {
-                "名称": "出生日期",
-                "值": datetime.fromtimestamp(baby.dob).strftime('%Y-%m-%d')
-            }, {
-                "名称": "性别",
-                "值": baby.gender_display
-            }, {
-                "名称": "年龄(天)",
-                "值": baby.age_in_days
-            }, {
-                "名称": "年龄(周)",
-                "值": baby.age_in_weeks
-            }, {
-                "名称": "年龄(月)",
-                "值": baby.age_in_months
-            }, {
-                "名称": "导出时间范围",
-                "值": f"{request.start_date.strftime('%Y-%m-%d')} 至 {request.end_date.strftime('%Y-%m-%d')}"
-            }])
-            baby_info.to_excel(writer, sheet_name='宝宝信息', index=False)
-            
-            # 添加喂养记录表
-            if request.include_feeding:
-                feeding_data = self._get_feeding_data(request.baby_id, request.start_date, request.end_date)
-                if feeding_data:
-                    feeding_df = pd.DataFrame(feeding_data)
-                    feeding_df.to_excel(writer, sheet_name='喂养记录', index=False)
-                    record_count += len(feeding_data)
-            
-            # TODO: 添加其他记录表（睡眠、尿布、生长发育等）
-            # 这里需要健康相关的仓储和服务来获取数据
+        self._detach_output(file_path)
+        
+        # 只写模式的工作簿不保留单元格对象，内存占用与行数无关
+        workbook = Workbook(write_only=True)
+        record_count = 0
+        
+        # 添加宝宝基本信息表
+        info_sheet = workbook.create_sheet('宝宝信息')
+        info_sheet.append(["名称", "值"])
+        for name, value in self._get_baby_info_rows(request, baby):
+            info_sheet.append([name, value])
+        
+        # 添加各记录表（没有记录的表不创建工作表）
+        for _, title, columns, rows in self._iter_sections(request):
+            record_count += self._write_excel_rows(workbook, title, columns, rows)
+        
+        try:
+            workbook.save(file_path)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
         
         # 获取文件大小
         file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
@@ -139,67 +315,582 @@ class ExportService:
             export_date=datetime.now()
         )
     
+    def _write_excel_rows(
+        self,
+        workbook,
+        sheet_name: str,
+        columns: List[str],
+        rows: Iterable[Dict[str, Any]]
+    ) -> int:
+        """将数据行流式写入工作表，超过Excel单表行数上限时自动续写到新工作表"""
+        max_data_rows = self.excel_max_rows - 1  # 每个工作表第一行为表头
+        sheet = None
+        sheet_rows = 0
+        sheet_index = 0
+        row_count = 0
+        
+        for row in rows:
+            if sheet is None or sheet_rows >= max_data_rows:
+                sheet_index += 1
+                title = sheet_name if sheet_index == 1 else f"{sheet_name}_{sheet_index}"
+                sheet = workbook.create_sheet(title)
+                sheet.append(columns)
+                sheet_rows = 0
+            
+            sheet.append([row.get(column, '') for column in columns])
+            sheet_rows += 1
+            row_count += 1
+        
+        return row_count
+    
     def _export_to_csv(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
-        """导出为CSV格式"""
-        # 由于CSV不支持多表，我们将创建多个CSV文件并打包
-        files_created = []
+        """导出为CSV格式（每个表一个文件；追加模式下记录追加到已有文件末尾）"""
+        # 由于CSV不支持多表，我们将创建多个CSV文件
+        files_written = []
+        # 文件路径 -> 写入前的大小（新建的文件为 None），出错时据此回滚
+        original_sizes: Dict[str, Optional[int]] = {}
         record_count = 0
         
         try:
-            # 导出宝宝基本信息
+            # 导出宝宝基本信息（始终重写）
             baby_info_path = os.path.join(self.export_dir, f"{request.filename}_宝宝信息.csv")
-            baby_info = pd.DataFrame([{
-                "名称": "宝宝姓名",
-                "值": baby.name
-            }, {
-                "名称": "出生日期",
-                "值": datetime.fromtimestamp(baby.dob).strftime('%Y-%m-%d')
-            }, {
-                "名称": "性别",
-                "值": baby.gender_display
-            }, {
-                "名称": "年龄(天)",
-                "值": baby.age_in_days
-            }])
-            baby_info.to_csv(baby_info_path, index=False)
-            files_created.append(baby_info_path)
-            
-            # 导出喂养记录
-            if request.include_feeding:
-                feeding_data = self._get_feeding_data(request.baby_id, request.start_date, request.end_date)
-                if feeding_data:
-                    feeding_path = os.path.join(self.export_dir, f"{request.filename}_喂养记录.csv")
-                    feeding_df = pd.DataFrame(feeding_data)
-                    feeding_df.to_csv(feeding_path, index=False)
-                    files_created.append(feeding_path)
-                    record_count += len(feeding_data)
+            original_sizes[baby_info_path] = None
+            self._detach_output(baby_info_path)
+            with open(baby_info_path, 'w', encoding='utf-8', newline='') as stream:
+                self._write_csv_rows(
+                    stream,
+                    ["名称", "值"],
+                    ({"名称": name, "值": value} for name, value in self._get_baby_info_rows(request, baby))
+                )
+            files_written.append(baby_info_path)
             
-            # TODO: 导出其他记录（睡眠、尿布、生长发育等）
-            # 这里需要健康相关的仓储和服务来获取数据
+            # 导出各记录表（没有记录的表不创建文件）
+            for _, title, columns, rows in self._iter_sections(request):
+                rows = self._peek_rows(rows)
+                if rows is None:
+                    continue
+                
+                section_path = os.path.join(self.export_dir, f"{request.filename}_{title}.csv")
+                original_size = self._get_append_offset(section_path, request.append)
+                original_sizes[section_path] = original_size
+                self._detach_output(section_path, keep_content=original_size is not None)
+                with open(section_path, 'a' if original_size else 'w', encoding='utf-8', newline='') as stream:
+                    record_count += self._write_csv_rows(
+                        stream, columns, rows, write_header=not original_size
+                    )
+                files_written.append(section_path)
             
             # 创建导出结果
             # 在实际应用中可能需要将CSV文件打包为ZIP
             return ExportResult(
                 success=True,
-                file_path=", ".join(files_created),
-                file_size=sum(os.path.getsize(f) for f in files_created),
+                file_path=", ".join(files_written),
+                file_size=sum(os.path.getsize(f) for f in files_written),
                 record_count=record_count,
                 export_date=datetime.now()
             )
             
         except Exception as e:
+            # 清理已创建的文件，追加的文件恢复到写入前的大小
+            for file_path, original_size in original_sizes.items():
+                self._rollback_file(file_path, original_size)
+            
+            raise e
+    
+    @staticmethod
+    def _get_append_offset(file_path: str, append: bool) -> Optional[int]:
+        """追加模式下返回已有文件的大小，否则（或文件不存在时）返回 None"""
+        if append and os.path.exists(file_path):
+            return os.path.getsize(file_path)
+        return None
+    
+    @staticmethod
+    def _detach_output(file_path: str, keep_content: bool = False) -> None:
+        """
+        写入前断开输出文件与导出缓存文件的硬链接（命中缓存的输出文件是缓存文件的硬链接）
+        
+        覆盖写入时直接删除链接；追加写入（keep_content）时先复制一份再替换，缓存文件保持不变。
+        """
+        try:
+            if os.stat(file_path).st_nlink < 2:
+                return
+        except FileNotFoundError:
+            return
+        if keep_content:
+            temp_path = f"{file_path}.tmp"
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, file_path)
+        else:
+            os.remove(file_path)
+    
+    @staticmethod
+    def _rollback_file(file_path: str, original_size: Optional[int]) -> None:
+        """撤销未完成的写入：新建的文件直接删除，追加的文件截断到原来的大小"""
+        try:
+            if original_size is None:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            else:
+                os.truncate(file_path, original_size)
+        except OSError:
+            pass
+    
+    def _export_to_zip(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
+        """导出为ZIP格式（每个表一个CSV条目，边生成边压缩写入，不产生临时文件）"""
+        file_path = os.path.join(self.export_dir, f"{request.filename}.zip")
+        self._detach_output(file_path)
+        record_count = 0
+        
+        try:
+            with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                # 导出宝宝基本信息
+                with self._open_zip_csv(archive, f"{request.filename}_宝宝信息.csv") as stream:
+                    self._write_csv_rows(
+                        stream,
+                        ["名称", "值"],
+                        ({"名称": name, "值": value} for name, value in self._get_baby_info_rows(request, baby))
+                    )
+                
+                # 导出各记录表（没有记录的表不创建条目）
+                for _, title, columns, rows in self._iter_sections(request):
+                    rows = self._peek_rows(rows)
+                    if rows is None:
+                        continue
+                    with self._open_zip_csv(archive, f"{request.filename}_{title}.csv") as stream:
+                        record_count += self._write_csv_rows(stream, columns, rows)
+        except Exception:
+            # 清理未完成的压缩包
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        
+        return ExportResult(
+            success=True,
+            file_path=file_path,
+            file_size=os.path.getsize(file_path),
+            record_count=record_count,
+            export_date=datetime.now()
+        )
+    
+    def _open_zip_csv(self, archive: zipfile.ZipFile, entry_name: str) -> TextIO:
+        """在压缩包中打开一个可流式写入的CSV文本条目"""
+        return io.TextIOWrapper(archive.open(entry_name, 'w'), encoding='utf-8', newline='')
+    
+    def _write_csv_rows(
+        self,
+        stream: TextIO,
+        columns: List[str],
+        rows: Iterable[Dict[str, Any]],
+        write_header: bool = True
+    ) -> int:
+        """将数据行逐行写入CSV文本流，返回写入的行数"""
+        writer = csv.DictWriter(stream, fieldnames=columns, restval='', extrasaction='ignore')
+        if write_header:
+            writer.writeheader()
+        row_count = 0
+        for row in rows:
+            writer.writerow(row)
+            row_count += 1
+        return row_count
+    
+    def _export_to_ndjson(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
+        """
+        导出为NDJSON格式（每行一条带类型标签的完整记录，可用 ImportService 无损导入）
+        
+        追加模式下本次导出的记录和汇总行追加到已有文件末尾
+        （gzip 文件追加为新的压缩成员，读取时自动拼接）。
+        """
+        extension = "ndjson.gz" if request.compress else "ndjson"
+        file_path = os.path.join(self.export_dir, f"{request.filename}.{extension}")
+        original_size = self._get_append_offset(file_path, request.append)
+        mode = 'a' if original_size is not None else 'w'
+        self._detach_output(file_path, keep_content=original_size is not None)
+        counts: Dict[str, int] = {}
+        
+        try:
+            if request.compress:
+                stream = gzip.open(file_path, f'{mode}t', encoding='utf-8')
+            else:
+                stream = open(file_path, mode, encoding='utf-8')
+            
+            with stream:
+                self._write_ndjson_line(stream, 'baby', DTODictMapper.to_dict(baby))
+                for event_type, _, records in self._iter_event_records(request):
+                    counts.setdefault(event_type, 0)
+                    for record in records:
+                        self._write_ndjson_line(stream, event_type, DTODictMapper.to_dict(record))
+                        counts[event_type] += 1
+                
+                # 末尾写入汇总行，导入时用于校验记录数
+                self._write_ndjson_line(stream, 'summary', {
+                    'baby_id': baby.id,
+                    'counts': counts,
+                    'export_date': datetime.now().timestamp(),
+                    'since_timestamp': request.since_timestamp,
+                })
+        except Exception:
+            self._rollback_file(file_path, original_size)
+            raise
+        
+        return ExportResult(
+            success=True,
+            file_path=file_path,
+            file_size=os.path.getsize(file_path),
+            record_count=sum(counts.values()),
+            export_date=datetime.now()
+        )
+    
+    def _write_ndjson_line(self, stream: TextIO, type_name: str, data: Dict[str, Any]) -> None:
+        """写入一行 NDJSON 记录"""
+        stream.write(json.dumps({'type': type_name, 'data': data}, ensure_ascii=False, separators=(',', ':')))
+        stream.write('\n')
+    
+    def _export_to_parquet(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
+        """导出为Parquet格式（每种记录一个文件，列带类型，按月划分行组）"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return ExportResult(
+                success=False,
+                error_message="导出Parquet需要安装pyarrow库。请使用命令: pip install pyarrow"
+            )
+        
+        # Parquet导出为一个目录，每种记录一个文件
+        export_path = os.path.join(self.export_dir, f"{request.filename}_parquet")
+        os.makedirs(export_path, exist_ok=True)
+        files_created = []
+        record_count = 0
+        
+        try:
+            for event_type, dto_class, records in self._iter_event_records(request):
+                file_path = os.path.join(export_path, f"{event_type}.parquet")
+                self._detach_output(file_path)
+                files_created.append(file_path)
+                record_count += self._write_parquet_file(pa, pq, file_path, dto_class, records)
+        except Exception:
             # 清理已创建的文件
             for file_path in files_created:
                 if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
+                    os.remove(file_path)
+            raise
+        
+        return ExportResult(
+            success=True,
+            file_path=export_path,
+            file_size=sum(os.path.getsize(f) for f in files_created),
+            record_count=record_count,
+            export_date=datetime.now()
+        )
+    
+    def _write_parquet_file(self, pa, pq, file_path: str, dto_class: type, records: Iterable[Any]) -> int:
+        """将按时间升序的记录流写入Parquet文件，每个自然月一个行组"""
+        dto_fields = dataclass_fields(dto_class)
+        schema = pa.schema([
+            pa.field(f.name, self._parquet_type(pa, f.name, f.type)) for f in dto_fields
+        ])
+        
+        row_count = 0
+        buffer: List[Any] = []
+        current_month = None
+        
+        with pq.ParquetWriter(file_path, schema, compression=self.parquet_compression) as writer:
+            for record in records:
+                month = datetime.fromtimestamp(record.time).strftime('%Y-%m')
+                if buffer and (month != current_month or len(buffer) >= self.parquet_max_row_group):
+                    writer.write_table(self._parquet_table(pa, schema, buffer))
+                    buffer = []
+                current_month = month
+                buffer.append(record)
+                row_count += 1
             
-            raise e
+            if buffer:
+                writer.write_table(self._parquet_table(pa, schema, buffer))
+        
+        return row_count
+    
+    def _parquet_table(self, pa, schema, records: List[Any]):
+        """把一批 DTO 转换为列式的 Arrow 表"""
+        columns = []
+        for schema_field in schema:
+            values = [getattr(record, schema_field.name) for record in records]
+            if pa.types.is_timestamp(schema_field.type):
+                # Unix 时间戳（秒）转为毫秒整数
+                values = [round(v * 1000) if v is not None else None for v in values]
+                columns.append(pa.array(values, type=schema_field.type))
+            elif pa.types.is_dictionary(schema_field.type):
+                columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                values = [v.value if isinstance(v, Enum) else v for v in values]
+                columns.append(pa.array(values, type=schema_field.type))
+        return pa.Table.from_arrays(columns, schema=schema)
+    
+    def _parquet_type(self, pa, name: str, annotation: Any):
+        """根据 DTO 字段推断 Arrow 列类型"""
+        if name in ('time', 'timestamp'):
+            return pa.timestamp('ms', tz='UTC')
+        if name in PARQUET_CATEGORICAL_FIELDS:
+            return pa.dictionary(pa.int32(), pa.string())
+        
+        # 展开 Optional[X]
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        base = args[0] if args else annotation
+        
+        if base is bool:
+            return pa.bool_()
+        if base is int:
+            return pa.int32()
+        if base is float:
+            return pa.float64()
+        if isinstance(base, type) and issubclass(base, Enum):
+            return pa.int8()
+        return pa.string()
+    
+    def _iter_event_records(self, request: ExportRequest) -> Iterator[Tuple[str, type, Iterator[Any]]]:
+        """按请求依次生成 (记录类型, DTO类, 按时间升序的记录流)，各类型并发读取"""
+        sources = self._get_event_sources(request)
+        readers = [
+            lambda session, repository=repository: self._bind_repository(repository, session).iter_by_date_range(
+                request.baby_id, request.start_date, request.end_date,
+                descending=False, since_timestamp=request.since_timestamp
+            )
+            for _, _, repository in sources
+        ]
+        for (event_type, dto_class, _), records in zip(sources, self._iter_concurrently(readers)):
+            yield event_type, dto_class, records
+    
+    def _iter_sections(self, request: ExportRequest) -> Iterator[Tuple[str, str, List[str], Iterator[Dict[str, Any]]]]:
+        """按请求依次生成 (表标识, 表名, 列, 按时间倒序的数据行)，各表并发读取"""
+        sections = self._get_sections(request)
+        readers = [reader for _, _, _, reader in sections]
+        for (key, title, columns, _), rows in zip(sections, self._iter_concurrently(readers)):
+            yield key, title, columns, rows
+    
+    def _get_sections(
+        self,
+        request: ExportRequest
+    ) -> List[Tuple[str, str, List[str], Callable[[Optional[Any]], Iterator[Dict[str, Any]]]]]:
+        """根据导出请求的开关确定要导出的表：(表标识, 表名, 列, 读取数据行的函数)"""
+        sections = []
+        if request.include_feeding:
+            sections.append(('feeding', '喂养记录', FEEDING_COLUMNS, lambda session: self._iter_feeding_data(
+                request.baby_id, request.start_date, request.end_date, request.since_timestamp, session
+            )))
+        if request.include_sleep:
+            sections.append(('sleep', '睡眠记录', SLEEP_COLUMNS, lambda session: self._iter_described_rows(
+                request, self.health_service.sleep_repo, self._format_sleep_row, session
+            )))
+        if request.include_diaper:
+            sections.append(('diaper', '尿布记录', DIAPER_COLUMNS, lambda session: self._iter_described_rows(
+                request, self.health_service.diaper_repo, self._format_diaper_row, session
+            )))
+        if request.include_growth:
+            growth_repos = [
+                self.health_service.weight_repo,
+                self.health_service.height_repo,
+                self.health_service.head_repo,
+            ]
+            sections.append(('growth', '生长记录', GROWTH_COLUMNS, lambda session: self._iter_repository_rows(
+                request, growth_repos, self._format_growth_row, session
+            )))
+        if request.include_temperature:
+            sections.append(('temperature', '体温记录', TEMPERATURE_COLUMNS, lambda session: self._iter_repository_rows(
+                request, [self.health_service.temp_repo], self._format_temperature_row, session
+            )))
+        return sections
+    
+    def _iter_repository_rows(
+        self,
+        request: ExportRequest,
+        repositories: List[Any],
+        format_row: Callable[[Any], Dict[str, Any]],
+        session: Optional[Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """每个仓储一条范围查询，按时间倒序归并后转换为数据行"""
+        streams = [
+            self._bind_repository(repository, session).iter_by_date_range(
+                request.baby_id, request.start_date, request.end_date,
+                since_timestamp=request.since_timestamp
+            )
+            for repository in repositories
+        ]
+        records = streams[0] if len(streams) == 1 else heapq.merge(
+            *streams, key=lambda record: record.time, reverse=True
+        )
+        for record in records:
+            yield format_row(record)
+    
+    def _iter_described_rows(
+        self,
+        request: ExportRequest,
+        repository: Any,
+        format_row: Callable[[Any, Dict[str, str]], Dict[str, Any]],
+        session: Optional[Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """带类型列的记录表：先读出查找表中的类型名称，再逐行转换（查找表中没有的类型显示类型ID）"""
+        names = self._bind_repository(repository, session).get_desc_names()
+        return self._iter_repository_rows(
+            request, [repository], lambda record: format_row(record, names), session
+        )
+    
+    @staticmethod
+    def _bind_repository(repository: Any, session: Optional[Any]) -> Any:
+        """在指定会话上创建同类型的仓储（会话为 None 时使用共享会话上的仓储）"""
+        return repository if session is None else type(repository)(session)
+    
+    def _iter_concurrently(self, readers: List[Callable[[Optional[Any]], Iterable[Any]]]) -> Iterator[Iterator[Any]]:
+        """
+        依次返回每个读取函数的结果流
+        
+        配置了会话工厂时，各读取函数在后台线程中使用各自的只读会话并发执行，
+        结果通过有界队列分批传回，内存占用与记录总数无关；否则依次在共享会话上执行。
+        调用方需要按顺序读完每个结果流。
+        
+        所有会话的读事务在任何读取函数开始之前依次打开，读取期间提交的写入不会出现在任何表中。
+        各连接的快照仍是先后建立的：恰好在两次打开之间提交的写入只对后打开的表可见，
+        需要严格一致的快照时不配置会话工厂，在共享会话上依次读取。
+        """
+        if self.session_factory is None or len(readers) < 2:
+            for reader in readers:
+                yield self._track_progress(reader(None))
+            return
+        
+        sessions = []
+        try:
+            for _ in readers:
+                sessions.append(self.session_factory())
+                self._begin_snapshot(sessions[-1])
+        except Exception:
+            for session in sessions:
+                session.close()
+            raise
+        
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.section_workers, len(readers)),
+            thread_name_prefix="export-section"
+        )
+        try:
+            queues = []
+            for reader, session in zip(readers, sessions):
+                section_queue = queue.Queue(maxsize=self.section_buffer_batches)
+                executor.submit(self._read_section, reader, session, section_queue, stop)
+                queues.append(section_queue)
+            for section_queue in queues:
+                yield self._track_progress(self._drain_section(section_queue))
+        finally:
+            # 导出中止时让仍在读取的线程退出
+            stop.set()
+            executor.shutdown(wait=True)
+            # 未提交给线程的会话（如提交时出错）在这里关闭
+            for session in sessions[len(queues):]:
+                session.close()
+    
+    @staticmethod
+    def _begin_snapshot(session: Any) -> None:
+        """在会话上开始读事务，使其读取的数据固定为此刻已提交的内容"""
+        connection = session.connection()
+        if connection.dialect.name == 'sqlite':
+            # pysqlite 不会为 SELECT 开启事务；WAL 的读快照在事务内第一次读取数据库时建立
+            connection.exec_driver_sql("BEGIN")
+            connection.exec_driver_sql("SELECT count(*) FROM sqlite_master").close()
+    
+    def _read_section(
+        self,
+        reader: Callable[[Optional[Any]], Iterable[Any]],
+        session: Any,
+        section_queue: queue.Queue,
+        stop: threading.Event
+    ) -> None:
+        """在后台线程中用独立会话读取一个表，并分批放入队列，读完后关闭会话"""
+        try:
+            batch = []
+            for item in reader(session):
+                batch.append(item)
+                if len(batch) >= self.section_batch_rows:
+                    if not self._put_section_item(section_queue, batch, stop):
+                        return
+                    batch = []
+            if batch and not self._put_section_item(section_queue, batch, stop):
+                return
+            self._put_section_item(section_queue, _SECTION_END, stop)
+        except Exception as e:
+            self._put_section_item(section_queue, e, stop)
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _put_section_item(section_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """向队列放入一项，导出中止时返回 False"""
+        while not stop.is_set():
+            try:
+                section_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    @staticmethod
+    def _drain_section(section_queue: queue.Queue) -> Iterator[Any]:
+        """从队列中逐条取出后台线程读取的记录，并重新抛出读取时的异常"""
+        while True:
+            item = section_queue.get()
+            if item is _SECTION_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+    
+    @staticmethod
+    def _peek_rows(rows: Iterator[Any]) -> Optional[Iterator[Any]]:
+        """没有数据时返回 None，否则返回包含第一行的完整数据流"""
+        first = next(rows, None)
+        if first is None:
+            return None
+        return itertools.chain([first], rows)
+    
+    def _track_progress(self, records: Iterable[Any]) -> Iterator[Any]:
+        """统计已读取的记录行数，并按间隔调用进度回调"""
+        for record in records:
+            yield record
+            self._rows_written += 1
+            if self._progress_callback and self._rows_written % self.progress_interval == 0:
+                self._progress_callback(self._rows_written)
+    
+    def _get_event_sources(self, request: ExportRequest) -> List[Tuple[str, type, Any]]:
+        """根据导出请求的开关确定要导出的记录类型及其仓储"""
+        sources = []
+        if request.include_feeding:
+            sources.extend([
+                ('nursing', NursingDTO, self.feeding_service.nursing_repository),
+                ('formula', FormulaDTO, self.feeding_service.formula_repository),
+            ])
+        if request.include_sleep:
+            sources.append(('sleep', SleepDTO, self.health_service.sleep_repo))
+        if request.include_diaper:
+            sources.append(('diaper', DiaperDTO, self.health_service.diaper_repo))
+        if request.include_growth:
+            sources.extend([
+                ('weight', WeightDTO, self.health_service.weight_repo),
+                ('height', HeightDTO, self.health_service.height_repo),
+                ('head', HeadDTO, self.health_service.head_repo),
+            ])
+        if request.include_temperature:
+            sources.append(('temperature', TemperatureDTO, self.health_service.temp_repo))
+        if request.include_activity:
+            sources.extend([
+                ('playtime', PlaytimeDTO, self.activity_service.playtime_repo),
+                ('bath', BathDTO, self.activity_service.bath_repo),
+            ])
+        if request.include_photos:
+            sources.extend([
+                ('photo', PhotoDTO, self.activity_service.photo_repo),
+                ('video', VideoDTO, self.activity_service.video_repo),
+            ])
+        return sources
     
     def _export_to_pdf(self, request: ExportRequest, baby: BabyDTO) -> ExportResult:
-        """导出为PDF格式"""
+        """导出为PDF格式（明细按日或按周分组，逐块生成带重复表头的 LongTable）"""
         try:
             import reportlab
             from reportlab.lib import colors
@@ -209,6 +900,7 @@ class ExportService:
             
             # PDF文件路径
             file_path = os.path.join(self.export_dir, f"{request.filename}.pdf")
+            self._detach_output(file_path)
             
             # 创建PDF文档
             doc = SimpleDocTemplate(file_path, pagesize=A4)
@@ -222,15 +914,7 @@ class ExportService:
             elements.append(Spacer(1, 12))
             
             # 添加基本信息表格
-            data = [
-                ["宝宝姓名", baby.name],
-                ["出生日期", datetime.fromtimestamp(baby.dob).strftime('%Y-%m-%d')],
-                ["性别", baby.gender_display],
-                ["年龄(天)", str(baby.age_in_days)],
-                ["年龄(周)", str(baby.age_in_weeks)],
-                ["年龄(月)", str(baby.age_in_months)],
-                ["导出时间范围", f"{request.start_date.strftime('%Y-%m-%d')} 至 {request.end_date.strftime('%Y-%m-%d')}"],
-            ]
+            data = [[name, str(value)] for name, value in self._get_baby_info_rows(request, baby)]
             
             info_table = Table(data, colWidths=[100, 300])
             info_table.setStyle(TableStyle([
@@ -247,49 +931,21 @@ class ExportService:
             
             record_count = 0
             
-            # 添加喂养记录表格
-            if request.include_feeding:
-                feeding_data = self._get_feeding_data(request.baby_id, request.start_date, request.end_date)
-                if feeding_data:
-                    elements.append(Paragraph("喂养记录", styles["Heading2"]))
-                    elements.append(Spacer(1, 10))
-                    
-                    # 转换数据为表格格式
-                    table_data = [["日期", "时间", "类型", "详情", "备注"]]
-                    for item in feeding_data:
-                        if item.get('喂养类型') == '母乳':
-                            details = f"左侧: {item.get('左侧时长(分钟)', 0)}分钟, 右侧: {item.get('右侧时长(分钟)', 0)}分钟"
-                        else:
-                            details = f"{item.get('数量(毫升)', 0)}毫升"
-                        
-                        table_data.append([
-                            item.get('日期', ''),
-                            item.get('时间', ''),
-                            item.get('喂养类型', ''),
-                            details,
-                            item.get('备注', '')
-                        ])
-                    
-                    feeding_table = Table(table_data, colWidths=[60, 50, 50, 120, 150])
-                    feeding_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ]))
-                    elements.append(feeding_table)
-                    elements.append(Spacer(1, 20))
-                    
-                    record_count += len(feeding_data)
-            
-            # TODO: 添加其他记录表格（睡眠、尿布、生长发育等）
-            # 这里需要健康相关的仓储和服务来获取数据
+            # 添加各记录表格
+            for key, title, columns, rows in self._iter_sections(request):
+                section_elements, section_count = self._build_pdf_section_elements(
+                    request, styles, key, title, columns, rows
+                )
+                elements.extend(section_elements)
+                record_count += section_count
             
             # 构建PDF文档
-            doc.build(elements)
+            try:
+                doc.build(elements)
+            except Exception:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
             
             # 获取文件大小
             file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
@@ -308,46 +964,251 @@ class ExportService:
                 error_message="导出PDF需要安装reportlab库。请使用命令: pip install reportlab"
             )
     
-    def _get_feeding_data(self, baby_id: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """获取喂养数据"""
-        # 获取喂养记录
-        nursing_records = self.feeding_service.get_nursing_records_by_date(
-            baby_id, start_date, end_date
-        )
-        formula_records = self.feeding_service.get_formula_records_by_date(
-            baby_id, start_date, end_date
+    def _build_pdf_section_elements(
+        self,
+        request: ExportRequest,
+        styles,
+        key: str,
+        title: str,
+        columns: List[str],
+        rows: Iterable[Dict[str, Any]]
+    ) -> Tuple[List[Any], int]:
+        """
+        流式生成一个记录表的PDF元素，返回 (元素列表, 记录数)
+        
+        记录按日（导出范围较长时按周）分组，每组的明细拆分为不超过 pdf_table_chunk_rows 行的
+        LongTable，使排版耗时与记录数成线性关系。明细超过 pdf_max_detail_rows 行后不再输出，
+        但仍会计入末尾的分组汇总表。
+        """
+        from reportlab.platypus import Paragraph, Spacer
+        
+        if key == 'feeding':
+            detail_columns = ["日期", "时间", "类型", "详情", "备注"]
+            col_widths = [60, 50, 50, 120, 150]
+            format_row = self._format_pdf_feeding_row
+            summary_columns = ["母乳时长(分钟)", "配方奶(毫升)"]
+        else:
+            detail_columns = columns
+            col_widths = [430 // len(columns)] * len(columns)
+            format_row = lambda item: [item.get(column, '') for column in columns]
+            summary_columns = []
+        
+        group_by_week = (request.end_date - request.start_date).days > self.pdf_week_grouping_days
+        elements: List[Any] = []
+        chunk: List[List[Any]] = []
+        # 分组名称 -> [记录数, 附加统计...]，按出现顺序（时间倒序）排列
+        summaries: Dict[str, List[Any]] = {}
+        current_group = None
+        detail_rows = 0
+        row_count = 0
+        
+        def flush_chunk():
+            if chunk:
+                elements.append(self._build_pdf_table(detail_columns, chunk, col_widths))
+                chunk.clear()
+        
+        for item in rows:
+            group = self._get_pdf_group_label(item['日期'], group_by_week)
+            if group != current_group:
+                flush_chunk()
+                current_group = group
+                summaries[group] = [0] * (1 + len(summary_columns))
+                if detail_rows < self.pdf_max_detail_rows:
+                    elements.append(Spacer(1, 6))
+                    elements.append(Paragraph(group, styles["Heading3"]))
+            
+            summary = summaries[group]
+            summary[0] += 1
+            if key == 'feeding':
+                if item.get('喂养类型') == '母乳':
+                    summary[1] += item.get('总时长(分钟)') or 0
+                else:
+                    summary[2] += item.get('数量(毫升)') or 0
+            row_count += 1
+            
+            if detail_rows < self.pdf_max_detail_rows:
+                chunk.append(format_row(item))
+                detail_rows += 1
+                if len(chunk) >= self.pdf_table_chunk_rows:
+                    flush_chunk()
+        flush_chunk()
+        
+        if not row_count:
+            return [], 0
+        
+        header = [Paragraph(title, styles["Heading2"]), Spacer(1, 10)]
+        if row_count > detail_rows:
+            header.append(Paragraph(
+                f"共{row_count}条记录，超过{self.pdf_max_detail_rows}条的明细已省略，完整统计见末尾的汇总表。",
+                styles["Normal"]
+            ))
+        
+        # 分组汇总表
+        elements.append(Spacer(1, 12))
+        elements.append(Paragraph(f"{title}汇总（{'按周' if group_by_week else '按日'}）", styles["Heading3"]))
+        summary_rows = [
+            [group] + [f"{value:.0f}" if isinstance(value, float) else value for value in summary]
+            for group, summary in summaries.items()
+        ]
+        summary_widths = [150] + [100] * (1 + len(summary_columns))
+        for start in range(0, len(summary_rows), self.pdf_table_chunk_rows):
+            elements.append(self._build_pdf_table(
+                ["日期", "次数"] + summary_columns,
+                summary_rows[start:start + self.pdf_table_chunk_rows],
+                summary_widths
+            ))
+        elements.append(Spacer(1, 20))
+        
+        return header + elements, row_count
+    
+    @staticmethod
+    def _format_pdf_feeding_row(item: Dict[str, Any]) -> List[Any]:
+        """PDF中喂养记录的一行：两种喂养类型的详情合并为一列"""
+        if item.get('喂养类型') == '母乳':
+            details = f"左侧: {item.get('左侧时长(分钟)', 0)}分钟, 右侧: {item.get('右侧时长(分钟)', 0)}分钟"
+        else:
+            details = f"{item.get('数量(毫升)', 0)}毫升"
+        return [
+            item.get('日期', ''),
+            item.get('时间', ''),
+            item.get('喂养类型', ''),
+            details,
+            item.get('备注', '')
+        ]
+    
+    def _build_pdf_table(self, columns: List[str], rows: List[List[Any]], col_widths: List[int]):
+        """创建一个分页时重复表头的 LongTable"""
+        from reportlab.lib import colors
+        from reportlab.platypus import LongTable, TableStyle
+        
+        table = LongTable([columns] + rows, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        return table
+    
+    @staticmethod
+    def _get_pdf_group_label(date_text: str, group_by_week: bool) -> str:
+        """PDF明细的分组名称：日期，或 ISO 周及其起止日期"""
+        if not group_by_week:
+            return date_text
+        day = datetime.strptime(date_text, '%Y-%m-%d')
+        week_start = day - timedelta(days=day.weekday())
+        week_end = week_start + timedelta(days=6)
+        year, week, _ = day.isocalendar()
+        return f"{year}年第{week}周 ({week_start.strftime('%m-%d')} 至 {week_end.strftime('%m-%d')})"
+    
+    def _get_baby_info_rows(self, request: ExportRequest, baby: BabyDTO) -> List[Tuple[str, Any]]:
+        """宝宝基本信息（名称, 值）"""
+        return [
+            ("宝宝姓名", baby.name),
+            ("出生日期", datetime.fromtimestamp(baby.dob).strftime('%Y-%m-%d')),
+            ("性别", baby.gender_display),
+            ("年龄(天)", baby.age_in_days),
+            ("年龄(周)", baby.age_in_weeks),
+            ("年龄(月)", baby.age_in_months),
+            ("导出时间范围", f"{request.start_date.strftime('%Y-%m-%d')} 至 {request.end_date.strftime('%Y-%m-%d')}"),
+        ]
+    
+    def _iter_feeding_data(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        since_timestamp: Optional[float] = None,
+        session: Optional[Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """按时间倒序流式生成喂养数据行（指定会话时在该会话上读取）"""
+        feeding_service = self.feeding_service if session is None else FeedingService(session)
+        records = feeding_service.iter_feeding_records_by_date(
+            baby_id, start_date, end_date, since_timestamp=since_timestamp
         )
         
         # 转换为统一格式
-        nursing_data = []
-        for record in nursing_records:
-            nursing_data.append({
-                '日期': datetime.fromtimestamp(record.time).strftime('%Y-%m-%d'),
-                '时间': datetime.fromtimestamp(record.time).strftime('%H:%M'),
-                '喂养类型': '母乳',
-                '左侧时长(分钟)': record.left_duration,
-                '右侧时长(分钟)': record.right_duration,
-                '两侧时长(分钟)': record.both_duration,
-                '总时长(分钟)': record.total_duration,
-                '结束侧': record.finish_side_display,
-                '备注': record.note or ''
-            })
-        
-        formula_data = []
-        for record in formula_records:
-            formula_data.append({
-                '日期': datetime.fromtimestamp(record.time).strftime('%Y-%m-%d'),
-                '时间': datetime.fromtimestamp(record.time).strftime('%H:%M'),
-                '喂养类型': '配方奶',
-                '数量(毫升)': record.amount,
-                '备注': record.note or ''
-            })
-        
-        # 合并数据并按时间排序
-        all_data = nursing_data + formula_data
-        all_data.sort(key=lambda x: x['日期'] + ' ' + x['时间'], reverse=True)
-        
-        return all_data
+        for record in records:
+            feeding_time = datetime.fromtimestamp(record.time)
+            if isinstance(record, NursingDTO):
+                yield {
+                    '日期': feeding_time.strftime('%Y-%m-%d'),
+                    '时间': feeding_time.strftime('%H:%M'),
+                    '喂养类型': '母乳',
+                    '左侧时长(分钟)': record.left_duration,
+                    '右侧时长(分钟)': record.right_duration,
+                    '两侧时长(分钟)': record.both_duration,
+                    '总时长(分钟)': record.total_duration,
+                    '结束侧': record.finish_side_display,
+                    '备注': record.note or ''
+                }
+            else:
+                yield {
+                    '日期': feeding_time.strftime('%Y-%m-%d'),
+                    '时间': feeding_time.strftime('%H:%M'),
+                    '喂养类型': '配方奶',
+                    '数量(毫升)': record.amount,
+                    '备注': record.note or ''
+                }
+    
+    @staticmethod
+    def _format_sleep_row(record: SleepDTO, names: Dict[str, str]) -> Dict[str, Any]:
+        """睡眠记录数据行"""
+        sleep_time = datetime.fromtimestamp(record.time)
+        return {
+            '日期': sleep_time.strftime('%Y-%m-%d'),
+            '开始时间': sleep_time.strftime('%H:%M'),
+            '类型': names.get(record.desc_id, record.desc_id or ''),
+            '时长(分钟)': record.duration,
+            '时长(小时)': round(record.duration_hours, 1),
+            '备注': record.note or ''
+        }
+    
+    @staticmethod
+    def _format_diaper_row(record: DiaperDTO, names: Dict[str, str]) -> Dict[str, Any]:
+        """尿布记录数据行"""
+        change_time = datetime.fromtimestamp(record.time)
+        return {
+            '日期': change_time.strftime('%Y-%m-%d'),
+            '时间': change_time.strftime('%H:%M'),
+            '类型': names.get(record.desc_id, record.desc_id or ''),
+            '备注': record.note or ''
+        }
+    
+    @staticmethod
+    def _format_growth_row(record: Any) -> Dict[str, Any]:
+        """生长记录数据行（体重、身高、头围合并为一个表）"""
+        measurement_time = datetime.fromtimestamp(record.time)
+        if isinstance(record, WeightDTO):
+            item, value, unit = '体重', record.weight_kg, '公斤'
+        elif isinstance(record, HeightDTO):
+            item, value, unit = '身高', record.height, '厘米'
+        else:
+            item, value, unit = '头围', record.head, '厘米'
+        return {
+            '日期': measurement_time.strftime('%Y-%m-%d'),
+            '时间': measurement_time.strftime('%H:%M'),
+            '测量项目': item,
+            '数值': value,
+            '单位': unit,
+            '备注': record.note or ''
+        }
+    
+    @staticmethod
+    def _format_temperature_row(record: TemperatureDTO) -> Dict[str, Any]:
+        """体温记录数据行"""
+        measurement_time = datetime.fromtimestamp(record.time)
+        return {
+            '日期': measurement_time.strftime('%Y-%m-%d'),
+            '时间': measurement_time.strftime('%H:%M'),
+            '体温(°C)': record.temperature,
+            '测量位置': record.location or '',
+            '状态': record.temperature_status,
+            '备注': record.note or ''
+        }
     
     def close(self):
         """关闭服务"""
@@ -0,0 +1,175 @@
+"""
+喂养节律 - 按一天中的时段增量维护喂养间隔的指数加权均值和方差
+
+每写入一条喂养记录，只更新上一次喂养所在时段的一行统计（O(1)），
+预测下一次喂养时间时也只读取该宝宝的几行统计，不需要扫描历史记录。
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import uuid
+from baby_tracker.models.dto import FeedingCadenceDTO
+
+
+# 一天按本地时间划分为 24 / BUCKET_HOURS 个时段
+BUCKET_HOURS = 4
+BUCKET_COUNT = 24 // BUCKET_HOURS
+
+# 指数加权的平滑系数（越大越偏重最近的间隔）
+SMOOTHING = 0.3
+
+# 相隔不足该时长的记录视为同一次喂养（如亲喂后补奶）
+MIN_INTERVAL_MINUTES = 30
+
+# 超过该时长的间隔视为漏记，不计入统计
+MAX_INTERVAL_HOURS = 12
+
+# 时段内的间隔数少于该值时，改用全天汇总的统计预测
+MIN_BUCKET_SAMPLES = 3
+
+
+@dataclass
+class NextFeedPrediction:
+    """下一次喂养时间预测"""
+    last_feed_at: datetime
+    expected_at: datetime
+    interval_minutes: float  # 预计的喂养间隔
+    spread_minutes: float  # 喂养间隔的标准差
+    sample_count: int  # 预测所依据的间隔数
+    bucket: int  # 上一次喂养所在的时段
+    pooled: bool = False  # 是否使用了全天汇总的统计
+    
+    @property
+    def earliest_at(self) -> datetime:
+        """预计最早的喂养时间（均值减一个标准差）"""
+        return self.expected_at - timedelta(minutes=self.spread_minutes)
+    
+    @property
+    def latest_at(self) -> datetime:
+        """预计最晚的喂养时间（均值加一个标准差）"""
+        return self.expected_at + timedelta(minutes=self.spread_minutes)
+
+
+def bucket_of(time: float) -> int:
+    """Unix 时间戳所在的时段序号（本地时间）"""
+    return datetime.fromtimestamp(time).hour // BUCKET_HOURS
+
+
+def observe_feed(
+    cadences: List[FeedingCadenceDTO],
+    baby_id: str,
+    feed_time: float,
+    smoothing: float = SMOOTHING
+) -> List[FeedingCadenceDTO]:
+    """
+    把一次新的喂养计入宝宝的喂养节律，返回需要保存的时段统计
+    
+    间隔计入上一次喂养所在的时段。早于已知最近一次喂养的补录记录不会改变统计；
+    前几个间隔的权重取 max(平滑系数, 1/样本数)，统计在样本少时近似算术平均。
+    """
+    by_bucket: Dict[int, FeedingCadenceDTO] = {cadence.bucket: cadence for cadence in cadences}
+    last = max(
+        (cadence for cadence in cadences if cadence.last_feed_time is not None),
+        key=lambda cadence: cadence.last_feed_time,
+        default=None
+    )
+    now = datetime.now().timestamp()
+    
+    if last is not None:
+        interval = feed_time - last.last_feed_time
+        if interval < MIN_INTERVAL_MINUTES * 60:
+            return []
+        
+        if interval <= MAX_INTERVAL_HOURS * 3600:
+            last.count += 1
+            weight = max(smoothing, 1.0 / last.count)
+            diff = interval - last.mean
+            increment = weight * diff
+            last.mean += increment
+            last.variance = (1 - weight) * (last.variance + diff * increment)
+            last.timestamp = now
+    
+    bucket = bucket_of(feed_time)
+    current = by_bucket.get(bucket)
+    if current is None:
+        current = FeedingCadenceDTO(id=str(uuid.uuid4()), baby_id=baby_id, bucket=bucket)
+    current.last_feed_time = feed_time
+    current.timestamp = now
+    
+    changed = [current]
+    if last is not None and last is not current:
+        changed.append(last)
+    return changed
+
+
+def replay_feeds(baby_id: str, feed_times: Iterable[float]) -> List[FeedingCadenceDTO]:
+    """按时间升序重放一组喂养时间，得到从零开始的各时段统计（用于回填历史记录）"""
+    by_bucket: Dict[int, FeedingCadenceDTO] = {}
+    for feed_time in feed_times:
+        for cadence in observe_feed(list(by_bucket.values()), baby_id, feed_time):
+            by_bucket[cadence.bucket] = cadence
+    return sorted(by_bucket.values(), key=lambda cadence: cadence.bucket)
+
+
+def refresh_last_feeds(
+    cadences: List[FeedingCadenceDTO],
+    baby_id: str,
+    latest_by_bucket: Dict[int, float]
+) -> List[FeedingCadenceDTO]:
+    """
+    喂养记录被修改或删除后，按各时段实际最近一次喂养的时间更新统计，返回需要保存的时段
+    
+    间隔的加权均值和方差保持不变；没有喂养记录的时段最近喂养时间为 None。
+    """
+    by_bucket: Dict[int, FeedingCadenceDTO] = {cadence.bucket: cadence for cadence in cadences}
+    now = datetime.now().timestamp()
+    changed = []
+    for bucket in sorted(set(by_bucket) | set(latest_by_bucket)):
+        cadence = by_bucket.get(bucket)
+        if cadence is None:
+            cadence = FeedingCadenceDTO(id=str(uuid.uuid4()), baby_id=baby_id, bucket=bucket)
+        elif cadence.last_feed_time == latest_by_bucket.get(bucket):
+            continue
+        cadence.last_feed_time = latest_by_bucket.get(bucket)
+        cadence.timestamp = now
+        changed.append(cadence)
+    return changed
+
+
+def predict_next_feed(cadences: List[FeedingCadenceDTO]) -> Optional[NextFeedPrediction]:
+    """
+    根据最近一次喂养所在时段的统计预测下一次喂养时间
+    
+    该时段的间隔数不足 MIN_BUCKET_SAMPLES 时，按样本数合并全天各时段的均值和方差。
+    没有任何间隔统计时返回 None。
+    """
+    last = max(
+        (cadence for cadence in cadences if cadence.last_feed_time is not None),
+        key=lambda cadence: cadence.last_feed_time,
+        default=None
+    )
+    if last is None:
+        return None
+    
+    if last.count >= MIN_BUCKET_SAMPLES:
+        mean, variance, count, pooled = last.mean, last.variance, last.count, False
+    else:
+        count = sum(cadence.count for cadence in cadences)
+        if count == 0:
+            return None
+        mean = sum(cadence.count * cadence.mean for cadence in cadences) / count
+        variance = sum(
+            cadence.count * (cadence.variance + (cadence.mean - mean) ** 2) for cadence in cadences
+        ) / count
+        pooled = True
+    
+    last_feed_at = datetime.fromtimestamp(last.last_feed_time)
+    return NextFeedPrediction(
+        last_feed_at=last_feed_at,
+        expected_at=last_feed_at + timedelta(seconds=mean),
+        interval_minutes=mean / 60,
+        spread_minutes=max(variance, 0.0) ** 0.5 / 60,
+        sample_count=count,
+        bucket=last.bucket,
+        pooled=pooled
+    )
@@ -0,0 +1,184 @@
+"""
+喂养热力图 - 按周保存 星期 × 小时 的喂养次数和数量矩阵
+
+每条喂养记录写入、修改或删除时只对所在周的一行做加减（O(1)），
+查询任意日期范围时把范围内各周的矩阵一次性读出，用 NumPy 掩码后求和。
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import uuid
+import numpy as np
+from baby_tracker.models.dto import FeedingHeatmapDTO
+from baby_tracker.repositories.feeding_repository import FeedingHeatmapRepository
+
+
+WEEKDAYS = 7
+HOURS = 24
+WEEKDAY_LABELS = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 矩阵的存储格式（小端序，便于跨平台读取）
+COUNT_DTYPE = np.dtype('<i4')
+AMOUNT_DTYPE = np.dtype('<f8')
+
+# 喂养类型 -> 数量（母乳为分钟，配方奶为毫升）
+FEED_AMOUNTS = {
+    'nursing': lambda record: record.total_duration,
+    'formula': lambda record: record.amount,
+}
+
+
+def week_start_of(time: float) -> str:
+    """Unix 时间戳所在周的周一（本地日期）"""
+    moment = datetime.fromtimestamp(time)
+    return (moment.date() - timedelta(days=moment.weekday())).isoformat()
+
+
+@dataclass
+class FeedingHeatmap:
+    """星期 × 小时 的喂养热力图（行为周一到周日，列为 0-23 时）"""
+    counts: np.ndarray
+    amounts: np.ndarray
+    
+    @property
+    def hourly_counts(self) -> np.ndarray:
+        """按小时合计的喂养次数"""
+        return self.counts.sum(axis=0)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为图表用的字典"""
+        return {
+            'weekdays': list(WEEKDAY_LABELS),
+            'hours': [f"{hour:02d}:00" for hour in range(HOURS)],
+            'counts': self.counts.astype(int).tolist(),
+            'amounts': self.amounts.round(1).tolist(),
+        }
+
+
+class FeedingHeatmapStore:
+    """喂养热力图存储"""
+    
+    def __init__(self, db_session=None):
+        self.repository = FeedingHeatmapRepository(db_session)
+    
+    def add(self, feed_type: str, record: Any, sign: int = 1, commit: bool = True) -> None:
+        """
+        把一条喂养记录计入所在周的矩阵（sign 为 -1 时撤销）
+        
+        读取、修改、写回整周矩阵之间没有加锁：commit 为 False 时由调用方在写入喂养记录的同一事务中提交，
+        SQLite 的写锁从写入记录起一直持有到提交，并发的写入因此依次执行。
+        """
+        week_start = week_start_of(record.time)
+        dto = self.repository.get_week(record.baby_id, feed_type, week_start)
+        if dto is None:
+            if sign < 0:
+                return
+            dto = FeedingHeatmapDTO(
+                id=str(uuid.uuid4()),
+                baby_id=record.baby_id,
+                feed_type=feed_type,
+                week_start=week_start
+            )
+            counts = np.zeros((WEEKDAYS, HOURS), dtype=COUNT_DTYPE)
+            amounts = np.zeros((WEEKDAYS, HOURS), dtype=AMOUNT_DTYPE)
+        else:
+            counts = np.frombuffer(dto.counts, dtype=COUNT_DTYPE).reshape(WEEKDAYS, HOURS).copy()
+            amounts = np.frombuffer(dto.amounts, dtype=AMOUNT_DTYPE).reshape(WEEKDAYS, HOURS).copy()
+        
+        moment = datetime.fromtimestamp(record.time)
+        counts[moment.weekday(), moment.hour] += sign
+        amounts[moment.weekday(), moment.hour] += sign * (FEED_AMOUNTS[feed_type](record) or 0)
+        
+        dto.counts = counts.tobytes()
+        dto.amounts = amounts.tobytes()
+        dto.timestamp = datetime.now().timestamp()
+        self.repository.save(dto, commit=commit)
+    
+    def remove(self, feed_type: str, record: Any, commit: bool = True) -> None:
+        """从所在周的矩阵中撤销一条喂养记录"""
+        self.add(feed_type, record, sign=-1, commit=commit)
+    
+    def rebuild(
+        self,
+        feed_type: str,
+        baby_id: str,
+        totals: Iterable[Tuple[str, int, int, int, float]],
+        weeks: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        用按 (周一, 星期, 小时) 分组的记录数和数量重建热力图
+        
+        指定 weeks 时只替换这些周（没有记录的周被删除），否则替换该宝宝该喂养类型的全部周。
+        """
+        matrices: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for week_start, weekday, hour, count, amount in totals:
+            if week_start not in matrices:
+                matrices[week_start] = (
+                    np.zeros((WEEKDAYS, HOURS), dtype=COUNT_DTYPE),
+                    np.zeros((WEEKDAYS, HOURS), dtype=AMOUNT_DTYPE)
+                )
+            counts, amounts = matrices[week_start]
+            counts[weekday, hour] = count
+            amounts[weekday, hour] = amount
+        
+        now = datetime.now().timestamp()
+        self.repository.replace_weeks(
+            baby_id,
+            feed_type,
+            list(weeks) if weeks is not None else None,
+            [
+                FeedingHeatmapDTO(
+                    id=str(uuid.uuid4()),
+                    baby_id=baby_id,
+                    feed_type=feed_type,
+                    week_start=week_start,
+                    counts=counts.tobytes(),
+                    amounts=amounts.tobytes(),
+                    timestamp=now
+                )
+                for week_start, (counts, amounts) in sorted(matrices.items())
+            ]
+        )
+    
+    def get_heatmap(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        feed_types: Optional[List[str]] = None
+    ) -> FeedingHeatmap:
+        """
+        合计日期范围内（按本地日期，含两端）的热力图
+        
+        只读取范围内各周的矩阵；首末两周中不在范围内的日期按星期行掩码排除。
+        """
+        rows = self.repository.find_by_week_range(
+            baby_id,
+            feed_types or list(FEED_AMOUNTS),
+            week_start_of(start_date.timestamp()),
+            week_start_of(end_date.timestamp())
+        )
+        if not rows:
+            return FeedingHeatmap(
+                counts=np.zeros((WEEKDAYS, HOURS), dtype=np.int64),
+                amounts=np.zeros((WEEKDAYS, HOURS))
+            )
+        
+        counts = np.frombuffer(b''.join(row.counts for row in rows), dtype=COUNT_DTYPE)
+        amounts = np.frombuffer(b''.join(row.amounts for row in rows), dtype=AMOUNT_DTYPE)
+        counts = counts.reshape(len(rows), WEEKDAYS, HOURS)
+        amounts = amounts.reshape(len(rows), WEEKDAYS, HOURS)
+        
+        # 每行每个星期对应的日期序数，只保留范围内的日期
+        week_ordinals = np.array([date.fromisoformat(row.week_start).toordinal() for row in rows])
+        day_ordinals = week_ordinals[:, None] + np.arange(WEEKDAYS)
+        mask = (day_ordinals >= start_date.toordinal()) & (day_ordinals <= end_date.toordinal())
+        
+        return FeedingHeatmap(
+            counts=(counts * mask[:, :, None]).sum(axis=0, dtype=np.int64),
+            amounts=(amounts * mask[:, :, None]).sum(axis=0)
+        )
+    
+    def close(self):
+        """关闭数据库会话"""
+        self.repository.close()
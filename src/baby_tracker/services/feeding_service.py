@@ -1,24 +1,43 @@
 """
 喂养服务层 - 使用 dataclasses DTO
 """
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import List, Optional, Dict, Any, Iterator, Union
 from datetime import datetime, timedelta
+import heapq
 import uuid
 from baby_tracker.models.dto import (
     NursingDTO, FormulaDTO, FeedingStatsDTO, FinishSide
 )
 from baby_tracker.repositories.feeding_repository import (
-    NursingRepository, FormulaRepository, FeedingStatsRepository
+    NursingRepository, FormulaRepository, FeedingStatsRepository, FeedingCadenceRepository
 )
+from baby_tracker.services.aggregators import EventAggregator, period_of
+from baby_tracker.services.feeding_cadence import (
+    BUCKET_HOURS, NextFeedPrediction, observe_feed, predict_next_feed, refresh_last_feeds
+)
+from baby_tracker.services.feeding_heatmap import FeedingHeatmap, FeedingHeatmapStore
 
 
 class FeedingService:
-    """喂养服务"""
+    """
+    喂养服务
+    
+    写入喂养记录时，喂养节律、事件聚合和热力图在同一事务中更新，任何一步失败都整体回滚；
+    派生表因其他原因与喂养记录不一致时，由 tools/rebuild_derived_data.py 按原始记录重建。
+    """
     
     def __init__(self, db_session=None):
-        self.nursing_repository = NursingRepository(db_session)
-        self.formula_repository = FormulaRepository(db_session)
-        self.feeding_stats_repository = FeedingStatsRepository(db_session)
+        from baby_tracker.database import get_db
+        # 各仓储共用一个会话，记录和派生数据才能在同一事务中提交
+        self.db_session = db_session or next(get_db())
+        self.nursing_repository = NursingRepository(self.db_session)
+        self.formula_repository = FormulaRepository(self.db_session)
+        self.feeding_stats_repository = FeedingStatsRepository(self.db_session)
+        self.feeding_cadence_repository = FeedingCadenceRepository(self.db_session)
+        self.aggregator = EventAggregator(self.db_session)
+        self.heatmap_store = FeedingHeatmapStore(self.db_session)
     
     # ==================== 母乳喂养相关 ====================
     
@@ -45,7 +64,10 @@ class FeedingService:
             timestamp=datetime.now().timestamp()
         )
         
-        return self.nursing_repository.create(nursing_dto)
+        with self._transaction():
+            nursing_dto = self.nursing_repository.create(nursing_dto, commit=False)
+            self._record_added('nursing', nursing_dto)
+        return nursing_dto
     
     def complete_nursing_session(
         self,
@@ -60,6 +82,7 @@ class FeedingService:
         session = self.nursing_repository.get_by_id(session_id)
         if not session:
             return None
+        previous = replace(session)
         
         # 更新喂养信息
         session.finish_side = finish_side
@@ -70,7 +93,10 @@ class FeedingService:
             session.note = note
         session.timestamp = datetime.now().timestamp()
         
-        return self.nursing_repository.update(session_id, session)
+        with self._transaction():
+            session = self.nursing_repository.update(session_id, session, commit=False)
+            self._record_changed('nursing', previous, session)
+        return session
     
     def add_nursing_record(
         self,
@@ -98,7 +124,10 @@ class FeedingService:
             timestamp=datetime.now().timestamp()
         )
         
-        return self.nursing_repository.create(nursing_dto)
+        with self._transaction():
+            nursing_dto = self.nursing_repository.create(nursing_dto, commit=False)
+            self._record_added('nursing', nursing_dto)
+        return nursing_dto
     
     def get_nursing_records(
         self, 
@@ -143,7 +172,10 @@ class FeedingService:
             timestamp=datetime.now().timestamp()
         )
         
-        return self.formula_repository.create(formula_dto)
+        with self._transaction():
+            formula_dto = self.formula_repository.create(formula_dto, commit=False)
+            self._record_added('formula', formula_dto)
+        return formula_dto
     
     def get_formula_records(
         self,
@@ -166,6 +198,25 @@ class FeedingService:
         """获取指定日期的配方奶总量"""
         return self.formula_repository.get_daily_total_amount(baby_id, date)
     
+    def iter_feeding_records_by_date(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        since_timestamp: Optional[float] = None
+    ) -> Iterator[Union[NursingDTO, FormulaDTO]]:
+        """按时间倒序流式获取母乳和配方奶记录（两路有序游标归并），可只取某时间后修改的记录"""
+        return heapq.merge(
+            self.nursing_repository.iter_by_date_range(
+                baby_id, start_date, end_date, since_timestamp=since_timestamp
+            ),
+            self.formula_repository.iter_by_date_range(
+                baby_id, start_date, end_date, since_timestamp=since_timestamp
+            ),
+            key=lambda record: record.time,
+            reverse=True
+        )
+    
     # ==================== 喂养统计相关 ====================
     
     def get_daily_feeding_stats(self, baby_id: str, date: datetime) -> FeedingStatsDTO:
@@ -257,6 +308,41 @@ class FeedingService:
             'hourly_formula_distribution': hourly_formula,
         }
     
+    def get_feeding_heatmap(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        feed_type: Optional[str] = None
+    ) -> FeedingHeatmap:
+        """获取日期范围内 星期 × 小时 的喂养热力图（feed_type 为 nursing/formula，不指定时合计两类）"""
+        return self.heatmap_store.get_heatmap(
+            baby_id, start_date, end_date, [feed_type] if feed_type else None
+        )
+    
+    def get_next_feeding_prediction(self, baby_id: str) -> Optional[NextFeedPrediction]:
+        """预测下一次喂养时间（只读取喂养节律表，不扫描喂养记录）"""
+        return predict_next_feed(self.feeding_cadence_repository.find_by_baby_id(baby_id))
+    
+    def _observe_feed(self, baby_id: str, feed_time: float) -> None:
+        """新增喂养记录后增量更新喂养节律（随记录一起提交）"""
+        cadences = self.feeding_cadence_repository.find_by_baby_id(baby_id)
+        changed = observe_feed(cadences, baby_id, feed_time)
+        if changed:
+            self.feeding_cadence_repository.save_all(changed, commit=False)
+    
+    def _refresh_last_feeds(self, baby_id: str) -> None:
+        """喂养记录修改或删除后，从喂养记录中重新读取各时段最近一次喂养的时间"""
+        latest: Dict[int, float] = {}
+        for repository in (self.nursing_repository, self.formula_repository):
+            for hour, time in repository.get_latest_time_by_hour(baby_id).items():
+                bucket = hour // BUCKET_HOURS
+                latest[bucket] = max(latest.get(bucket, time), time)
+        
+        changed = refresh_last_feeds(self.feeding_cadence_repository.find_by_baby_id(baby_id), baby_id, latest)
+        if changed:
+            self.feeding_cadence_repository.save_all(changed, commit=False)
+    
     def update_feeding_record(
         self,
         record_id: str,
@@ -267,32 +353,93 @@ class FeedingService:
         if record_type == 'nursing':
             record = self.nursing_repository.get_by_id(record_id)
             if record:
+                previous = replace(record)
                 for key, value in kwargs.items():
                     if hasattr(record, key):
                         setattr(record, key, value)
                 record.timestamp = datetime.now().timestamp()
-                return self.nursing_repository.update(record_id, record)
+                with self._transaction():
+                    record = self.nursing_repository.update(record_id, record, commit=False)
+                    self._record_changed('nursing', previous, record)
+                return record
         elif record_type == 'formula':
             record = self.formula_repository.get_by_id(record_id)
             if record:
+                previous = replace(record)
                 for key, value in kwargs.items():
                     if hasattr(record, key):
                         setattr(record, key, value)
                 record.timestamp = datetime.now().timestamp()
-                return self.formula_repository.update(record_id, record)
+                with self._transaction():
+                    record = self.formula_repository.update(record_id, record, commit=False)
+                    self._record_changed('formula', previous, record)
+                return record
         
         return None
     
     def delete_feeding_record(self, record_id: str, record_type: str) -> bool:
         """删除喂养记录"""
         if record_type == 'nursing':
-            return self.nursing_repository.delete(record_id)
+            repository = self.nursing_repository
         elif record_type == 'formula':
-            return self.formula_repository.delete(record_id)
-        return False
+            repository = self.formula_repository
+        else:
+            return False
+        
+        record = repository.get_by_id(record_id)
+        if record is None:
+            return False
+        with self._transaction():
+            if not repository.delete(record_id, commit=False):
+                return False
+            self._record_changed(record_type, record)
+        return True
+    
+    @contextmanager
+    def _transaction(self):
+        """喂养记录与派生数据的写入在退出时一起提交，出错时整体回滚"""
+        try:
+            yield
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+    
+    def _record_added(self, record_type: str, record: Union[NursingDTO, FormulaDTO]) -> None:
+        """在写入记录的事务中增量更新喂养节律、事件聚合和热力图"""
+        self._observe_feed(record.baby_id, record.time)
+        self.aggregator.record(record_type, record, commit=False)
+        self.heatmap_store.add(record_type, record, commit=False)
+    
+    def _record_changed(
+        self,
+        record_type: str,
+        previous: Union[NursingDTO, FormulaDTO],
+        current: Optional[Union[NursingDTO, FormulaDTO]] = None
+    ) -> None:
+        """在修改（current 为修改后的记录）或删除记录的事务中，更新热力图、喂养节律并重建受影响日期的事件聚合"""
+        self.heatmap_store.remove(record_type, previous, commit=False)
+        times = [previous.time]
+        if current is not None:
+            self.heatmap_store.add(record_type, current, commit=False)
+            times.append(current.time)
+        self._rebuild_aggregates(record_type, previous.baby_id, *times)
+        self._refresh_last_feeds(previous.baby_id)
+    
+    def _rebuild_aggregates(self, record_type: str, baby_id: str, *times: float) -> None:
+        """记录修改或删除后，用所在日期的记录重建当日的事件聚合"""
+        repository = self.nursing_repository if record_type == 'nursing' else self.formula_repository
+        for period in sorted({period_of(time) for time in times}):
+            day_start = datetime.strptime(period, '%Y-%m-%d')
+            day_end = day_start.replace(hour=23, minute=59, second=59, microsecond=999999)
+            records = repository.find_by_date_range(baby_id, day_start, day_end)
+            self.aggregator.rebuild(record_type, baby_id, records, periods=[period], commit=False)
     
     def close(self):
         """关闭服务"""
         self.nursing_repository.close()
         self.formula_repository.close()
+        self.feeding_cadence_repository.close()
+        self.aggregator.close()
+        self.heatmap_store.close()
         self.feeding_stats_repository.db_session.close()
@@ -1,23 +1,34 @@
 """
 健康服务 - 提供健康相关的业务逻辑
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 from datetime import datetime, timedelta
 import uuid
+import numpy as np
 from sqlalchemy.orm import Session
 from baby_tracker.models.dto import (
     SleepDTO, DiaperDTO, WeightDTO, HeightDTO, HeadDTO, TemperatureDTO,
-    GrowthStatsDTO
+    GrowthStatsDTO, GrowthVelocityDTO
 )
 from baby_tracker.repositories import (
     SleepRepository, DiaperRepository, WeightRepository,
     HeightRepository, HeadRepository, TemperatureRepository
 )
+from baby_tracker.services.aggregators import EventAggregator
+from baby_tracker.services.sleep_intervals import SleepSummary, summarize_sleep
 
 
 class HealthService:
     """健康服务"""
     
+    # 生长速度的单位换算（每秒 -> 每天 / 每周）与判定趋势变化的最小速度
+    VELOCITY_UNITS = {'weight': 86400, 'height': 86400 * 7, 'head': 86400 * 7}
+    TREND_THRESHOLDS = {
+        'weight': 5.0,  # 克/天
+        'height': 0.1,  # 厘米/周
+        'head': 0.05,  # 厘米/周
+    }
+    
     def __init__(self, db_session: Optional[Session] = None):
         from baby_tracker.database import get_db
         self.db_session = db_session or next(get_db())
@@ -27,6 +38,7 @@ class HealthService:
         self.height_repo = HeightRepository(self.db_session)
         self.head_repo = HeadRepository(self.db_session)
         self.temp_repo = TemperatureRepository(self.db_session)
+        self.aggregator = EventAggregator(self.db_session)
     
     # Sleep 相关方法
     def add_sleep_record(self, baby_id: str, duration: int, desc_id: Optional[str] = None, 
@@ -41,37 +53,42 @@ class HealthService:
             time=time or datetime.now().timestamp()
         )
         
-        return self.sleep_repo.create(sleep_dto)
+        sleep_dto = self.sleep_repo.create(sleep_dto)
+        self.aggregator.record('sleep', sleep_dto)
+        return sleep_dto
     
     def get_sleep_records(self, baby_id: str, limit: Optional[int] = None) -> List[SleepDTO]:
         """获取宝宝的睡眠记录"""
         return self.sleep_repo.find_by_baby_id(baby_id, limit)
     
     def get_sleep_stats(self, baby_id: str, days: int = 7) -> Dict[str, Any]:
-        """获取睡眠统计数据"""
+        """获取睡眠统计数据（重叠记录合并，跨夜睡眠按天拆分）"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 获取日期范围内的所有睡眠记录
-        sleep_records = self.sleep_repo.find_by_date_range(baby_id, start_date, end_date)
-        
-        # 计算每天的睡眠时长
-        daily_sleep = {}
-        for record in sleep_records:
-            day = datetime.fromtimestamp(record.time).strftime('%Y-%m-%d')
-            daily_sleep[day] = daily_sleep.get(day, 0) + record.duration
-        
-        # 计算统计数据
-        total_sleep = sum(daily_sleep.values())
-        avg_sleep = total_sleep / len(daily_sleep) if daily_sleep else 0
+        summary = self.get_sleep_summary(baby_id, start_date, end_date)
         
         return {
-            'daily_sleep': daily_sleep,
-            'total_sleep_minutes': total_sleep,
-            'avg_sleep_minutes': avg_sleep,
-            'record_count': len(sleep_records)
+            'daily_sleep': {day: round(minutes) for day, minutes in summary.daily_minutes.items()},
+            'daily_night_sleep': {day: round(minutes) for day, minutes in summary.daily_night_minutes.items()},
+            'daily_day_sleep': {day: round(minutes) for day, minutes in summary.daily_day_minutes.items()},
+            'total_sleep_minutes': round(summary.total_minutes),
+            'avg_sleep_minutes': summary.average_daily_minutes,
+            'longest_stretch_minutes': round(summary.longest_stretch_minutes),
+            'avg_wake_window_minutes': summary.average_wake_window_minutes,
+            'record_count': summary.record_count
         }
     
+    def get_sleep_summary(self, baby_id: str, start_date: datetime, end_date: datetime) -> SleepSummary:
+        """把期间内的睡眠记录合并为不重叠的时段，并按天、昼夜汇总"""
+        intervals = self.sleep_repo.iter_intervals(baby_id, start_date, end_date)
+        return summarize_sleep(intervals, start_date, end_date)
+    
+    def get_weekly_average_sleep(self, baby_id: str, end_date: datetime) -> float:
+        """获取一周内有睡眠记录的日子平均每天的睡眠时长（小时），跨夜睡眠按天拆分"""
+        start_date = end_date - timedelta(days=7)
+        return self.get_sleep_summary(baby_id, start_date, end_date).average_daily_minutes / 60
+    
     # Diaper 相关方法
     def add_diaper_record(self, baby_id: str, desc_id: Optional[str] = None,
                          note: Optional[str] = None, time: Optional[float] = None) -> DiaperDTO:
@@ -84,7 +101,9 @@ class HealthService:
             time=time or datetime.now().timestamp()
         )
         
-        return self.diaper_repo.create(diaper_dto)
+        diaper_dto = self.diaper_repo.create(diaper_dto)
+        self.aggregator.record('diaper', diaper_dto)
+        return diaper_dto
     
     def get_diaper_records(self, baby_id: str, limit: Optional[int] = None) -> List[DiaperDTO]:
         """获取宝宝的尿布记录"""
@@ -95,23 +114,17 @@ class HealthService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 获取日期范围内的所有尿布记录
-        diaper_records = self.diaper_repo.find_by_date_range(baby_id, start_date, end_date)
-        
-        # 按日期和类型分组
+        # 在 SQL 中按日期和类型分组计数
         daily_diapers = {}
-        for record in diaper_records:
-            day = datetime.fromtimestamp(record.time).strftime('%Y-%m-%d')
-            if day not in daily_diapers:
-                daily_diapers[day] = {'total': 0, 'by_type': {}}
-            
-            daily_diapers[day]['total'] += 1
-            
-            desc_id = record.desc_id or 'unknown'
-            daily_diapers[day]['by_type'][desc_id] = daily_diapers[day]['by_type'].get(desc_id, 0) + 1
+        total_count = 0
+        for day, desc_id, count in self.diaper_repo.get_daily_counts_by_type(baby_id, start_date, end_date):
+            daily = daily_diapers.setdefault(day, {'total': 0, 'by_type': {}})
+            daily['total'] += count
+            desc_id = desc_id or 'unknown'
+            daily['by_type'][desc_id] = daily['by_type'].get(desc_id, 0) + count
+            total_count += count
         
         # 计算统计数据
-        total_count = len(diaper_records)
         avg_daily = total_count / days
         
         return {
@@ -143,14 +156,14 @@ class HealthService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 获取日期范围内的所有体重记录
-        weight_records = self.weight_repo.find_by_date_range(baby_id, start_date, end_date)
+        # 获取日期范围内的所有体重（只查询时间和体重两列，按时间升序）
+        weight_records = self.weight_repo.get_measurements(baby_id, start_date, end_date)
         
         # 构建趋势数据
         trend_data = {}
-        for record in sorted(weight_records, key=lambda r: r.time):
-            day = datetime.fromtimestamp(record.time).strftime('%Y-%m-%d')
-            trend_data[day] = record.weight
+        for time, weight in weight_records:
+            day = datetime.fromtimestamp(time).strftime('%Y-%m-%d')
+            trend_data[day] = weight
         
         # 计算增长情况
         weight_gain = self.weight_repo.calculate_weight_gain(baby_id, days)
@@ -224,7 +237,29 @@ class HealthService:
         """获取发烧历史记录"""
         return self.temp_repo.find_fever_records(baby_id, days)
     
+    def iter_temperature_readings(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Iterator[Tuple[float, float, Optional[str]]]:
+        """按时间升序流式读取 (时间, 体温, 测量位置)"""
+        return self.temp_repo.iter_readings(baby_id, start_date, end_date)
+    
     # 综合健康数据
+    def get_growth_measurements(
+        self,
+        baby_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, List[Tuple[float, float]]]:
+        """获取体重（克）、身高和头围（厘米）的 (时间, 测量值) 序列，按时间升序"""
+        return {
+            'weight': self.weight_repo.get_measurements(baby_id, start_date, end_date),
+            'height': self.height_repo.get_measurements(baby_id, start_date, end_date),
+            'head': self.head_repo.get_measurements(baby_id, start_date, end_date),
+        }
+    
     def get_growth_stats(self, baby_id: str) -> GrowthStatsDTO:
         """获取成长统计数据"""
         # 获取最新的身高、体重和头围记录
@@ -232,22 +267,85 @@ class HealthService:
         latest_height = self.height_repo.get_latest_height(baby_id)
         latest_head = self.head_repo.get_latest_head(baby_id)
         
-        # 确定趋势（需要查询更多记录来确定）
-        weight_trend = "stable"  # 默认
-        if latest_weight:
-            weight_gain = self.weight_repo.calculate_weight_gain(baby_id, 30)
-            if weight_gain > 500:  # 一个月增长500g以上
-                weight_trend = "increasing"
-            elif weight_gain < 0:
-                weight_trend = "decreasing"
-        
-        height_trend = "stable"  # 默认
+        # 根据过去30天测量值的回归斜率确定趋势
+        velocity = self.get_growth_velocity(baby_id, 30)
         
         return GrowthStatsDTO(
             baby_id=baby_id,
             latest_weight=latest_weight.weight if latest_weight else None,
             latest_height=latest_height.height if latest_height else None,
             latest_head=latest_head.head if latest_head else None,
-            weight_trend=weight_trend,
-            height_trend=height_trend
+            weight_trend=velocity.weight_trend,
+            height_trend=velocity.height_trend,
+            head_trend=velocity.head_trend
         )
+    
+    def get_growth_velocity(self, baby_id: str, days: int = 30) -> GrowthVelocityDTO:
+        """获取宝宝过去指定天数的生长速度和趋势"""
+        return self.get_growth_velocities([baby_id], days)[baby_id]
+    
+    def get_growth_velocities(self, baby_ids: List[str], days: int = 30) -> Dict[str, GrowthVelocityDTO]:
+        """
+        批量获取生长速度和趋势
+        
+        每个测量项目只执行一次查询（仅时间和测量值两列），对所有宝宝的序列
+        一次性做最小二乘直线拟合：体重单位为克/天，身高和头围为厘米/周。
+        窗口内少于两次测量的项目速度为 None，趋势为 stable。
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        repositories = {'weight': self.weight_repo, 'height': self.height_repo, 'head': self.head_repo}
+        
+        results = {baby_id: GrowthVelocityDTO(baby_id=baby_id, window_days=days) for baby_id in baby_ids}
+        for measure, repository in repositories.items():
+            series = repository.get_measurements_for_babies(baby_ids, start_date, end_date)
+            velocities = self.fit_growth_velocities(measure, [series.get(baby_id, []) for baby_id in baby_ids])
+            
+            threshold = self.TREND_THRESHOLDS[measure]
+            for baby_id, velocity in zip(baby_ids, velocities):
+                if np.isnan(velocity):
+                    continue
+                velocity = float(velocity)
+                setattr(results[baby_id], f"{measure}_velocity", velocity)
+                if velocity > threshold:
+                    setattr(results[baby_id], f"{measure}_trend", "increasing")
+                elif velocity < -threshold:
+                    setattr(results[baby_id], f"{measure}_trend", "decreasing")
+        
+        return results
+    
+    @classmethod
+    def fit_growth_velocities(cls, measure: str, series_list: List[List[Tuple[float, float]]]) -> np.ndarray:
+        """
+        对多条 (时间, 测量值) 序列分别拟合生长速度（体重为克/天，身高和头围为厘米/周）
+        
+        少于两次测量或时间跨度为零的序列为 NaN。
+        """
+        return cls._fit_slopes(series_list) * cls.VELOCITY_UNITS[measure]
+    
+    @staticmethod
+    def _fit_slopes(series_list: List[List[Tuple[float, float]]]) -> np.ndarray:
+        """
+        对多条 (时间, 值) 序列分别做最小二乘直线拟合，返回每条序列的斜率（每秒）
+        
+        所有序列拼接后用分组求和一次算出，时间按组内均值中心化以保证数值稳定；
+        少于两个点或时间跨度为零的序列返回 NaN。
+        """
+        counts = np.array([len(series) for series in series_list], dtype=np.intp)
+        slopes = np.full(len(series_list), np.nan)
+        if counts.sum() == 0:
+            return slopes
+        
+        points = np.array([point for series in series_list for point in series], dtype=np.float64)
+        groups = np.repeat(np.arange(len(series_list)), counts)
+        times, values = points[:, 0], points[:, 1]
+        
+        n = np.maximum(counts, 1)
+        t = times - (np.bincount(groups, times, len(series_list)) / n)[groups]
+        v = values - (np.bincount(groups, values, len(series_list)) / n)[groups]
+        stt = np.bincount(groups, t * t, len(series_list))
+        stv = np.bincount(groups, t * v, len(series_list))
+        
+        valid = (counts >= 2) & (stt > 0)
+        slopes[valid] = stv[valid] / stt[valid]
+        return slopes
@@ -0,0 +1,171 @@
+"""
+导入服务 - 从 NDJSON 导出文件中流式导入数据
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Iterator, Set, Tuple
+from datetime import datetime
+import gzip
+import json
+from sqlalchemy.orm import Session
+from baby_tracker.models.mappers import DTODictMapper
+from baby_tracker.repositories import (
+    BabyRepository, NursingRepository, FormulaRepository,
+    SleepRepository, DiaperRepository, WeightRepository, HeightRepository,
+    HeadRepository, TemperatureRepository, PlaytimeRepository, BathRepository,
+    PhotoRepository, VideoRepository
+)
+from baby_tracker.services.aggregators import period_of
+from baby_tracker.services.derived_data import DerivedDataService
+
+
+@dataclass
+class ImportResult:
+    """导入结果"""
+    success: bool
+    baby_id: Optional[str] = None
+    error_message: Optional[str] = None
+    import_date: datetime = field(default_factory=datetime.now)
+    record_counts: Dict[str, int] = field(default_factory=dict)
+    verified: bool = False  # 导入条数与文件汇总行一致
+    
+    @property
+    def record_count(self) -> int:
+        """导入的记录总数"""
+        return sum(self.record_counts.values())
+
+
+class ImportService:
+    """数据导入服务"""
+    
+    def __init__(self, db_session: Optional[Session] = None, batch_size: int = 1000):
+        from baby_tracker.database import get_db
+        self.db_session = db_session or next(get_db())
+        self.batch_size = batch_size
+        self.baby_repo = BabyRepository(self.db_session)
+        
+        # 类型标签 -> 仓储
+        self.repositories = {
+            'nursing': NursingRepository(self.db_session),
+            'formula': FormulaRepository(self.db_session),
+            'sleep': SleepRepository(self.db_session),
+            'diaper': DiaperRepository(self.db_session),
+            'weight': WeightRepository(self.db_session),
+            'height': HeightRepository(self.db_session),
+            'head': HeadRepository(self.db_session),
+            'temperature': TemperatureRepository(self.db_session),
+            'playtime': PlaytimeRepository(self.db_session),
+            'bath': BathRepository(self.db_session),
+            'photo': PhotoRepository(self.db_session),
+            'video': VideoRepository(self.db_session),
+        }
+        self.derived_data = DerivedDataService(self.db_session)
+    
+    def import_ndjson(self, file_path: str) -> ImportResult:
+        """
+        导入 NDJSON（或 gzip 压缩的 NDJSON）导出文件
+        
+        整个文件在一个事务中写入：已存在的记录（增量导出中被修改的行）按主键更新，
+        任何一行出错或条数与汇总行不一致时全部回滚，不会留下导入了一半的数据。
+        提交后重建导入的记录（及被更新记录原先）所在日期的事件聚合等派生数据；
+        重建失败时记录已经导入，结果仍为成功，error_message 提示运行 tools/rebuild_derived_data.py。
+        """
+        result = ImportResult(success=False)
+        batches: Dict[str, List[Any]] = {}
+        summary: Optional[Dict[str, Any]] = None
+        # 记录类型 -> {(宝宝ID, 本地日期)}
+        touched: Dict[str, Set[Tuple[str, str]]] = {}
+        
+        try:
+            for line_number, type_name, data in self._iter_ndjson(file_path):
+                if type_name == 'summary':
+                    # 追加导出的文件包含多段，每段末尾各有一行汇总
+                    if summary is None:
+                        summary = {'counts': {}}
+                    for key, count in data.get('counts', {}).items():
+                        summary['counts'][key] = summary['counts'].get(key, 0) + count
+                    continue
+                
+                dto = DTODictMapper.from_dict(type_name, data)
+                if type_name == 'baby':
+                    # 目标库中已存在的宝宝更新为导出时的信息
+                    self.baby_repo.bulk_upsert([dto], commit=False)
+                    result.baby_id = dto.id
+                    continue
+                
+                if type_name not in self.repositories:
+                    raise ValueError(f"第{line_number}行: 不支持导入的记录类型 {type_name}")
+                
+                touched.setdefault(type_name, set()).add((dto.baby_id, period_of(dto.time)))
+                batch = batches.setdefault(type_name, [])
+                batch.append(dto)
+                if len(batch) >= self.batch_size:
+                    self._flush(type_name, batch, result, touched)
+            
+            # 写入剩余的批次
+            for type_name, batch in batches.items():
+                self._flush(type_name, batch, result, touched)
+        except Exception as e:
+            self.db_session.rollback()
+            result.error_message = f"导入过程中发生错误: {str(e)}"
+            return result
+        
+        # 与导出时写入的汇总行核对条数，一致时才提交
+        if summary is not None:
+            expected = {k: v for k, v in summary.get('counts', {}).items() if v}
+            actual = {k: v for k, v in result.record_counts.items() if v}
+            result.verified = expected == actual
+            if not result.verified:
+                result.error_message = f"导入条数与导出汇总不一致: 期望 {expected}, 实际 {actual}"
+        else:
+            result.error_message = "文件缺少汇总行，无法校验导入条数"
+        
+        if result.verified:
+            self.db_session.commit()
+            try:
+                self.derived_data.refresh_after_import(touched)
+            except Exception as e:
+                self.db_session.rollback()
+                result.error_message = (
+                    f"记录已导入，但派生数据更新失败: {str(e)}；"
+                    f"请运行 tools/rebuild_derived_data.py 重建派生数据"
+                )
+        else:
+            self.db_session.rollback()
+        result.success = result.verified
+        return result
+    
+    def _flush(
+        self,
+        type_name: str,
+        batch: List[Any],
+        result: ImportResult,
+        touched: Dict[str, Set[Tuple[str, str]]]
+    ) -> None:
+        """将一个批次通过仓储写入数据库（不提交），被更新的记录原先所在的日期也计入 touched"""
+        if not batch:
+            return
+        repository = self.repositories[type_name]
+        periods = touched.setdefault(type_name, set())
+        for baby_id, time in repository.get_baby_times([dto.id for dto in batch]):
+            periods.add((baby_id, period_of(time)))
+        inserted = repository.bulk_upsert(batch, commit=False)
+        result.record_counts[type_name] = result.record_counts.get(type_name, 0) + inserted
+        batch.clear()
+    
+    def _iter_ndjson(self, file_path: str) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """逐行读取 NDJSON 文件，自动识别 gzip 压缩"""
+        with open(file_path, 'rb') as probe:
+            is_gzip = probe.read(2) == b'\x1f\x8b'
+        
+        opener = gzip.open if is_gzip else open
+        with opener(file_path, 'rt', encoding='utf-8') as stream:
+            for line_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                yield line_number, item['type'], item['data']
+    
+    def close(self):
+        """关闭服务"""
+        self.db_session.close()
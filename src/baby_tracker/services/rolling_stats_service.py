@@ -0,0 +1,136 @@
+"""
+滚动统计服务 - 按天计算任意指标的 N 日移动合计、均值和计数
+
+每个指标只发一条 SQL：按本地日期分组后用窗口函数
+（OVER (ORDER BY day ROWS BETWEEN n-1 PRECEDING AND CURRENT ROW)）同时算出所有窗口，
+结果以按列排列的 NumPy 数组返回，可直接交给图表使用。
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+from baby_tracker.repositories import (
+    NursingRepository, FormulaRepository, SleepRepository, DiaperRepository
+)
+
+
+DEFAULT_WINDOWS = (7, 30)
+
+# 指标 -> (仓库, 取值列, 换算系数, 单位)；取值列 count 为每日记录数，total 为每日数值总和
+METRICS = {
+    'formula_amount': ('formula', 'total', 1.0, '毫升'),
+    'formula_count': ('formula', 'count', 1.0, '次'),
+    'nursing_minutes': ('nursing', 'total', 1.0, '分钟'),
+    'nursing_count': ('nursing', 'count', 1.0, '次'),
+    'sleep_hours': ('sleep', 'total', 1 / 60, '小时'),
+    'sleep_count': ('sleep', 'count', 1.0, '次'),
+    'diaper_count': ('diaper', 'count', 1.0, '次'),
+}
+
+
+@dataclass
+class RollingStats:
+    """滚动统计结果（各数组按日期对齐）"""
+    metric: str
+    unit: str
+    dates: np.ndarray  # datetime64[D]
+    daily_values: np.ndarray
+    daily_counts: np.ndarray  # 每日记录数
+    moving_sum: Dict[int, np.ndarray] = field(default_factory=dict)
+    moving_average: Dict[int, np.ndarray] = field(default_factory=dict)
+    moving_count: Dict[int, np.ndarray] = field(default_factory=dict)  # 窗口内的记录数
+    
+    @property
+    def windows(self):
+        """窗口天数（升序）"""
+        return sorted(self.moving_sum)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为图表用的字典"""
+        return {
+            'metric': self.metric,
+            'unit': self.unit,
+            'dates': [str(day) for day in self.dates],
+            'daily_values': self.daily_values.round(2).tolist(),
+            'daily_counts': self.daily_counts.tolist(),
+            'windows': {
+                str(window): {
+                    'sum': self.moving_sum[window].round(2).tolist(),
+                    'average': self.moving_average[window].round(2).tolist(),
+                    'count': self.moving_count[window].tolist(),
+                }
+                for window in self.windows
+            },
+        }
+
+
+class RollingStatsService:
+    """滚动统计服务"""
+    
+    def __init__(self, db_session: Optional[Session] = None):
+        from baby_tracker.database import get_db
+        self.db_session = db_session or next(get_db())
+        self.repositories = {
+            'nursing': NursingRepository(self.db_session),
+            'formula': FormulaRepository(self.db_session),
+            'sleep': SleepRepository(self.db_session),
+            'diaper': DiaperRepository(self.db_session),
+        }
+    
+    def get_rolling_stats(
+        self,
+        baby_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime,
+        windows: Sequence[int] = DEFAULT_WINDOWS
+    ) -> RollingStats:
+        """
+        计算日期范围内（按本地日期，含两端）每天的指标值及其各窗口的移动合计、日均和记录数
+        
+        窗口包含当天及之前 n-1 天，范围开始前的数据也会计入，因此每个窗口都是完整的；
+        没有记录的日期按 0 计。
+        """
+        if metric not in METRICS:
+            raise ValueError(f"不支持的指标: {metric}")
+        windows = sorted(set(windows))
+        if not windows or windows[0] < 1:
+            raise ValueError("窗口天数必须为正整数")
+        
+        source, column, scale, unit = METRICS[metric]
+        rows = self.repositories[source].get_rolling_totals(baby_id, start_date, end_date, windows)
+        
+        # 列顺序：日期, 记录数, 数值总和, 每个窗口 (记录数合计, 数值合计, 记录数日均, 数值日均)
+        offset = 1 if column == 'count' else 2
+        data = np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), 2 + 4 * len(windows))
+        stats = RollingStats(
+            metric=metric,
+            unit=unit,
+            dates=np.array([row[0] for row in rows], dtype='datetime64[D]'),
+            daily_values=data[:, offset - 1] * scale,
+            daily_counts=data[:, 0].astype(np.int64)
+        )
+        for index, window in enumerate(windows):
+            base = 2 + 4 * index
+            stats.moving_count[window] = data[:, base].astype(np.int64)
+            stats.moving_sum[window] = data[:, base + offset - 1] * scale
+            stats.moving_average[window] = data[:, base + offset + 1] * scale
+        return stats
+    
+    def get_dashboard_trends(
+        self,
+        baby_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        windows: Sequence[int] = DEFAULT_WINDOWS
+    ) -> Dict[str, RollingStats]:
+        """常用指标的滚动统计（配方奶量、母乳时长、睡眠时长、换尿布次数）"""
+        return {
+            metric: self.get_rolling_stats(baby_id, metric, start_date, end_date, windows)
+            for metric in ('formula_amount', 'nursing_minutes', 'sleep_hours', 'diaper_count')
+        }
+    
+    def close(self):
+        """关闭服务"""
+        self.db_session.close()
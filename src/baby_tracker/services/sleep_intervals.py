@@ -0,0 +1,129 @@
+"""
+睡眠区间引擎 - 把睡眠记录还原为不重叠的睡眠时段并按天汇总
+
+睡眠记录按开始时间排序后做一次扫描线合并，重叠或相接的记录合并为一个时段；
+时段再按本地日期和昼夜边界切分，跨夜睡眠会分别计入前后两天。
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 夜间睡眠的时间范围（本地时间 19:00 - 次日 07:00）
+NIGHT_START_HOUR = 19
+NIGHT_END_HOUR = 7
+
+
+@dataclass
+class SleepSummary:
+    """睡眠汇总结果（时长单位均为分钟）"""
+    period_start: datetime
+    period_end: datetime
+    record_count: int = 0  # 原始睡眠记录数
+    session_count: int = 0  # 合并后的睡眠时段数
+    total_minutes: float = 0.0
+    daily_minutes: Dict[str, float] = field(default_factory=dict)
+    daily_night_minutes: Dict[str, float] = field(default_factory=dict)
+    daily_day_minutes: Dict[str, float] = field(default_factory=dict)
+    longest_stretch_minutes: float = 0.0
+    longest_stretch_start: Optional[datetime] = None
+    wake_windows: List[float] = field(default_factory=list)  # 相邻睡眠时段之间的清醒时长
+    
+    @property
+    def average_daily_minutes(self) -> float:
+        """有睡眠记录的日子平均每天的睡眠时长"""
+        return self.total_minutes / len(self.daily_minutes) if self.daily_minutes else 0.0
+    
+    @property
+    def average_wake_window_minutes(self) -> float:
+        """平均清醒时长"""
+        return sum(self.wake_windows) / len(self.wake_windows) if self.wake_windows else 0.0
+
+
+def merge_intervals(intervals: Iterable[Tuple[float, float]]) -> Iterator[Tuple[float, float]]:
+    """
+    扫描线合并按开始时间升序的 (开始, 结束) 区间（Unix 时间戳）
+    
+    重叠或首尾相接的区间合并为一个，结束不晚于开始的区间被忽略。
+    """
+    current_start = current_end = None
+    for start, end in intervals:
+        if end <= start:
+            continue
+        if current_end is not None and start <= current_end:
+            current_end = max(current_end, end)
+            continue
+        if current_end is not None:
+            yield current_start, current_end
+        current_start, current_end = start, end
+    
+    if current_end is not None:
+        yield current_start, current_end
+
+
+def split_by_day(
+    start: float,
+    end: float,
+    night_start_hour: int = NIGHT_START_HOUR,
+    night_end_hour: int = NIGHT_END_HOUR
+) -> Iterator[Tuple[float, float, str, bool]]:
+    """按本地午夜和昼夜边界切分区间，产出 (开始, 结束, 日期, 是否夜间)"""
+    cursor = start
+    while cursor < end:
+        moment = datetime.fromtimestamp(cursor)
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        boundaries = [
+            midnight.replace(hour=night_end_hour).timestamp(),
+            midnight.replace(hour=night_start_hour).timestamp(),
+            (midnight + timedelta(days=1)).timestamp(),
+        ]
+        boundary = min(b for b in boundaries if b > cursor)
+        segment_end = min(boundary, end)
+        is_night = moment.hour < night_end_hour or moment.hour >= night_start_hour
+        yield cursor, segment_end, midnight.strftime('%Y-%m-%d'), is_night
+        cursor = segment_end
+
+
+def summarize_sleep(
+    intervals: Iterable[Tuple[float, float]],
+    period_start: datetime,
+    period_end: datetime,
+    night_start_hour: int = NIGHT_START_HOUR,
+    night_end_hour: int = NIGHT_END_HOUR
+) -> SleepSummary:
+    """
+    汇总按开始时间升序的睡眠区间
+    
+    区间先裁剪到统计期间内，再合并、切分并累计；整个过程只扫描一遍输入。
+    """
+    summary = SleepSummary(period_start=period_start, period_end=period_end)
+    lower = period_start.timestamp()
+    upper = period_end.timestamp()
+    
+    def clipped() -> Iterator[Tuple[float, float]]:
+        for start, end in intervals:
+            if end > lower and start < upper:
+                summary.record_count += 1
+                yield max(start, lower), min(end, upper)
+    
+    previous_end = None
+    for start, end in merge_intervals(clipped()):
+        summary.session_count += 1
+        minutes = (end - start) / 60
+        summary.total_minutes += minutes
+        if minutes > summary.longest_stretch_minutes:
+            summary.longest_stretch_minutes = minutes
+            summary.longest_stretch_start = datetime.fromtimestamp(start)
+        if previous_end is not None:
+            summary.wake_windows.append((start - previous_end) / 60)
+        previous_end = end
+        
+        for segment_start, segment_end, day, is_night in split_by_day(
+            start, end, night_start_hour, night_end_hour
+        ):
+            segment_minutes = (segment_end - segment_start) / 60
+            summary.daily_minutes[day] = summary.daily_minutes.get(day, 0.0) + segment_minutes
+            bucket = summary.daily_night_minutes if is_night else summary.daily_day_minutes
+            bucket[day] = bucket.get(day, 0.0) + segment_minutes
+    
+    return summary
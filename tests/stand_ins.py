@@ -0,0 +1,135 @@
+"""
+测试用替身表：列名与正式模型一致、只包含被测 SQL 用到的列，在内存 SQLite 上验证仓储查询
+
+正式模型之间的外键依赖较多，测试中改用这里的替身模型；stand_in 生成以替身模型为表的仓储子类。
+"""
+from dataclasses import fields
+from enum import Enum
+
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, Text, create_engine, inspect
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+
+Base = declarative_base()
+
+
+class RecordColumns:
+    """记录表的公共列"""
+    id = Column(String, primary_key=True, name='ID')
+    baby_id = Column(String, name='BabyID')
+    time = Column(Float, name='Time')
+    timestamp = Column(Float, name='Timestamp')
+    note = Column(Text, name='Note')
+    has_picture = Column(Integer, name='HasPicture', default=0)
+
+
+class BabyRow(Base):
+    __tablename__ = 'Baby'
+    id = Column(String, primary_key=True, name='ID')
+    name = Column(String, name='Name')
+    dob = Column(Float, name='DOB')
+    timestamp = Column(Float, name='Timestamp')
+
+
+class NursingRow(RecordColumns, Base):
+    __tablename__ = 'Nursing'
+    finish_side = Column(Integer, name='FinishSide')
+    left_duration = Column(Integer, name='LeftDuration')
+    right_duration = Column(Integer, name='RightDuration')
+    both_duration = Column(Integer, name='BothDuration')
+    desc_id = Column(String, name='DescID')
+
+
+class FormulaRow(RecordColumns, Base):
+    __tablename__ = 'Formula'
+    amount = Column(Float, name='Amount')
+    desc_id = Column(String, name='DescID')
+
+
+class SleepDescRow(Base):
+    __tablename__ = 'SleepDesc'
+    id = Column(String, primary_key=True, name='ID')
+    name = Column(String, name='Name')
+
+
+class DiaperDescRow(Base):
+    __tablename__ = 'DiaperDesc'
+    id = Column(String, primary_key=True, name='ID')
+    name = Column(String, name='Name')
+
+
+class SleepRow(RecordColumns, Base):
+    __tablename__ = 'Sleep'
+    duration = Column(Integer, name='Duration')
+    desc_id = Column(String, ForeignKey('SleepDesc.ID'), name='DescID')
+
+
+class DiaperRow(RecordColumns, Base):
+    __tablename__ = 'Diaper'
+    desc_id = Column(String, ForeignKey('DiaperDesc.ID'), name='DescID')
+
+
+class PlaytimeRow(RecordColumns, Base):
+    __tablename__ = 'Playtime'
+    duration = Column(Integer, name='Duration')
+    play_type = Column(String, name='PlayType')
+
+
+class BathRow(RecordColumns, Base):
+    __tablename__ = 'Bath'
+    duration = Column(Integer, name='Duration')
+    water_temperature = Column(Float, name='WaterTemperature')
+
+
+class PhotoRow(RecordColumns, Base):
+    __tablename__ = 'Photo'
+
+
+class VideoRow(RecordColumns, Base):
+    __tablename__ = 'Video'
+    duration = Column(Integer, name='Duration')
+
+
+class ExportJobRow(Base):
+    __tablename__ = 'ExportJob'
+    id = Column(String, primary_key=True, name='ID')
+    timestamp = Column(Float, name='Timestamp')
+    baby_id = Column(String, name='BabyID')
+    status = Column(String, name='Status')
+    format = Column(String, name='Format')
+    request = Column(Text, name='Request')
+    progress = Column(Integer, name='Progress', default=0)
+    file_path = Column(String, name='FilePath')
+    file_size = Column(Integer, name='FileSize')
+    record_count = Column(Integer, name='RecordCount')
+    error_message = Column(Text, name='ErrorMessage')
+    created_at = Column(Float, name='CreatedAt')
+    started_at = Column(Float, name='StartedAt')
+    finished_at = Column(Float, name='FinishedAt')
+
+
+def sqlite_session():
+    """建好全部替身表的内存 SQLite 会话"""
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def stand_in(repository_class, model_class):
+    """以替身模型为表的仓储子类（from_dto 只填充替身模型中存在的列）"""
+    columns = {attribute.key for attribute in inspect(model_class).column_attrs}
+    
+    class StandInMapper(repository_class._get_mapper(None)):
+        @staticmethod
+        def from_dto(dto):
+            values = {}
+            for item in fields(dto):
+                if item.name in columns:
+                    value = getattr(dto, item.name)
+                    values[item.name] = value.value if isinstance(value, Enum) else value
+            return model_class(**values)
+    
+    return type(repository_class.__name__, (repository_class,), {
+        '_get_model_class': lambda self: model_class,
+        '_get_mapper': lambda self: StandInMapper,
+    })
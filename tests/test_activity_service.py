@@ -0,0 +1,80 @@
+"""
+活动服务测试：在内存 SQLite 上用替身模型验证 SQL 分组统计
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from baby_tracker.repositories import (
+    PlaytimeRepository, BathRepository, PhotoRepository, VideoRepository
+)
+from baby_tracker.services.activity_service import ActivityService
+from tests.stand_ins import BathRow, PhotoRow, PlaytimeRow, VideoRow, sqlite_session, stand_in
+
+
+class ActivityStatsTest(unittest.TestCase):
+    """测试游戏、洗澡和媒体统计"""
+    
+    def setUp(self):
+        self.session = sqlite_session()
+        self.service = ActivityService(mock.MagicMock())
+        self.service.playtime_repo = stand_in(PlaytimeRepository, PlaytimeRow)(self.session)
+        self.service.bath_repo = stand_in(BathRepository, BathRow)(self.session)
+        self.service.photo_repo = stand_in(PhotoRepository, PhotoRow)(self.session)
+        self.service.video_repo = stand_in(VideoRepository, VideoRow)(self.session)
+        self.today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    
+    def tearDown(self):
+        self.session.close()
+    
+    def _time(self, days_ago, hours=0):
+        return (self.today - timedelta(days=days_ago, hours=hours)).timestamp()
+    
+    def test_playtime_stats(self):
+        """测试按日期和类型分组的游戏时长"""
+        self.session.add_all([
+            PlaytimeRow(id='1', baby_id='baby', time=self._time(1), duration=20, play_type='趴玩'),
+            PlaytimeRow(id='2', baby_id='baby', time=self._time(1, 2), duration=10, play_type='阅读'),
+            PlaytimeRow(id='3', baby_id='baby', time=self._time(2), duration=15, play_type='趴玩'),
+            PlaytimeRow(id='4', baby_id='baby', time=self._time(2, 1), duration=5, play_type=None),
+            PlaytimeRow(id='5', baby_id='other', time=self._time(1), duration=99, play_type='趴玩'),
+        ])
+        self.session.commit()
+        
+        stats = self.service.get_playtime_stats('baby', days=7)
+        day_1 = (self.today - timedelta(days=1)).strftime('%Y-%m-%d')
+        self.assertEqual(stats['daily_playtime'][day_1], 30)
+        self.assertEqual(stats['play_types'], {'趴玩': 35, '阅读': 10})
+        self.assertEqual(stats['total_duration'], 50)
+        self.assertEqual(stats['avg_daily_duration'], 25)
+        self.assertEqual(stats['record_count'], 4)
+    
+    def test_bath_and_media_stats(self):
+        """测试洗澡汇总以及照片、视频计数"""
+        self.session.add_all([
+            BathRow(id='1', baby_id='baby', time=self._time(3), duration=10, water_temperature=37.0),
+            BathRow(id='2', baby_id='baby', time=self._time(10), duration=20, water_temperature=None),
+            BathRow(id='3', baby_id='baby', time=self._time(40), duration=30, water_temperature=39.0),
+            PhotoRow(id='1', baby_id='baby', time=datetime(2026, 9, 30, 12).timestamp()),
+            PhotoRow(id='2', baby_id='baby', time=datetime(2026, 10, 1, 12).timestamp()),
+            PhotoRow(id='3', baby_id='baby', time=datetime(2026, 10, 2, 12).timestamp()),
+            VideoRow(id='1', baby_id='baby', time=self._time(1), duration=90),
+            VideoRow(id='2', baby_id='baby', time=self._time(2), duration=30),
+        ])
+        self.session.commit()
+        
+        bath = self.service.get_bath_stats('baby', days=28)
+        self.assertEqual(bath['bath_count'], 2)
+        self.assertEqual(bath['bath_frequency'], 0.5)
+        self.assertEqual(bath['avg_duration'], 15)
+        self.assertEqual(bath['avg_temperature'], 37.0)
+        
+        media = self.service.get_media_stats('baby')
+        self.assertEqual(media['photo_count'], 3)
+        self.assertEqual(media['photo_count_by_month'], {'2026-09': 1, '2026-10': 2})
+        self.assertEqual(media['video_count'], 2)
+        self.assertEqual(media['total_video_duration_minutes'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
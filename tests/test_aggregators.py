@@ -0,0 +1,161 @@
+"""
+事件聚合器测试：按周期增量累计并合并
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+from baby_tracker.models.dto import FormulaDTO
+from baby_tracker.repositories import SleepRepository
+from baby_tracker.services.aggregators import Accumulator, EventAggregator, period_of
+from baby_tracker.services.derived_data import DerivedDataService
+from tests.stand_ins import SleepRow, sqlite_session, stand_in
+
+
+class AccumulatorTest(unittest.TestCase):
+    """测试累计量的增量更新与合并"""
+    
+    def test_merged_partials_match_single_pass(self):
+        """测试分块累计后合并与一次性计算的结果一致"""
+        rng = np.random.default_rng(7)
+        values = rng.normal(120, 30, 500)
+        start = datetime(2026, 10, 1).timestamp()
+        times = start + rng.uniform(0, 86400 * 7, 500)
+        
+        partials = [Accumulator() for _ in range(4)]
+        for index, (time, value) in enumerate(zip(times, values)):
+            partials[index % 4].add(time, float(value))
+        merged = Accumulator()
+        for partial in partials + [Accumulator()]:
+            merged.merge(partial)
+        
+        self.assertEqual(merged.count, 500)
+        self.assertAlmostEqual(merged.total, values.sum(), places=6)
+        self.assertAlmostEqual(merged.mean, values.mean(), places=9)
+        self.assertAlmostEqual(merged.variance, values.var(), places=6)
+        self.assertEqual(merged.minimum, values.min())
+        self.assertEqual(merged.maximum, values.max())
+        hours = np.bincount([datetime.fromtimestamp(t).hour for t in times], minlength=24)
+        self.assertEqual(merged.hour_histogram, hours.tolist())
+    
+    def test_missing_values_only_count_as_events(self):
+        """测试混有空值的事件：次数计入全部事件，均值和方差只按有数值的事件计算"""
+        start = datetime(2026, 10, 1).timestamp()
+        values = [60.0, None, 90.0, 120.0, None, 150.0]
+        single = Accumulator()
+        partials = [Accumulator(), Accumulator(), Accumulator()]
+        for index, value in enumerate(values):
+            single.add(start + 3600 * index, value)
+            partials[index // 2].add(start + 3600 * index, value)
+        merged = Accumulator()
+        for partial in partials + [Accumulator()]:
+            merged.merge(partial)
+        
+        numbers = np.array([value for value in values if value is not None])
+        for accumulator in (single, merged):
+            self.assertEqual(accumulator.count, 6)
+            self.assertEqual(accumulator.value_count, 4)
+            self.assertAlmostEqual(accumulator.mean, numbers.mean())
+            self.assertAlmostEqual(accumulator.variance, numbers.var())
+            self.assertEqual(accumulator.total, numbers.sum())
+        
+        restored = Accumulator.from_dto(merged.to_dto('baby', 'formula', '2026-10-01'))
+        restored.merge(Accumulator())
+        self.assertEqual((restored.count, restored.value_count), (6, 4))
+        self.assertAlmostEqual(restored.mean, numbers.mean())
+    
+    def test_count_only_events(self):
+        """测试只统计次数的事件"""
+        accumulator = Accumulator()
+        accumulator.add(datetime(2026, 10, 1, 9).timestamp())
+        accumulator.add(datetime(2026, 10, 1, 9, 30).timestamp())
+        
+        self.assertEqual(accumulator.count, 2)
+        self.assertIsNone(accumulator.maximum)
+        self.assertEqual(accumulator.peak_hours(), [9])
+
+
+class EventAggregatorTest(unittest.TestCase):
+    """测试聚合的写入更新与按周期查询"""
+    
+    def setUp(self):
+        self.aggregator = EventAggregator(mock.MagicMock())
+        self.stored = {}
+        repository = self.aggregator.repository
+        repository.get_period = mock.Mock(
+            side_effect=lambda baby_id, event_type, period: self.stored.get((event_type, period))
+        )
+        repository.save = mock.Mock(
+            side_effect=lambda dto, commit=True: self.stored.__setitem__((dto.event_type, dto.period), dto)
+        )
+        repository.find_by_periods = mock.Mock(side_effect=lambda baby_id, event_type, periods: [
+            self.stored[(event_type, period)] for period in periods if (event_type, period) in self.stored
+        ])
+    
+    def test_record_updates_one_row_per_period(self):
+        """测试每条新记录只更新所在周期的一行，查询时合并各周期"""
+        start = datetime(2026, 10, 1)
+        for index in range(12):
+            time = start + timedelta(hours=6 * index)
+            record = FormulaDTO(baby_id='baby', time=time.timestamp(), amount=60 + index)
+            self.aggregator.record('formula', record)
+        
+        self.assertEqual(self.aggregator.repository.save.call_count, 12)
+        self.assertEqual(len(self.stored), 3)
+        
+        days = [period_of((start + timedelta(days=day)).timestamp()) for day in range(3)]
+        stats = self.aggregator.query_periods('baby', 'formula', days[:2])
+        self.assertEqual(stats.count, 8)
+        self.assertEqual(stats.total, sum(60 + index for index in range(8)))
+        self.assertEqual((stats.minimum, stats.maximum), (60, 67))
+    
+    def test_unknown_event_type(self):
+        """测试未注册的事件类型"""
+        with self.assertRaises(ValueError):
+            self.aggregator.record('unknown', FormulaDTO(baby_id='baby', time=0.0))
+
+
+class RebuildAggregatesTest(unittest.TestCase):
+    """测试按原始记录重建聚合（历史回填和批量导入后）"""
+    
+    def setUp(self):
+        self.start = datetime(2026, 10, 1, 13)
+        session = sqlite_session()
+        for day in range(3):
+            for index in range(2):
+                time = self.start + timedelta(days=day, hours=6 * index)
+                session.add(SleepRow(
+                    id=f'sleep-{day}-{index}', baby_id='baby', time=time.timestamp(), duration=30 * (day + 1)
+                ))
+        session.commit()
+        
+        self.service = DerivedDataService(session)
+        self.service.repositories['sleep'] = stand_in(SleepRepository, SleepRow)(session)
+        self.service.aggregator.repository.replace_periods = mock.Mock()
+        self.days = [period_of((self.start + timedelta(days=day)).timestamp()) for day in range(3)]
+    
+    def _replaced(self):
+        baby_id, event_type, periods, dtos = self.service.aggregator.repository.replace_periods.call_args.args
+        return periods, {dto.period: (dto.count, dto.total) for dto in dtos}
+    
+    def test_rebuild_replaces_all_periods(self):
+        """测试不指定周期时用全部记录替换全部周期"""
+        self.service.rebuild_event_aggregates('baby', 'sleep')
+        
+        periods, aggregates = self._replaced()
+        self.assertIsNone(periods)
+        self.assertEqual(aggregates, {day: (2, 60.0 * (index + 1)) for index, day in enumerate(self.days)})
+    
+    def test_import_rebuilds_only_touched_periods(self):
+        """测试批量导入后只替换写入的日期，范围内其他日期的记录不计入"""
+        self.service.refresh_after_import({'sleep': {('baby', self.days[0]), ('baby', self.days[2])}})
+        
+        periods, aggregates = self._replaced()
+        self.assertEqual(periods, [self.days[0], self.days[2]])
+        self.assertEqual(aggregates, {self.days[0]: (2, 60.0), self.days[2]: (2, 180.0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+分析服务测试：使用模拟的仓储数据测试体温分析和批量分析
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from baby_tracker.services.analytics_service import AnalyticsService
+
+
+class TemperatureAnalysisTest(unittest.TestCase):
+    """测试 get_temperature_analysis"""
+    
+    def setUp(self):
+        self.service = AnalyticsService(mock.MagicMock())
+        self.start = datetime(2026, 10, 1)
+        self.end = datetime(2026, 10, 10)
+    
+    def _at(self, day, hour):
+        return (self.start + timedelta(days=day, hours=hour)).timestamp()
+    
+    def _analyze(self, readings, **kwargs):
+        self.service.health_service.iter_temperature_readings = mock.Mock(return_value=iter(readings))
+        return self.service.get_temperature_analysis('baby', self.start, self.end, **kwargs)
+    
+    def test_statistics_and_fever_episodes(self):
+        """测试统计值、发烧天数和按间隔划分的发烧事件"""
+        analysis = self._analyze([
+            (self._at(0, 8), 36.8, '腋下'),
+            (self._at(0, 20), 38.2, '腋下'),
+            (self._at(1, 6), 38.9, '腋下'),
+            (self._at(1, 18), 37.0, '腋下'),
+            # 与上一次发烧读数间隔超过24小时，属于新的发烧事件
+            (self._at(4, 9), 37.9, '肛门'),
+            (self._at(4, 10), 38.1, '肛门'),
+        ])
+        
+        self.assertEqual(analysis.reading_count, 6)
+        self.assertAlmostEqual(analysis.min_temperature, 36.8)
+        self.assertAlmostEqual(analysis.max_temperature, 38.9)
+        self.assertAlmostEqual(analysis.average_temperature, (36.8 + 38.2 + 38.9 + 37.0 + 37.9 + 38.1) / 6)
+        
+        # 肛温 37.9 低于该位置的阈值 38.0
+        self.assertEqual(analysis.fever_days, 3)
+        self.assertAlmostEqual(analysis.fever_percentage, 100.0)
+        self.assertEqual(len(analysis.fever_episodes), 2)
+        first, second = analysis.fever_episodes
+        self.assertEqual(first.reading_count, 2)
+        self.assertEqual(first.peak_temperature, 38.9)
+        self.assertAlmostEqual(first.duration_hours, 10)
+        self.assertEqual(second.reading_count, 1)
+        self.assertEqual(second.peak_location, '肛门')
+        self.assertEqual(analysis.is_fever_data['values'], [True, True, True])
+    
+    def test_episode_gap_is_configurable(self):
+        """测试缩短间隔后同一段发烧被拆分为多个事件"""
+        analysis = self._analyze([
+            (self._at(0, 0), 38.0, None),
+            (self._at(0, 8), 38.5, None),
+        ], episode_gap_hours=4)
+        self.assertEqual(len(analysis.fever_episodes), 2)
+    
+    def test_record_fever_flag_uses_location_threshold(self):
+        """测试体温记录的发烧判断与发烧事件使用同一套按测量位置的阈值"""
+        from baby_tracker.models.dto import TemperatureDTO
+        
+        self.assertFalse(TemperatureDTO(temperature=37.6, location='口腔').is_fever)
+        self.assertTrue(TemperatureDTO(temperature=37.6, location='腋下').is_fever)
+        self.assertFalse(TemperatureDTO(temperature=37.9, location='肛门').is_fever)
+        self.assertEqual(TemperatureDTO(temperature=37.9, location='肛门').temperature_status, "稍高")
+        self.assertEqual(TemperatureDTO(temperature=38.0, location='耳温').temperature_status, "发烧")
+        self.assertTrue(TemperatureDTO(temperature=37.5).is_fever)
+    
+    def test_no_readings(self):
+        """测试没有体温记录时返回空结果"""
+        analysis = self._analyze([])
+        self.assertEqual(analysis.reading_count, 0)
+        self.assertEqual(analysis.fever_episodes, [])
+    
+    def test_fever_index_covers_every_location_threshold(self):
+        """测试发烧部分索引的条件不高于任何测量位置的阈值，且模型与迁移的条件一致"""
+        import importlib.util
+        import os
+        from baby_tracker.models.dto import (
+            DEFAULT_FEVER_THRESHOLD, FEVER_INDEX_THRESHOLD, FEVER_THRESHOLDS
+        )
+        from baby_tracker.models.health import Temperature
+        
+        self.assertLessEqual(FEVER_INDEX_THRESHOLD, min(FEVER_THRESHOLDS.values()))
+        self.assertLessEqual(FEVER_INDEX_THRESHOLD, DEFAULT_FEVER_THRESHOLD)
+        
+        index = next(
+            index for index in Temperature.__table__.indexes
+            if index.name == 'ix_Temperature_BabyID_Time_fever'
+        )
+        self.assertEqual(
+            str(index.dialect_options['sqlite']['where']), f'"Temperature" >= {FEVER_INDEX_THRESHOLD!r}'
+        )
+        
+        path = os.path.join(
+            os.path.dirname(__file__), '..', 'alembic', 'versions', '00004_fever_partial_index.py'
+        )
+        spec = importlib.util.spec_from_file_location('fever_partial_index', path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        self.assertEqual(migration.FEVER_INDEX_THRESHOLD, FEVER_INDEX_THRESHOLD)
+
+
+class BatchAnalysisTest(unittest.TestCase):
+    """测试 analyze_babies"""
+    
+    def setUp(self):
+        self.service = AnalyticsService(mock.MagicMock())
+        self.start = datetime(2026, 10, 1)
+        self.end = datetime(2026, 10, 3, 23, 59)
+        feeding, health = self.service.feeding_service, self.service.health_service
+        feeding.nursing_repository.get_daily_totals = mock.Mock(return_value=[
+            ('a', '2026-10-01', 6, 90.0), ('a', '2026-10-02', 4, 60.0), ('b', '2026-10-03', 2, 20.0),
+            ('a', '2026-09-30', 5, 50.0),  # 不在统计期间内
+        ])
+        feeding.formula_repository.get_daily_totals = mock.Mock(return_value=[
+            ('b', '2026-10-01', 3, 270.0), ('b', '2026-10-02', 3, 300.0),
+        ])
+        health.diaper_repo.get_daily_totals = mock.Mock(return_value=[('a', '2026-10-01', 8, 0.0)])
+        day = self._at
+        health.sleep_repo.get_intervals_for_babies = mock.Mock(return_value={
+            'a': [(day(0, 1), day(0, 4)), (day(0, 3), day(0, 5)), (day(1, 13), day(1, 14))],
+        })
+        health.weight_repo.get_measurements_for_babies = mock.Mock(return_value={
+            'a': [(day(0, 9), 4000.0), (day(2, 9), 4060.0)], 'b': []
+        })
+        health.height_repo.get_measurements_for_babies = mock.Mock(return_value={'a': [], 'b': []})
+    
+    def _at(self, day, hour):
+        return (self.start + timedelta(days=day, hours=hour)).timestamp()
+    
+    def test_grouped_queries_and_per_baby_results(self):
+        """测试每张表只查询一次，并按宝宝汇总"""
+        results = self.service.analyze_babies(['a', 'b', 'c'], self.start, self.end)
+        
+        self.service.feeding_service.nursing_repository.get_daily_totals.assert_called_once()
+        a, b, c = results['a'], results['b'], results['c']
+        self.assertEqual(a.days, 3)
+        self.assertEqual((a.nursing_sessions, a.nursing_minutes), (10, 150.0))
+        self.assertEqual(a.daily_data['nursing'], [6, 4, 0])
+        self.assertEqual(b.formula_amount, 570.0)
+        self.assertAlmostEqual(b.formula_percentage, 75.0)
+        self.assertEqual(a.diaper_count, 8)
+        self.assertEqual(a.sleep_minutes, 300)
+        self.assertEqual(a.longest_sleep_minutes, 240)
+        self.assertEqual(a.weight_gain, 60.0)
+        self.assertAlmostEqual(a.weight_velocity, 30.0)
+        self.assertIsNone(b.weight_velocity)
+        self.assertEqual(c.total_sessions, 0)
+    
+    def test_process_pool_matches_inline(self):
+        """测试进程池中的睡眠汇总与单进程结果一致"""
+        inline = self.service.analyze_babies(['a', 'b', 'c'], self.start, self.end)
+        pooled = self.service.analyze_babies(['a', 'b', 'c'], self.start, self.end, workers=2)
+        
+        self.assertEqual(inline, pooled)
+    
+    def test_all_babies_are_queried_without_id_list(self):
+        """测试统计全部宝宝时，各分组查询都不带宝宝ID列表"""
+        self.service.baby_service.get_all_babies = mock.Mock(
+            return_value=[mock.Mock(id='a'), mock.Mock(id='b')]
+        )
+        results = self.service.analyze_babies(None, self.start, self.end)
+        
+        self.assertEqual(set(results), {'a', 'b'})
+        health = self.service.health_service
+        for repository in (health.weight_repo, health.height_repo):
+            self.assertIsNone(repository.get_measurements_for_babies.call_args[0][0])
+        self.assertIsNone(health.sleep_repo.get_intervals_for_babies.call_args[0][0])
+
+if __name__ == '__main__':
+    unittest.main()
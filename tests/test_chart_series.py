@@ -0,0 +1,84 @@
+"""
+图表序列测试：LTTB 降采样、粒度选择以及按周分组的 SQL
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+from baby_tracker.repositories import DiaperRepository
+from baby_tracker.services.analytics_service import AnalyticsService
+from baby_tracker.services.chart_series import choose_bucket, lttb
+from tests.stand_ins import DiaperRow, sqlite_session, stand_in
+
+
+class LttbTest(unittest.TestCase):
+    """测试 lttb 与 choose_bucket"""
+    
+    def test_keeps_endpoints_and_spikes(self):
+        """测试保留首末两点和明显的峰值"""
+        times = np.arange(1000, dtype=float)
+        values = np.sin(times / 50)
+        values[437] = 10.0
+        keep = lttb(times, values, 50)
+        
+        self.assertEqual(len(keep), 50)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], 999)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertIn(437, keep)
+        self.assertEqual(len(lttb(times[:10], values[:10], 50)), 10)
+    
+    def test_choose_bucket(self):
+        """测试选择分组数不超过上限的最细粒度"""
+        start = datetime(2026, 1, 1)
+        self.assertEqual(choose_bucket(start, start + timedelta(days=3), 500), 'hour')
+        self.assertEqual(choose_bucket(start, start + timedelta(days=300), 500), 'day')
+        self.assertEqual(choose_bucket(start, start + timedelta(days=3 * 365), 500), 'week')
+        self.assertEqual(choose_bucket(start, start + timedelta(days=3 * 365), 100), 'month')
+
+
+class GetSeriesTest(unittest.TestCase):
+    """测试 AnalyticsService.get_series"""
+    
+    def setUp(self):
+        self.session = sqlite_session()
+        self.service = AnalyticsService(mock.MagicMock())
+        self.service.health_service.diaper_repo = stand_in(DiaperRepository, DiaperRow)(self.session)
+    
+    def tearDown(self):
+        self.session.close()
+    
+    def test_weekly_buckets_from_sql(self):
+        """测试按周一分组、补齐空周，跨周日午夜的记录分别计入两周"""
+        # 2026-10-04 为周日，2026-10-05 为周一
+        for index, moment in enumerate([
+            datetime(2026, 10, 4, 23, 30), datetime(2026, 10, 5, 0, 30),
+            datetime(2026, 10, 6, 9), datetime(2026, 10, 22, 9),
+        ]):
+            self.session.add(DiaperRow(id=str(index), baby_id='baby', time=moment.timestamp()))
+        self.session.commit()
+        
+        series = self.service.get_series(
+            'baby', 'diaper_count', datetime(2026, 10, 1), datetime(2026, 10, 25, 23, 59), bucket='week'
+        )
+        data = series.to_dict()
+        self.assertEqual(data['labels'], ['2026-09-28', '2026-10-05', '2026-10-12', '2026-10-19'])
+        self.assertEqual(data['values'], [1, 2, 0, 1])
+    
+    def test_measurements_are_downsampled(self):
+        """测试测量类指标超过点数上限时降采样"""
+        start = datetime(2026, 1, 1)
+        points = [((start + timedelta(hours=hour)).timestamp(), 3000.0 + hour) for hour in range(2000)]
+        self.service.health_service.weight_repo.get_measurements = mock.Mock(return_value=points)
+        
+        series = self.service.get_series('baby', 'weight', start, start + timedelta(days=100), max_points=100)
+        self.assertEqual(series.bucket, 'raw')
+        self.assertEqual(len(series.values), 100)
+        self.assertEqual(series.source_points, 2000)
+        self.assertEqual(series.values[-1], 4999.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+数据迁移工具测试：用临时 SQLite 数据库测试批量迁移模式
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from data_migrator import DataMigrator, TABLE_MAPPINGS, LOOKUP_TABLES, LOOKUP_COLUMNS
+
+
+class BulkMigrationTest(unittest.TestCase):
+    """测试 DataMigrator.migrate_bulk"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.old_db = os.path.join(self.temp_dir.name, "old.db")
+        self.new_db = os.path.join(self.temp_dir.name, "new.db")
+        
+        with sqlite3.connect(self.old_db) as old:
+            old.execute("CREATE TABLE Baby (ID TEXT, Name TEXT, DOB REAL, DueDay TEXT, Gender INTEGER, Picture TEXT, Timestamp REAL)")
+            old.execute("INSERT INTO Baby VALUES ('b1', '小明', 1.0, NULL, 0, NULL, 1.0)")
+            # 旧表缺少 HasPicture 和 BothDuration 列
+            old.execute("CREATE TABLE Nursing (ID TEXT, BabyID TEXT, Time REAL, Note TEXT, DescID TEXT, FinishSide INTEGER, LeftDuration INTEGER, RightDuration INTEGER, Timestamp REAL)")
+            old.executemany(
+                "INSERT INTO Nursing VALUES (?, 'b1', ?, NULL, NULL, NULL, 5, 5, ?)",
+                [(f"n{i}", float(i), None if i % 2 else float(i)) for i in range(25)]
+            )
+            old.execute("CREATE TABLE DiaperDesc (ID TEXT, Name TEXT, DisplayOrder INTEGER)")
+            old.execute("INSERT INTO DiaperDesc VALUES ('d1', '湿', 1)")
+        
+        with sqlite3.connect(self.new_db) as new:
+            for table, columns in list(TABLE_MAPPINGS.values()) + [(t, LOOKUP_COLUMNS) for t in LOOKUP_TABLES]:
+                names = ", ".join(f'"{name}"' + (" PRIMARY KEY" if name == 'ID' else " NOT NULL" if name == 'Timestamp' else "")
+                                  for name, _ in columns)
+                new.execute(f'CREATE TABLE "{table}" ({names})')
+            new.execute('CREATE INDEX ix_Nursing_BabyID_Timestamp ON Nursing (BabyID, Timestamp)')
+            # 目标库中已存在的记录会被跳过并计为失败
+            new.execute("INSERT INTO Nursing (ID, BabyID, Time, Timestamp) VALUES ('n3', 'b1', 3.0, 3.0)")
+    
+    def test_bulk_migration_copies_rows_and_applies_defaults(self):
+        """测试批量迁移分批复制数据、填充默认值并重建索引"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=10, progress_every=10)
+        self.assertTrue(migrator.migrate_bulk())
+        
+        self.assertEqual(migrator.stats['baby']['migrated'], 1)
+        self.assertEqual(migrator.stats['nursing']['total'], 25)
+        self.assertEqual(migrator.stats['nursing']['migrated'], 24)
+        self.assertEqual(migrator.stats['nursing']['failed'], 1)
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 25)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM DiaperDesc").fetchone()[0], 1)
+            row = new.execute(
+                "SELECT HasPicture, FinishSide, BothDuration, Timestamp FROM Nursing WHERE ID = 'n1'"
+            ).fetchone()
+            self.assertEqual(row[:3], (0, 2, 0))
+            self.assertIsNotNone(row[3])
+            indexes = [r[0] for r in new.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Nursing'")]
+            self.assertIn('ix_Nursing_BabyID_Timestamp', indexes)
+    
+    def test_bulk_migration_resumes_from_checkpoint(self):
+        """测试中断后从检查点继续迁移，失败的行记录到 MigrationReject 表"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=10)
+        migrator.commit_rows = 10
+        insert_batch = migrator._insert_batch
+        calls = []
+        
+        def failing_insert_batch(target, table, *args):
+            if table == 'Nursing':
+                calls.append(table)
+                if len(calls) == 2:
+                    raise sqlite3.OperationalError("disk I/O error")
+            return insert_batch(target, table, *args)
+        
+        with mock.patch.object(migrator, '_insert_batch', side_effect=failing_insert_batch):
+            self.assertFalse(migrator.migrate_bulk())
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 10)
+        
+        resumed = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=10, resume=True)
+        self.assertTrue(resumed.migrate_bulk())
+        self.assertEqual(resumed.stats['baby']['migrated'], 1)
+        self.assertEqual(resumed.stats['nursing']['migrated'], 24)
+        self.assertEqual(resumed.stats['nursing']['failed'], 1)
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 25)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Baby").fetchone()[0], 1)
+            rejects = new.execute("SELECT SourceTable, RecordID FROM MigrationReject").fetchall()
+            self.assertEqual(rejects, [('Nursing', 'n3')])
+    
+    def test_resume_restores_indexes_after_hard_kill(self):
+        """测试进程在加载中途被强制结束后，续传时重建已删除的索引"""
+        script = textwrap.dedent(f"""
+            import os
+            from data_migrator import DataMigrator
+            
+            migrator = DataMigrator({self.old_db!r}, {"sqlite:///" + self.new_db!r}, batch_size=10)
+            migrator.commit_rows = 10
+            insert_batch = migrator._insert_batch
+            calls = []
+            
+            def killing_insert_batch(target, table, *args):
+                if table == 'Nursing':
+                    calls.append(table)
+                    if len(calls) == 2:
+                        os._exit(9)
+                return insert_batch(target, table, *args)
+            
+            migrator._insert_batch = killing_insert_batch
+            migrator.migrate_bulk()
+        """)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        completed = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True)
+        self.assertEqual(completed.returncode, 9, completed.stderr.decode(errors='replace'))
+        
+        index_sql = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Nursing'"
+        with sqlite3.connect(self.new_db) as new:
+            self.assertNotIn('ix_Nursing_BabyID_Timestamp', [r[0] for r in new.execute(index_sql)])
+        
+        resumed = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=10, resume=True)
+        self.assertTrue(resumed.migrate_bulk())
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertIn('ix_Nursing_BabyID_Timestamp', [r[0] for r in new.execute(index_sql)])
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM MigrationPendingIndex").fetchone()[0], 0)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 25)
+    
+    def test_parallel_migration_merges_staged_ranges(self):
+        """测试并行迁移按 rowid 区间拆分大表，合并后结果完整"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=4)
+        migrator.parallel_chunk_rows = 10
+        self.assertTrue(migrator.migrate_parallel(workers=2))
+        
+        self.assertEqual(migrator.stats['nursing']['total'], 25)
+        self.assertEqual(migrator.stats['nursing']['migrated'], 24)
+        self.assertEqual(migrator.stats['nursing']['failed'], 1)
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 25)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM DiaperDesc").fetchone()[0], 1)
+            self.assertEqual(
+                new.execute("SELECT HasPicture, FinishSide FROM Nursing WHERE ID = 'n1'").fetchone(), (0, 2)
+            )
+        # 暂存文件在合并后删除
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['new.db', 'old.db'])
+    
+    def test_parallel_migration_records_rejects_and_resumes(self):
+        """测试并行迁移把冲突的行记录到 MigrationReject 表，中断后从检查点继续"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=4)
+        migrator.parallel_chunk_rows = 10
+        merge_stage = migrator._merge_stage
+        calls = []
+        
+        def failing_merge_stage(target, table, columns):
+            if table == 'Nursing':
+                calls.append(table)
+                if len(calls) == 2:
+                    raise sqlite3.OperationalError("disk I/O error")
+            return merge_stage(target, table, columns)
+        
+        with mock.patch.object(migrator, '_merge_stage', side_effect=failing_merge_stage):
+            self.assertFalse(migrator.migrate_parallel(workers=2))
+        
+        with sqlite3.connect(self.new_db) as new:
+            # 第一个分片（rowid 1-9，其中 n3 与已有记录冲突）已提交
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 9)
+            self.assertEqual(
+                new.execute("SELECT SourceTable, SourceRowID, RecordID FROM MigrationReject").fetchall(),
+                [('Nursing', 4, 'n3')]
+            )
+        
+        resumed = DataMigrator(self.old_db, f"sqlite:///{self.new_db}", batch_size=4, resume=True)
+        resumed.parallel_chunk_rows = 10
+        self.assertTrue(resumed.migrate_parallel(workers=2))
+        self.assertEqual(resumed.stats['baby']['migrated'], 1)
+        self.assertEqual(resumed.stats['nursing']['total'], 25)
+        self.assertEqual(resumed.stats['nursing']['migrated'], 24)
+        self.assertEqual(resumed.stats['nursing']['failed'], 1)
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Nursing").fetchone()[0], 25)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM Baby").fetchone()[0], 1)
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM MigrationReject").fetchone()[0], 1)
+    
+    def test_attached_migration_copies_rows_in_sql(self):
+        """测试 ATTACH + INSERT … SELECT 迁移与批量迁移结果一致"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}")
+        self.assertTrue(migrator.migrate_attached())
+        
+        self.assertEqual(migrator.stats['nursing']['total'], 25)
+        self.assertEqual(migrator.stats['nursing']['migrated'], 24)
+        self.assertEqual(migrator.stats['nursing']['failed'], 1)
+        
+        with sqlite3.connect(self.new_db) as new:
+            self.assertEqual(new.execute("SELECT Name FROM Baby").fetchone()[0], '小明')
+            self.assertEqual(new.execute("SELECT COUNT(*) FROM DiaperDesc").fetchone()[0], 1)
+            row = new.execute(
+                "SELECT HasPicture, FinishSide, BothDuration, Timestamp FROM Nursing WHERE ID = 'n1'"
+            ).fetchone()
+            self.assertEqual(row[:3], (0, 2, 0))
+            self.assertIsNotNone(row[3])
+            indexes = [r[0] for r in new.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Nursing'")]
+            self.assertIn('ix_Nursing_BabyID_Timestamp', indexes)
+    
+    def test_verify_reports_mismatching_ids(self):
+        """测试迁移后校验：行数和校验和一致的表通过，内容不同的记录写入差异文件"""
+        migrator = DataMigrator(self.old_db, f"sqlite:///{self.new_db}")
+        self.assertTrue(migrator.migrate_attached())
+        
+        diff_path = os.path.join(self.temp_dir.name, "diff.txt")
+        self.assertFalse(migrator.verify(diff_path))
+        self.assertTrue(migrator.verification['Baby']['match'])
+        self.assertTrue(migrator.verification['DiaperDesc']['match'])
+        
+        nursing = migrator.verification['Nursing']
+        self.assertFalse(nursing['match'])
+        self.assertEqual((nursing['old_count'], nursing['new_count']), (25, 25))
+        self.assertEqual((nursing['missing'], nursing['extra'], nursing['changed']), (0, 0, 1))
+        with open(diff_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "Nursing\tchanged\tn3\n")
+    
+    def test_bulk_migration_requires_sqlite_target(self):
+        """测试批量模式拒绝非 SQLite 目标数据库"""
+        migrator = DataMigrator(self.old_db, "postgresql://localhost/baby_tracker")
+        self.assertFalse(migrator.migrate_bulk())
+
+
+if __name__ == '__main__':
+    unittest.main()
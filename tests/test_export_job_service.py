@@ -0,0 +1,262 @@
+"""
+导出任务服务测试：使用内存中的任务仓储测试后台导出流程
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from baby_tracker.models.dto import ExportJobStatus
+from baby_tracker.repositories.export_repository import ExportJobRepository
+from baby_tracker.services.export_service import ExportRequest, ExportResult
+from baby_tracker.services.export_job_service import ExportJobManager, ExportCancelled
+from tests.stand_ins import Base, BabyRow, ExportJobRow, stand_in
+
+
+class InMemoryExportJobRepository:
+    """替代 ExportJobRepository 的内存实现（所有实例共享同一存储）"""
+    
+    jobs = {}
+    lock = threading.Lock()
+    
+    def __init__(self, db_session=None):
+        pass
+    
+    def create(self, dto):
+        with self.lock:
+            self.jobs[dto.id] = replace(dto)
+        return replace(dto)
+    
+    def get_by_id(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        return replace(job) if job else None
+    
+    def update(self, job_id, dto):
+        with self.lock:
+            self.jobs[job_id] = replace(dto)
+        return replace(dto)
+    
+    def update_progress(self, job_id, progress):
+        with self.lock:
+            self.jobs[job_id].progress = progress
+    
+    def find_by_baby_id(self, baby_id, limit=None):
+        with self.lock:
+            return [replace(job) for job in self.jobs.values() if job.baby_id == baby_id]
+    
+    def fail_unfinished(self, error_message):
+        return 0
+
+
+class FakeExportService:
+    """按行上报进度的模拟导出服务"""
+    
+    def __init__(self, rows=10, started=None, release=None):
+        self.rows = rows
+        self.started = started
+        self.release = release
+    
+    def export_baby_data(self, request, progress_callback=None):
+        if self.started:
+            self.started.set()
+        for row in range(1, self.rows + 1):
+            if self.release and row == 2:
+                self.release.wait(5)
+            if progress_callback:
+                try:
+                    progress_callback(row)
+                except ExportCancelled as e:
+                    return ExportResult(success=False, error_message=str(e))
+        return ExportResult(success=True, file_path="export.xlsx", file_size=100, record_count=self.rows)
+
+
+class ExportJobManagerTest(unittest.TestCase):
+    """测试 ExportJobManager"""
+    
+    def setUp(self):
+        InMemoryExportJobRepository.jobs = {}
+        patcher = mock.patch(
+            'baby_tracker.services.export_job_service.ExportJobRepository',
+            InMemoryExportJobRepository
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.request = ExportRequest(
+            baby_id=str(uuid.uuid4()),
+            start_date=datetime.now() - timedelta(days=7),
+            end_date=datetime.now()
+        )
+    
+    def _make_manager(self, export_service):
+        manager = ExportJobManager(
+            max_workers=1,
+            session_factory=mock.MagicMock,
+            export_service_factory=lambda session: export_service
+        )
+        self.addCleanup(manager.shutdown)
+        return manager
+    
+    def test_job_runs_in_background_and_reports_progress(self):
+        """测试任务在后台完成并回调进度"""
+        manager = self._make_manager(FakeExportService(rows=5))
+        progress = []
+        
+        job = manager.submit(self.request, lambda job_id, rows: progress.append(rows))
+        self.assertEqual(job.status, ExportJobStatus.QUEUED)
+        
+        job = manager.wait(job.id, timeout=5)
+        self.assertEqual(job.status, ExportJobStatus.DONE)
+        self.assertEqual(job.record_count, 5)
+        self.assertEqual(job.file_path, "export.xlsx")
+        self.assertEqual(progress, [1, 2, 3, 4, 5, 5])
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+    
+    def test_cancel_running_job(self):
+        """测试运行中的任务在下一次进度回调时被取消"""
+        started = threading.Event()
+        release = threading.Event()
+        manager = self._make_manager(FakeExportService(rows=5, started=started, release=release))
+        
+        job = manager.submit(self.request)
+        self.assertTrue(started.wait(5))
+        self.assertTrue(manager.cancel(job.id))
+        release.set()
+        
+        job = manager.wait(job.id, timeout=5)
+        self.assertEqual(job.status, ExportJobStatus.CANCELLED)
+        self.assertEqual(job.progress, 1)
+    
+    def test_cancel_during_export_without_progress_removes_artifact(self):
+        """测试没有进度回调的导出（如命中缓存）在取消后完成时，任务为已取消且文件被删除"""
+        started = threading.Event()
+        release = threading.Event()
+        artifact = os.path.join(tempfile.mkdtemp(), "export.xlsx")
+        self.addCleanup(shutil.rmtree, os.path.dirname(artifact), True)
+        
+        def export_baby_data(request, progress_callback=None):
+            started.set()
+            release.wait(5)
+            with open(artifact, 'w') as f:
+                f.write("data")
+            return ExportResult(success=True, file_path=artifact, file_size=4, record_count=5)
+        
+        manager = self._make_manager(mock.Mock(export_baby_data=export_baby_data))
+        job = manager.submit(self.request)
+        self.assertTrue(started.wait(5))
+        self.assertTrue(manager.cancel(job.id))
+        release.set()
+        
+        job = manager.wait(job.id, timeout=5)
+        self.assertEqual(job.status, ExportJobStatus.CANCELLED)
+        self.assertIsNone(job.file_path)
+        self.assertFalse(os.path.exists(artifact))
+    
+    def test_cancel_after_csv_export_removes_every_file(self):
+        """测试多文件的 CSV 导出在取消后完成时，每个文件都被删除"""
+        started = threading.Event()
+        release = threading.Event()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        files = [os.path.join(directory, f"export_{title}.csv") for title in ("宝宝信息", "喂养", "睡眠")]
+        
+        def export_baby_data(request, progress_callback=None):
+            started.set()
+            release.wait(5)
+            for path in files:
+                with open(path, 'w') as f:
+                    f.write("data")
+            return ExportResult(success=True, file_path=", ".join(files), file_size=12, record_count=3)
+        
+        manager = self._make_manager(mock.Mock(export_baby_data=export_baby_data))
+        job = manager.submit(replace(self.request, format="csv"))
+        self.assertTrue(started.wait(5))
+        self.assertTrue(manager.cancel(job.id))
+        release.set()
+        
+        job = manager.wait(job.id, timeout=5)
+        self.assertEqual(job.status, ExportJobStatus.CANCELLED)
+        self.assertEqual([path for path in files if os.path.exists(path)], [])
+    
+    def test_cancel_queued_job(self):
+        """测试排队中的任务可直接取消"""
+        started = threading.Event()
+        release = threading.Event()
+        manager = self._make_manager(FakeExportService(rows=3, started=started, release=release))
+        
+        running = manager.submit(self.request)
+        self.assertTrue(started.wait(5))
+        queued = manager.submit(self.request)
+        self.assertTrue(manager.cancel(queued.id))
+        release.set()
+        
+        self.assertEqual(manager.wait(queued.id, timeout=5).status, ExportJobStatus.CANCELLED)
+        self.assertEqual(manager.wait(running.id, timeout=5).status, ExportJobStatus.DONE)
+
+
+
+class ExportJobSessionTest(unittest.TestCase):
+    """测试任务记录在 SQLite 文件数据库上的并发读写"""
+    
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        url = f"sqlite:///{os.path.join(directory, 'jobs.db')}"
+        connect_args = {"check_same_thread": False, "timeout": 20}
+        
+        # 与 database.py 相同：请求线程共享单个连接，任务使用独立的连接池
+        self.shared_engine = create_engine(url, poolclass=StaticPool, connect_args=connect_args)
+        self.job_engine = create_engine(url, connect_args=connect_args, pool_size=4, max_overflow=4)
+        self.addCleanup(self.shared_engine.dispose)
+        self.addCleanup(self.job_engine.dispose)
+        with self.shared_engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        Base.metadata.create_all(self.shared_engine)
+        
+        patcher = mock.patch(
+            'baby_tracker.services.export_job_service.ExportJobRepository',
+            stand_in(ExportJobRepository, ExportJobRow)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_jobs_do_not_disturb_request_thread_transactions(self):
+        """测试两个任务同时写进度时，请求线程的事务既不被提交也不被回滚"""
+        manager = ExportJobManager(
+            max_workers=2,
+            session_factory=sessionmaker(bind=self.job_engine),
+            export_service_factory=lambda session: FakeExportService(rows=200)
+        )
+        self.addCleanup(manager.shutdown)
+        request = ExportRequest(
+            baby_id='baby', start_date=datetime.now() - timedelta(days=7), end_date=datetime.now()
+        )
+        jobs = [manager.submit(request) for _ in range(2)]
+        
+        session = sessionmaker(bind=self.shared_engine)()
+        self.addCleanup(session.close)
+        for index in range(50):
+            session.add(BabyRow(id=f'baby-{index}', name=f'宝宝{index}'))
+            session.flush()
+            session.commit()
+        
+        for job in jobs:
+            job = manager.wait(job.id, timeout=30)
+            self.assertEqual(job.status, ExportJobStatus.DONE)
+            self.assertEqual(job.progress, 200)
+        self.assertEqual(session.query(BabyRow).count(), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
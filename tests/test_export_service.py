@@ -0,0 +1,624 @@
+"""
+导出服务测试：使用模拟的服务层数据测试各导出格式
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from baby_tracker.models.dto import (
+    BabyDTO, NursingDTO, FormulaDTO, SleepDTO, WeightDTO, HeightDTO, FinishSide, Gender
+)
+from baby_tracker.services.export_service import ExportService, ExportRequest
+
+
+class ExportServiceTest(unittest.TestCase):
+    """测试 ExportService 的导出流程"""
+    
+    def setUp(self):
+        """每个测试前执行：切换到临时目录并准备模拟数据"""
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        
+        self.baby = BabyDTO(
+            id=str(uuid.uuid4()),
+            name="测试宝宝",
+            dob=(datetime.now() - timedelta(days=60)).timestamp(),
+            gender=Gender.MALE
+        )
+        self.start_date = datetime.now() - timedelta(days=7)
+        self.end_date = datetime.now()
+        self.records = self._make_feeding_records(10)
+        
+        self.service = ExportService(mock.MagicMock())
+        self.service.baby_service.get_baby = mock.Mock(return_value=self.baby)
+        self.service.feeding_service.iter_feeding_records_by_date = mock.Mock(
+            side_effect=lambda *args, **kwargs: iter(self.records)
+        )
+        self._mock_ascending_iter(self.service.feeding_service.nursing_repository, NursingDTO)
+        self._mock_ascending_iter(self.service.feeding_service.formula_repository, FormulaDTO)
+        self.service._get_data_version = mock.Mock(return_value="v1")
+    
+    def tearDown(self):
+        """每个测试后执行"""
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _mock_ascending_iter(self, repository, dto_class):
+        """让仓储的流式查询按时间升序返回指定类型的模拟记录"""
+        repository.iter_by_date_range = mock.Mock(side_effect=lambda *args, **kwargs: iter(
+            sorted((r for r in self.records if isinstance(r, dto_class)), key=lambda r: r.time)
+        ))
+    
+    def _make_feeding_records(self, count):
+        """生成按时间倒序排列的母乳/配方奶交替记录"""
+        records = []
+        for i in range(count):
+            time = (self.end_date - timedelta(hours=3 * i)).timestamp()
+            if i % 2 == 0:
+                records.append(NursingDTO(
+                    id=str(uuid.uuid4()), baby_id=self.baby.id, time=time,
+                    left_duration=10, right_duration=5, finish_side=FinishSide.LEFT
+                ))
+            else:
+                records.append(FormulaDTO(
+                    id=str(uuid.uuid4()), baby_id=self.baby.id, time=time, amount=90.0
+                ))
+        return records
+    
+    def _make_request(self, format, **kwargs):
+        kwargs.setdefault('filename', "export_test")
+        return ExportRequest(
+            baby_id=self.baby.id,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            format=format,
+            **kwargs
+        )
+    
+    def test_excel_export_streams_rows(self):
+        """测试Excel导出写入全部喂养记录"""
+        from openpyxl import load_workbook
+        
+        result = self.service.export_baby_data(self._make_request("excel"))
+        self.assertTrue(result.success, result.error_message)
+        self.assertEqual(result.record_count, 10)
+        
+        workbook = load_workbook(result.file_path, read_only=True)
+        self.assertEqual(workbook.sheetnames, ['宝宝信息', '喂养记录'])
+        rows = list(workbook['喂养记录'].iter_rows(values_only=True))
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[1][2], '母乳')
+        self.assertEqual(rows[2][2], '配方奶')
+    
+    def test_excel_export_rolls_over_sheets(self):
+        """测试超过单表行数上限时自动续写到新工作表"""
+        from openpyxl import load_workbook
+        
+        self.service.excel_max_rows = 5
+        result = self.service.export_baby_data(self._make_request("excel"))
+        self.assertTrue(result.success, result.error_message)
+        
+        workbook = load_workbook(result.file_path, read_only=True)
+        self.assertEqual(
+            workbook.sheetnames,
+            ['宝宝信息', '喂养记录', '喂养记录_2', '喂养记录_3']
+        )
+        data_rows = sum(
+            len(list(workbook[name].iter_rows(min_row=2)))
+            for name in workbook.sheetnames[1:]
+        )
+        self.assertEqual(data_rows, 10)
+    
+    def test_zip_export_bundles_csv_entries(self):
+        """测试ZIP导出将每个表写为一个压缩的CSV条目"""
+        import csv
+        import io
+        import zipfile
+        
+        result = self.service.export_baby_data(self._make_request("zip"))
+        self.assertTrue(result.success, result.error_message)
+        self.assertTrue(result.file_path.endswith(".zip"))
+        self.assertEqual(result.record_count, 10)
+        
+        with zipfile.ZipFile(result.file_path) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                ['export_test_宝宝信息.csv', 'export_test_喂养记录.csv']
+            )
+            info = archive.getinfo('export_test_喂养记录.csv')
+            self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+            text = archive.read('export_test_喂养记录.csv').decode('utf-8')
+        
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[1]['数量(毫升)'], '90.0')
+    
+    def test_parquet_export_writes_typed_columns(self):
+        """测试Parquet导出每种记录一个文件，并保留列类型"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        result = self.service.export_baby_data(self._make_request(
+            "parquet", include_sleep=False, include_diaper=False, include_growth=False
+        ))
+        self.assertTrue(result.success, result.error_message)
+        self.assertEqual(result.record_count, 10)
+        self.assertEqual(
+            sorted(os.listdir(result.file_path)),
+            ['formula.parquet', 'nursing.parquet']
+        )
+        
+        table = pq.read_table(os.path.join(result.file_path, 'nursing.parquet'))
+        self.assertEqual(table.num_rows, 5)
+        self.assertTrue(pa.types.is_timestamp(table.schema.field('time').type))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('desc_id').type))
+        self.assertEqual(table.schema.field('left_duration').type, pa.int32())
+        self.assertEqual(table.column('finish_side').to_pylist(), [0] * 5)
+        
+        formula = pq.read_table(os.path.join(result.file_path, 'formula.parquet'))
+        self.assertEqual(formula.schema.field('amount').type, pa.float64())
+        self.assertEqual(formula.column('amount').to_pylist(), [90.0] * 5)
+    
+    def test_ndjson_round_trip(self):
+        """测试NDJSON导出后可以无损导入"""
+        from baby_tracker.services.import_service import ImportService
+        
+        for compress in (False, True):
+            result = self.service.export_baby_data(self._make_request(
+                "ndjson", compress=compress, filename=f"export_test_{compress}"
+            ))
+            self.assertTrue(result.success, result.error_message)
+            self.assertEqual(result.record_count, 10)
+            self.assertEqual(result.file_path.endswith(".gz"), compress)
+            
+            import_service = ImportService(mock.MagicMock(), batch_size=3)
+            import_service.baby_repo.bulk_upsert = mock.Mock(return_value=1)
+            imported = []
+            for repository in import_service.repositories.values():
+                repository.bulk_upsert = mock.Mock(
+                    side_effect=lambda dtos, commit=True: imported.extend(dtos) or len(dtos)
+                )
+            
+            import_result = import_service.import_ndjson(result.file_path)
+            self.assertTrue(import_result.success, import_result.error_message)
+            self.assertTrue(import_result.verified)
+            self.assertEqual(import_result.baby_id, self.baby.id)
+            self.assertEqual(import_result.record_counts, {'nursing': 5, 'formula': 5})
+            self.assertEqual(
+                sorted(imported, key=lambda r: r.id),
+                sorted(self.records, key=lambda r: r.id)
+            )
+    
+    def test_ndjson_reimport_updates_rows_in_one_transaction(self):
+        """测试重复导入时按主键更新已有记录，出错时整个文件回滚"""
+        from baby_tracker.repositories import BabyRepository, NursingRepository, FormulaRepository
+        from baby_tracker.services.aggregators import period_of
+        from baby_tracker.services.import_service import ImportService
+        from tests.stand_ins import BabyRow, NursingRow, FormulaRow, sqlite_session, stand_in
+        
+        session = sqlite_session()
+        import_service = ImportService(session, batch_size=3)
+        import_service.baby_repo = stand_in(BabyRepository, BabyRow)(session)
+        import_service.repositories['nursing'] = stand_in(NursingRepository, NursingRow)(session)
+        import_service.repositories['formula'] = stand_in(FormulaRepository, FormulaRow)(session)
+        import_service.derived_data.refresh_after_import = mock.Mock()
+        
+        first = self.service.export_baby_data(self._make_request("ndjson", filename="reimport_first"))
+        self.assertTrue(import_service.import_ndjson(first.file_path).success)
+        
+        # 修改过的记录再次导入时更新而不是主键冲突
+        self.records[0].left_duration = 42
+        original_time = self.records[0].time
+        self.records[0].time = original_time + 86400 * 2
+        self.service._get_data_version.return_value = "v2"
+        second = self.service.export_baby_data(self._make_request("ndjson", filename="reimport_second"))
+        imported = import_service.import_ndjson(second.file_path)
+        self.assertTrue(imported.success, imported.error_message)
+        self.assertEqual(session.query(NursingRow).count(), 5)
+        self.assertEqual(session.get(NursingRow, self.records[0].id).left_duration, 42)
+        # 记录移动到其他日期时，原来的日期也要重建
+        touched = import_service.derived_data.refresh_after_import.call_args.args[0]
+        self.assertIn((self.records[0].baby_id, period_of(original_time)), touched['nursing'])
+        self.assertIn((self.records[0].baby_id, period_of(self.records[0].time)), touched['nursing'])
+        
+        # 后面的批次出错时，前面的批次和宝宝信息都不会留下
+        session.query(NursingRow).delete()
+        session.query(FormulaRow).delete()
+        session.query(BabyRow).delete()
+        session.commit()
+        import_service.repositories['formula'].bulk_upsert = mock.Mock(side_effect=RuntimeError("写入失败"))
+        import_service.derived_data.refresh_after_import.reset_mock()
+        failed = import_service.import_ndjson(second.file_path)
+        self.assertFalse(failed.success)
+        import_service.derived_data.refresh_after_import.assert_not_called()
+        self.assertEqual(session.query(NursingRow).count(), 0)
+        self.assertEqual(session.query(BabyRow).count(), 0)
+        
+        # 派生数据更新失败时记录已提交，结果仍为成功并提示重建
+        del import_service.repositories['formula'].bulk_upsert
+        import_service.derived_data.refresh_after_import.side_effect = RuntimeError("聚合写入失败")
+        stale = import_service.import_ndjson(second.file_path)
+        self.assertTrue(stale.success)
+        self.assertIn("tools/rebuild_derived_data.py", stale.error_message)
+        self.assertEqual(session.query(NursingRow).count(), 5)
+        self.assertEqual(session.query(FormulaRow).count(), 5)
+    
+    def test_progress_callback_can_abort_and_clean_up(self):
+        """测试进度回调中止导出后不会留下未完成的文件"""
+        progress = []
+        
+        def on_progress(rows):
+            progress.append(rows)
+            if rows >= 4:
+                raise RuntimeError("cancelled")
+        
+        self.service.progress_interval = 2
+        result = self.service.export_baby_data(self._make_request("zip"), on_progress)
+        self.assertFalse(result.success)
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual(os.listdir(self.service.export_dir), [])
+    
+    
+    def test_repeat_export_uses_cache_until_data_changes(self):
+        """测试相同导出命中缓存，数据版本变化后重新生成"""
+        first = self.service.export_baby_data(self._make_request("zip"))
+        self.assertTrue(first.success, first.error_message)
+        self.assertFalse(first.cached)
+        
+        # 命中缓存时复制到本次请求的文件名
+        second = self.service.export_baby_data(self._make_request("zip", filename="other_name"))
+        self.assertTrue(second.cached)
+        self.assertEqual(second.file_path, os.path.join(self.service.export_dir, "other_name.zip"))
+        self.assertEqual(self._read(second.file_path), self._read(first.file_path))
+        self.assertEqual(second.record_count, 10)
+        self.assertEqual(self.service.feeding_service.iter_feeding_records_by_date.call_count, 1)
+        
+        blob_dir = os.path.join(self.service.cache.cache_dir, "artifacts")
+        old_blobs = set(os.listdir(blob_dir))
+        self.service._get_data_version.return_value = "v2"
+        self.records = self._make_feeding_records(4)
+        third = self.service.export_baby_data(self._make_request("zip", filename="renamed"))
+        self.assertFalse(third.cached)
+        self.assertEqual(self.service.feeding_service.iter_feeding_records_by_date.call_count, 2)
+        # 旧版本的缓存文件在新文件生成后被删除，用户的导出文件保留
+        self.assertTrue(old_blobs.isdisjoint(os.listdir(blob_dir)))
+        self.assertTrue(os.path.exists(first.file_path))
+        self.assertTrue(os.path.exists(third.file_path))
+    
+    def test_cached_result_is_not_affected_by_shared_filename(self):
+        """测试不同请求使用同一文件名时，命中缓存返回的是本请求的内容"""
+        week = self.service.export_baby_data(self._make_request("ndjson"))
+        week_content = self._read(week.file_path)
+        
+        self.start_date -= timedelta(days=30)
+        self.records = self._make_feeding_records(4)
+        month = self.service.export_baby_data(self._make_request("ndjson"))
+        self.assertFalse(month.cached)
+        self.assertEqual(month.file_path, week.file_path)
+        self.assertNotEqual(self._read(month.file_path), week_content)
+        
+        self.start_date += timedelta(days=30)
+        again = self.service.export_baby_data(self._make_request("ndjson"))
+        self.assertTrue(again.cached)
+        self.assertEqual(self._read(again.file_path), week_content)
+    
+    def test_cache_hit_links_blob_without_rehashing(self):
+        """测试命中缓存时不重新计算哈希而是硬链接缓存文件，追加写入输出文件不改动缓存"""
+        from baby_tracker.services.export_cache import ExportCache
+        
+        first = self.service.export_baby_data(self._make_request("ndjson", filename="linked"))
+        content = self._read(first.file_path)
+        
+        request = self._make_request("ndjson", filename=None)
+        with mock.patch.object(ExportCache, '_digest', side_effect=AssertionError("命中时不应计算哈希")):
+            second = self.service.export_baby_data(request)
+        self.assertTrue(second.cached)
+        self.assertIsNone(request.filename)
+        blob_dir = os.path.join(self.service.cache.cache_dir, "artifacts")
+        blob_path = os.path.join(blob_dir, os.listdir(blob_dir)[0])
+        self.assertTrue(os.path.samefile(second.file_path, blob_path))
+        
+        # 追加到命中缓存的输出文件前先断开链接
+        delta = self.service.export_baby_data(self._make_request(
+            "ndjson", filename=os.path.basename(second.file_path)[:-len(".ndjson")],
+            append=True, since_timestamp=first.watermark
+        ))
+        self.assertTrue(delta.success, delta.error_message)
+        self.assertFalse(os.path.samefile(delta.file_path, blob_path))
+        self.assertEqual(self._read(blob_path), content)
+        self.assertTrue(self.service.export_baby_data(self._make_request("ndjson")).cached)
+        
+        # 缓存文件被其他方式改动后不再命中
+        with open(blob_path, 'ab') as f:
+            f.write(b"\n")
+        self.assertFalse(self.service.export_baby_data(self._make_request("ndjson")).cached)
+    
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def test_concurrent_identical_exports_build_once(self):
+        """测试相同的并发导出只执行一次"""
+        import threading
+        from baby_tracker.services.export_cache import ExportCache
+        from baby_tracker.services.export_service import ExportResult
+        
+        cache = ExportCache(os.path.join(self.temp_dir, "cache"))
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+        
+        def build():
+            builds.append(1)
+            started.set()
+            release.wait(5)
+            with open("artifact.csv", "w") as f:
+                f.write("data")
+            return ExportResult(success=True, file_path="artifact.csv", record_count=1)
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_build("key", "v1", build)))
+            for _ in range(3)
+        ]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r.success and r.file_path == "artifact.csv" for r in results))
+    
+    
+    def test_incremental_export_appends_to_csv_and_ndjson(self):
+        """测试增量导出按水位线过滤，并追加到已有的CSV和NDJSON文件"""
+        import csv
+        from baby_tracker.services.import_service import ImportService
+        
+        first_records = self.records[:6]
+        new_records = self.records[6:]
+        for fmt in ("csv", "ndjson"):
+            self.records = first_records
+            first = self.service.export_baby_data(self._make_request(fmt, filename=f"nightly_{fmt}"))
+            self.assertTrue(first.success, first.error_message)
+            self.assertIsNotNone(first.watermark)
+            
+            self.records = new_records
+            delta = self.service.export_baby_data(self._make_request(
+                fmt, filename=f"nightly_{fmt}", append=True, since_timestamp=first.watermark
+            ))
+            self.assertTrue(delta.success, delta.error_message)
+            self.assertEqual(delta.record_count, 4)
+            self.assertGreater(delta.watermark, first.watermark)
+        
+        repository = self.service.feeding_service.nursing_repository
+        self.assertEqual(repository.iter_by_date_range.call_args.kwargs['since_timestamp'], first.watermark)
+        
+        with open(os.path.join(self.service.export_dir, "nightly_csv_喂养记录.csv"), encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 10)
+        
+        # 追加后的NDJSON文件按各段汇总行之和校验
+        import_service = ImportService(mock.MagicMock())
+        import_service.baby_repo.bulk_upsert = mock.Mock(return_value=1)
+        for repository in import_service.repositories.values():
+            repository.bulk_upsert = mock.Mock(side_effect=lambda dtos, commit=True: len(dtos))
+        imported = import_service.import_ndjson(delta.file_path)
+        self.assertTrue(imported.verified, imported.error_message)
+        self.assertEqual(imported.record_count, 10)
+    
+    def test_append_is_rejected_for_other_formats(self):
+        """测试追加模式仅支持CSV和NDJSON"""
+        result = self.service.export_baby_data(self._make_request("excel", append=True))
+        self.assertFalse(result.success)
+    
+    
+    def test_pdf_export_chunks_tables_and_caps_detail_rows(self):
+        """测试PDF明细按日分组、分块生成表格，并在超过上限时只保留汇总"""
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import LongTable
+        
+        self.service.pdf_table_chunk_rows = 3
+        self.service.pdf_max_detail_rows = 4
+        request = self._make_request("pdf")
+        
+        key, title, columns, rows = next(self.service._iter_sections(request))
+        elements, row_count = self.service._build_pdf_section_elements(
+            request, getSampleStyleSheet(), key, title, columns, rows
+        )
+        self.assertEqual(row_count, 10)
+        tables = [e for e in elements if isinstance(e, LongTable)]
+        self.assertTrue(all(len(t._cellvalues) <= 4 for t in tables))
+        self.assertTrue(all(t.repeatRows == 1 for t in tables))
+        # 明细只有4行，汇总表覆盖全部记录（记录间隔3小时，分布在2天）
+        detail_tables = [t for t in tables if len(t._cellvalues[0]) == 5]
+        summary_tables = [t for t in tables if len(t._cellvalues[0]) == 4]
+        self.assertEqual(sum(len(t._cellvalues) - 1 for t in detail_tables), 4)
+        self.assertEqual(sum(row[1] for t in summary_tables for row in t._cellvalues[1:]), 10)
+        
+        result = self.service.export_baby_data(request)
+        self.assertTrue(result.success, result.error_message)
+        self.assertEqual(result.record_count, 10)
+        self.assertGreater(result.file_size, 0)
+    
+    
+    def test_sleep_and_diaper_types_are_resolved_from_lookup_tables(self):
+        """测试睡眠和尿布表的类型列显示查找表中的名称"""
+        import csv
+        from baby_tracker.models.dto import DiaperDTO
+        from baby_tracker.repositories import SleepRepository, DiaperRepository
+        from tests.stand_ins import (
+            SleepRow, SleepDescRow, DiaperRow, DiaperDescRow, sqlite_session, stand_in
+        )
+        
+        session = sqlite_session()
+        session.add_all([
+            SleepDescRow(id='nap', name='小睡'),
+            DiaperDescRow(id='wet', name='湿'),
+            DiaperDescRow(id='dirty', name='脏'),
+        ])
+        session.commit()
+        health_service = self.service.health_service
+        health_service.sleep_repo = stand_in(SleepRepository, SleepRow)(session)
+        health_service.diaper_repo = stand_in(DiaperRepository, DiaperRow)(session)
+        time = (self.end_date - timedelta(hours=1)).timestamp()
+        health_service.sleep_repo.bulk_insert([
+            SleepDTO(id='s1', baby_id=self.baby.id, time=time, duration=60, desc_id='nap'),
+        ])
+        health_service.diaper_repo.bulk_insert([
+            DiaperDTO(id='d1', baby_id=self.baby.id, time=time, desc_id='dirty'),
+            DiaperDTO(id='d2', baby_id=self.baby.id, time=time - 60),
+        ])
+        
+        result = self.service.export_baby_data(self._make_request("csv", include_feeding=False))
+        self.assertTrue(result.success, result.error_message)
+        
+        def types_of(title):
+            path = os.path.join(self.service.export_dir, f"export_test_{title}.csv")
+            with open(path, encoding='utf-8') as f:
+                return [row['类型'] for row in csv.DictReader(f)]
+        
+        self.assertEqual(types_of('睡眠记录'), ['小睡'])
+        self.assertEqual(types_of('尿布记录'), ['脏', ''])
+    
+    def test_sections_are_read_concurrently_on_separate_sessions(self):
+        """测试各记录表在独立会话上并发读取，并按表写入导出文件"""
+        import zipfile
+        
+        def records_of(dto_class, count, **values):
+            return [
+                dto_class(id=str(uuid.uuid4()), baby_id=self.baby.id,
+                          time=(self.end_date - timedelta(hours=i)).timestamp(), **values)
+                for i in range(count)
+            ]
+        
+        health_service = self.service.health_service
+        health_service.sleep_repo.iter_by_date_range = mock.Mock(
+            return_value=iter(records_of(SleepDTO, 5, duration=90))
+        )
+        health_service.sleep_repo.get_desc_names = mock.Mock(return_value={})
+        health_service.weight_repo.iter_by_date_range = mock.Mock(
+            return_value=iter(records_of(WeightDTO, 3, weight=5200.0))
+        )
+        health_service.height_repo.iter_by_date_range = mock.Mock(
+            return_value=iter(records_of(HeightDTO, 2, height=58.0))
+        )
+        sessions = []
+        
+        def session_factory():
+            sessions.append(mock.MagicMock())
+            return sessions[-1]
+        
+        self.service.session_factory = session_factory
+        self.service._bind_repository = lambda repository, session: repository
+        self.service.section_batch_rows = 2
+        
+        with mock.patch(
+            'baby_tracker.services.export_service.FeedingService',
+            return_value=self.service.feeding_service
+        ):
+            result = self.service.export_baby_data(self._make_request("zip"))
+        self.assertTrue(result.success, result.error_message)
+        self.assertEqual(result.record_count, 20)
+        
+        with zipfile.ZipFile(result.file_path) as archive:
+            self.assertEqual(archive.namelist(), [
+                'export_test_宝宝信息.csv', 'export_test_喂养记录.csv',
+                'export_test_睡眠记录.csv', 'export_test_生长记录.csv'
+            ])
+            growth = archive.read('export_test_生长记录.csv').decode('utf-8').splitlines()
+        self.assertEqual(len(growth), 6)
+        self.assertIn('体重,5.2,公斤', growth[1])
+        
+        # 喂养、睡眠、尿布、生长四个表各使用一个会话，读取后关闭
+        self.assertEqual(len(sessions), 4)
+        self.assertTrue(all(session.close.called for session in sessions))
+
+
+class SectionSnapshotTest(unittest.TestCase):
+    """测试并发读取的各表在 SQLite 文件数据库上使用读取开始前的快照"""
+    
+    def setUp(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from tests.stand_ins import Base
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        url = f"sqlite:///{os.path.join(directory, 'export.db')}"
+        self.engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 20})
+        self.addCleanup(self.engine.dispose)
+        with self.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        
+        self.service = ExportService(mock.MagicMock(), session_factory=self.session_factory)
+        self.service.export_dir = directory
+    
+    def test_writes_during_export_are_invisible_to_every_section(self):
+        """测试一个表读取期间提交的写入，不会出现在随后才开始读取的表中"""
+        import threading
+        from tests.stand_ins import BabyRow
+        
+        written = threading.Event()
+        
+        def count_babies(session):
+            return session.query(BabyRow).count()
+        
+        def write_then_count(session):
+            writer = self.session_factory()
+            writer.add(BabyRow(id='late', name='导出期间新增'))
+            writer.commit()
+            writer.close()
+            written.set()
+            return [count_babies(session)]
+        
+        def count_after_write(session):
+            self.assertTrue(written.wait(5))
+            return [count_babies(session)]
+        
+        streams = self.service._iter_concurrently([write_then_count, count_after_write])
+        self.assertEqual([list(stream) for stream in streams], [[0], [0]])
+        
+        session = self.session_factory()
+        self.addCleanup(session.close)
+        self.assertEqual(count_babies(session), 1)
+
+
+class DeltaExportIndexTest(unittest.TestCase):
+    """测试增量导出用到的索引在模型上声明（create_all 建出的数据库与迁移一致）"""
+    
+    def test_models_declare_timestamp_indexes_from_migration(self):
+        import importlib.util
+        from baby_tracker.database import Base
+        import baby_tracker.models.activity  # noqa: F401
+        import baby_tracker.models.feeding  # noqa: F401
+        import baby_tracker.models.health  # noqa: F401
+        
+        path = os.path.join(
+            os.path.dirname(__file__), '..', 'alembic', 'versions', '00003_timestamp_indexes.py'
+        )
+        spec = importlib.util.spec_from_file_location('timestamp_indexes', path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        
+        for table in migration.EVENT_TABLES:
+            indexes = {
+                index.name: [column.name for column in index.columns]
+                for index in Base.metadata.tables[table].indexes
+            }
+            self.assertEqual(indexes.get(f'ix_{table}_BabyID_Timestamp'), ['BabyID', 'Timestamp'], table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+"""
+喂养服务测试：使用模拟的仓储数据测试喂养节律和喂养热力图
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from baby_tracker.models.dto import FinishSide, FormulaDTO, NursingDTO
+from baby_tracker.repositories import FormulaRepository, NursingRepository
+from baby_tracker.services.derived_data import DerivedDataService
+from baby_tracker.services.feeding_cadence import (
+    bucket_of, observe_feed, predict_next_feed, replay_feeds
+)
+from baby_tracker.services.feeding_heatmap import FeedingHeatmapStore
+from baby_tracker.services.feeding_service import FeedingService
+from tests.stand_ins import FormulaRow, NursingRow, sqlite_session, stand_in
+
+
+class FeedingCadenceTest(unittest.TestCase):
+    """测试喂养间隔的增量统计与下一次喂养预测"""
+    
+    def setUp(self):
+        self.start = datetime(2026, 10, 1, 8, 0)
+    
+    def _observe_all(self, feed_times):
+        cadences = {}
+        for feed_time in feed_times:
+            for cadence in observe_feed(list(cadences.values()), 'baby', feed_time.timestamp()):
+                cadences[cadence.bucket] = cadence
+        return list(cadences.values())
+    
+    def test_interval_counted_in_bucket_of_previous_feed(self):
+        """测试间隔计入上一次喂养所在的时段，近邻和补录的记录不改变统计"""
+        feeds = [self.start + timedelta(days=day, hours=hours) for day in range(4) for hours in (0, 5)]
+        cadences = self._observe_all(feeds + [
+            feeds[-1] + timedelta(minutes=10),  # 亲喂后补奶
+            self.start - timedelta(days=1),  # 补录的旧记录
+        ])
+        by_bucket = {cadence.bucket: cadence for cadence in cadences}
+        
+        morning = by_bucket[bucket_of(self.start.timestamp())]
+        self.assertEqual(morning.count, 4)
+        self.assertAlmostEqual(morning.mean, 5 * 3600)
+        self.assertAlmostEqual(morning.variance, 0)
+        # 13:00 到次日 08:00 的间隔超过上限，不计入
+        self.assertEqual(by_bucket[bucket_of(feeds[1].timestamp())].count, 0)
+        self.assertEqual(max(c.last_feed_time for c in cadences), feeds[-1].timestamp())
+    
+    def test_prediction_falls_back_to_pooled_statistics(self):
+        """测试时段样本不足时按全天汇总预测"""
+        feeds = [self.start + timedelta(hours=2 * index) for index in range(5)]
+        prediction = predict_next_feed(self._observe_all(feeds))
+        
+        self.assertTrue(prediction.pooled)
+        self.assertEqual(prediction.sample_count, 4)
+        self.assertEqual(prediction.expected_at, feeds[-1] + timedelta(hours=2))
+        self.assertIsNone(predict_next_feed(self._observe_all(feeds[:1])))
+    
+    def test_service_updates_cadence_after_insert(self):
+        """测试写入喂养记录后只读取并保存喂养节律表的几行"""
+        service = FeedingService(mock.MagicMock())
+        service.nursing_repository.create = mock.Mock(side_effect=lambda dto, commit=True: dto)
+        service.formula_repository.create = mock.Mock(side_effect=lambda dto, commit=True: dto)
+        service.aggregator.record = mock.Mock()
+        service.heatmap_store.add = mock.Mock()
+        stored = {}
+        service.feeding_cadence_repository.find_by_baby_id = mock.Mock(
+            side_effect=lambda baby_id: list(stored.values())
+        )
+        service.feeding_cadence_repository.save_all = mock.Mock(
+            side_effect=lambda dtos, commit=True: stored.update({dto.bucket: dto for dto in dtos})
+        )
+        
+        service.add_nursing_record('baby', self.start, FinishSide.LEFT, left_duration=10)
+        service.add_formula_record('baby', self.start + timedelta(hours=3), amount=90)
+        
+        self.assertEqual(service.feeding_cadence_repository.save_all.call_count, 2)
+        prediction = service.get_next_feeding_prediction('baby')
+        self.assertEqual(prediction.expected_at, self.start + timedelta(hours=6))
+    
+    def test_service_refreshes_last_feed_time_after_delete(self):
+        """测试删除最近一次喂养后，最近喂养时间按喂养记录重新读取，间隔统计不变"""
+        session = sqlite_session()
+        service = FeedingService(session)
+        service.nursing_repository = stand_in(NursingRepository, NursingRow)(session)
+        service.formula_repository = stand_in(FormulaRepository, FormulaRow)(session)
+        service.aggregator = mock.Mock()
+        service.heatmap_store = mock.Mock()
+        stored = {}
+        service.feeding_cadence_repository.find_by_baby_id = mock.Mock(
+            side_effect=lambda baby_id: list(stored.values())
+        )
+        service.feeding_cadence_repository.save_all = mock.Mock(
+            side_effect=lambda dtos, commit=True: stored.update({dto.bucket: dto for dto in dtos})
+        )
+        
+        service.add_formula_record('baby', self.start, amount=90)
+        service.add_nursing_record('baby', self.start + timedelta(hours=3), FinishSide.LEFT, left_duration=10)
+        last = service.add_formula_record('baby', self.start + timedelta(hours=6), amount=90)
+        morning = stored[bucket_of(self.start.timestamp())]
+        self.assertEqual(morning.count, 2)
+        
+        self.assertTrue(service.delete_feeding_record(last.id, 'formula'))
+        by_bucket = {cadence.bucket: cadence for cadence in stored.values()}
+        self.assertEqual(by_bucket[bucket_of(self.start.timestamp())].last_feed_time,
+                         (self.start + timedelta(hours=3)).timestamp())
+        self.assertIsNone(by_bucket[bucket_of(last.time)].last_feed_time)
+        self.assertEqual(by_bucket[bucket_of(self.start.timestamp())].count, 2)
+        prediction = service.get_next_feeding_prediction('baby')
+        self.assertEqual(prediction.last_feed_at, self.start + timedelta(hours=3))
+    
+    def test_record_and_derived_updates_share_one_transaction(self):
+        """测试派生数据更新失败时，喂养记录随之回滚；成功时记录和派生数据只提交一次"""
+        session = sqlite_session()
+        service = FeedingService(session)
+        service.formula_repository = stand_in(FormulaRepository, FormulaRow)(session)
+        service.nursing_repository = stand_in(NursingRepository, NursingRow)(session)
+        service.feeding_cadence_repository = mock.Mock(find_by_baby_id=mock.Mock(return_value=[]))
+        service.aggregator = mock.Mock()
+        service.heatmap_store = mock.Mock()
+        service.heatmap_store.add.side_effect = RuntimeError("heatmap write failed")
+        
+        with self.assertRaises(RuntimeError):
+            service.add_formula_record('baby', self.start, amount=90)
+        self.assertEqual(session.query(FormulaRow).count(), 0)
+        
+        service.heatmap_store.add.side_effect = None
+        with mock.patch.object(session, 'commit', wraps=session.commit) as commit:
+            record = service.add_formula_record('baby', self.start, amount=90)
+        commit.assert_called_once()
+        self.assertEqual(session.query(FormulaRow).count(), 1)
+        service.aggregator.record.assert_called_with('formula', record, commit=False)
+        service.heatmap_store.add.assert_called_with('formula', record, commit=False)
+        
+        service.aggregator.rebuild.side_effect = RuntimeError("aggregate write failed")
+        with self.assertRaises(RuntimeError):
+            service.delete_feeding_record(record.id, 'formula')
+        self.assertEqual(session.query(FormulaRow).count(), 1)
+    
+    def test_rebuild_replays_history_in_time_order(self):
+        """测试按时间顺序重放全部母乳和配方奶记录，结果与逐条写入时的增量统计一致"""
+        feeds = [self.start + timedelta(days=day, hours=hours) for day in range(3) for hours in (0, 3, 5)]
+        session = sqlite_session()
+        for index, feed in enumerate(reversed(feeds)):
+            row_class = NursingRow if index % 2 else FormulaRow
+            session.add(row_class(id=f'feed-{index}', baby_id='baby', time=feed.timestamp()))
+        session.add(FormulaRow(id='other', baby_id='other', time=self.start.timestamp()))
+        session.commit()
+        
+        service = DerivedDataService(session)
+        service.repositories.update({
+            'nursing': stand_in(NursingRepository, NursingRow)(session),
+            'formula': stand_in(FormulaRepository, FormulaRow)(session),
+        })
+        service.feeding_cadence_repository.replace_all = mock.Mock()
+        cadences = service.rebuild_feeding_cadence('baby')
+        
+        expected = sorted(self._observe_all(feeds), key=lambda cadence: cadence.bucket)
+        self.assertEqual(
+            [(c.bucket, c.count, c.last_feed_time) for c in cadences],
+            [(c.bucket, c.count, c.last_feed_time) for c in expected]
+        )
+        for actual, incremental in zip(cadences, expected):
+            self.assertAlmostEqual(actual.mean, incremental.mean)
+            self.assertAlmostEqual(actual.variance, incremental.variance)
+        service.feeding_cadence_repository.replace_all.assert_called_once_with('baby', cadences)
+        self.assertEqual(replay_feeds('baby', []), [])
+
+
+class FeedingHeatmapTest(unittest.TestCase):
+    """测试按周保存的 星期 × 小时 热力图"""
+    
+    def setUp(self):
+        self.store = FeedingHeatmapStore(mock.MagicMock())
+        self.stored = {}
+        repository = self.store.repository
+        repository.get_week = mock.Mock(
+            side_effect=lambda baby_id, feed_type, week_start: self.stored.get((feed_type, week_start))
+        )
+        repository.save = mock.Mock(
+            side_effect=lambda dto, commit=True: self.stored.__setitem__((dto.feed_type, dto.week_start), dto)
+        )
+        repository.find_by_week_range = mock.Mock(side_effect=lambda baby_id, feed_types, first, last: [
+            dto for (feed_type, week_start), dto in self.stored.items()
+            if feed_type in feed_types and first <= week_start <= last
+        ])
+        # 2026-10-05 是周一
+        self.monday = datetime(2026, 10, 5)
+    
+    def _formula(self, day, hour, amount):
+        time = (self.monday + timedelta(days=day, hours=hour)).timestamp()
+        return FormulaDTO(baby_id='baby', time=time, amount=amount)
+    
+    def test_sum_over_range_masks_partial_weeks(self):
+        """测试跨周求和，首末两周只计入范围内的日期"""
+        for week in range(3):
+            self.store.add('formula', self._formula(7 * week, 9, 100))  # 周一 09:00
+            self.store.add('formula', self._formula(7 * week + 5, 21, 80))  # 周六 21:00
+        self.store.add('nursing', NursingDTO(
+            baby_id='baby', time=(self.monday + timedelta(hours=9)).timestamp(), left_duration=15
+        ))
+        self.assertEqual(len(self.stored), 4)
+        
+        # 第一周周三到第三周周一
+        heatmap = self.store.get_heatmap(
+            'baby', self.monday + timedelta(days=2), self.monday + timedelta(days=14)
+        )
+        self.assertEqual(heatmap.counts[0, 9], 2)
+        self.assertEqual(heatmap.counts[5, 21], 2)
+        self.assertEqual(heatmap.amounts[5, 21], 160)
+        self.assertEqual(heatmap.counts.sum(), 4)
+        
+        formula_only = self.store.get_heatmap('baby', self.monday, self.monday, ['formula'])
+        self.assertEqual(formula_only.amounts[0, 9], 100)
+        self.assertEqual(formula_only.hourly_counts[9], 1)
+    
+    def test_remove_reverts_cell(self):
+        """测试修改或删除记录时撤销原记录的计数"""
+        record = self._formula(1, 3, 120)
+        self.store.add('formula', record)
+        self.store.remove('formula', record)
+        
+        heatmap = self.store.get_heatmap('baby', self.monday, self.monday + timedelta(days=6))
+        self.assertEqual(heatmap.counts.sum(), 0)
+        self.assertEqual(heatmap.amounts.sum(), 0)
+    
+    def test_backfill_matches_incremental_updates(self):
+        """测试一条 GROUP BY 回填的矩阵与逐条写入时的增量结果一致，可只替换指定的周"""
+        records = [
+            self._formula(day, hour, 30 + day + hour)
+            for day in (0, 2, 6, 9, 13, 15) for hour in (0, 9, 23)
+        ]
+        records.append(self._formula(2, 9, 50))  # 同一格的第二条记录
+        session = sqlite_session()
+        for index, record in enumerate(records):
+            self.store.add('formula', record)
+            session.add(FormulaRow(id=f'formula-{index}', baby_id='baby', time=record.time, amount=record.amount))
+        session.add(FormulaRow(id='other', baby_id='other', time=records[0].time, amount=10))
+        session.commit()
+        
+        service = DerivedDataService(session)
+        service.repositories['formula'] = stand_in(FormulaRepository, FormulaRow)(session)
+        service.heatmap_store.repository.replace_weeks = mock.Mock()
+        service.rebuild_feeding_heatmap('baby', 'formula')
+        
+        baby_id, feed_type, weeks, dtos = service.heatmap_store.repository.replace_weeks.call_args.args
+        self.assertIsNone(weeks)
+        self.assertEqual(
+            {dto.week_start: (dto.counts, dto.amounts) for dto in dtos},
+            {week_start: (dto.counts, dto.amounts) for (_, week_start), dto in self.stored.items()}
+        )
+        
+        second_week = (self.monday + timedelta(days=7)).date().isoformat()
+        service.rebuild_feeding_heatmap('baby', 'formula', [second_week])
+        baby_id, feed_type, weeks, dtos = service.heatmap_store.repository.replace_weeks.call_args.args
+        self.assertEqual(weeks, [second_week])
+        self.assertEqual([dto.week_start for dto in dtos], [second_week])
+        self.assertEqual(dtos[0].counts, self.stored[('formula', second_week)].counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+WHO 生长标准测试：校验 LMS 计算结果，并用模拟数据测试生长发育分析
+"""
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+from baby_tracker.models.dto import BabyDTO, Gender
+from baby_tracker.services import growth_standards
+from baby_tracker.services.analytics_service import AnalyticsService
+
+
+class GrowthStandardsTest(unittest.TestCase):
+    """测试 growth_standards 模块"""
+    
+    def test_median_is_fiftieth_percentile(self):
+        """测试各测量项目的中位数对应第 50 百分位"""
+        for measure in growth_standards.MEASURES:
+            for gender in Gender:
+                l, m, s = growth_standards.lms(measure, gender, 180)
+                percentile = growth_standards.percentiles(measure, gender, 180, m)
+                self.assertAlmostEqual(float(percentile), 50.0, places=4)
+    
+    def test_z_scores_match_who_reference_values(self):
+        """测试出生时男孩体重的 ±2SD（WHO 表中约为 2.5kg 和 4.4kg）"""
+        low, high = growth_standards.reference_values('weight', Gender.MALE, 0, [-2, 2])
+        self.assertAlmostEqual(float(low), 2.5, places=1)
+        self.assertAlmostEqual(float(high), 4.4, places=1)
+        
+        z = growth_standards.z_scores('weight', Gender.MALE, [0, 0], [low, high])
+        np.testing.assert_allclose(z, [-2, 2], atol=1e-6)
+    
+    def test_vectorized_batch_with_mixed_sex(self):
+        """测试一次调用处理多个宝宝，超出标准月龄范围的结果为 NaN"""
+        sex = np.array([Gender.MALE.value, Gender.FEMALE.value, Gender.MALE.value])
+        age_days = np.array([0, 0, 1000])
+        result = growth_standards.percentiles('weight', sex, age_days, [3.3464, 3.2322, 12.0])
+        
+        self.assertEqual(result.shape, (3,))
+        np.testing.assert_allclose(result[:2], [50, 50], atol=1e-4)
+        self.assertTrue(np.isnan(result[2]))
+    
+    def test_growth_analysis_uses_who_percentiles(self):
+        """测试 get_growth_analysis 填充体重、身高及其百分位"""
+        now = datetime.now()
+        baby = BabyDTO(id=str(uuid.uuid4()), dob=(now - timedelta(days=90)).timestamp(), gender=Gender.FEMALE)
+        
+        service = AnalyticsService(mock.MagicMock())
+        service.baby_service.get_baby = mock.Mock(return_value=baby)
+        service.health_service.get_growth_measurements = mock.Mock(return_value={
+            'weight': [((now - timedelta(days=30)).timestamp(), 5000.0), (now.timestamp(), 5900.0)],
+            'height': [(now.timestamp(), 59.8)],
+            'head': []
+        })
+        
+        analysis = service.get_growth_analysis(baby.id, now - timedelta(days=30), now)
+        
+        self.assertEqual(analysis.weight_gain, 900.0)
+        self.assertEqual(analysis.height_start, 59.8)
+        self.assertEqual(len(analysis.weight_data['percentiles']), 2)
+        self.assertAlmostEqual(analysis.weight_percentile, 50, delta=5)
+        self.assertAlmostEqual(analysis.height_percentile, 50, delta=5)
+        self.assertEqual(len(analysis.who_standard_weight['dates']), 31)
+        self.assertLess(analysis.who_standard_height['p3'][0], analysis.who_standard_height['p97'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
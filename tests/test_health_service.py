@@ -0,0 +1,118 @@
+"""
+健康服务测试：使用模拟的仓储数据测试健康统计
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from baby_tracker.services.health_service import HealthService
+from baby_tracker.services.sleep_intervals import merge_intervals, summarize_sleep
+
+
+class GrowthVelocityTest(unittest.TestCase):
+    """测试生长速度与趋势"""
+    
+    def setUp(self):
+        self.service = HealthService(mock.MagicMock())
+        self.now = datetime.now()
+    
+    def _series(self, start_value, daily_change, days):
+        return [
+            ((self.now - timedelta(days=days - day)).timestamp(), start_value + daily_change * day)
+            for day in range(days)
+        ]
+    
+    def test_velocities_for_batch_of_babies(self):
+        """测试一次查询每个测量项目，并为每个宝宝分别拟合斜率"""
+        self.service.weight_repo.get_measurements_for_babies = mock.Mock(return_value={
+            'a': self._series(4000, 30, 10),
+            'b': self._series(6000, -10, 10),
+            'c': [(self.now.timestamp(), 5000)],
+        })
+        self.service.height_repo.get_measurements_for_babies = mock.Mock(return_value={
+            'a': self._series(55, 0.1, 15), 'b': [], 'c': []
+        })
+        self.service.head_repo.get_measurements_for_babies = mock.Mock(return_value={
+            'a': self._series(38, 0, 5), 'b': [], 'c': []
+        })
+        
+        velocities = self.service.get_growth_velocities(['a', 'b', 'c'], days=30)
+        
+        self.service.weight_repo.get_measurements_for_babies.assert_called_once()
+        self.assertAlmostEqual(velocities['a'].weight_velocity, 30, places=3)
+        self.assertEqual(velocities['a'].weight_trend, "increasing")
+        self.assertAlmostEqual(velocities['a'].height_velocity, 0.7, places=3)
+        self.assertEqual(velocities['a'].height_trend, "increasing")
+        self.assertAlmostEqual(velocities['a'].head_velocity, 0, places=6)
+        self.assertEqual(velocities['a'].head_trend, "stable")
+        
+        self.assertAlmostEqual(velocities['b'].weight_velocity, -10, places=3)
+        self.assertEqual(velocities['b'].weight_trend, "decreasing")
+        self.assertIsNone(velocities['b'].height_velocity)
+        
+        # 只有一次测量时无法拟合
+        self.assertIsNone(velocities['c'].weight_velocity)
+        self.assertEqual(velocities['c'].weight_trend, "stable")
+
+
+
+class SleepIntervalTest(unittest.TestCase):
+    """测试睡眠区间合并与按天汇总"""
+    
+    def _at(self, day, hour, minute=0):
+        return datetime(2026, 10, 1 + day, hour, minute).timestamp()
+    
+    def test_merge_overlapping_intervals(self):
+        """测试重叠和相接的记录合并为一个时段"""
+        merged = list(merge_intervals([(0, 10), (5, 20), (20, 30), (40, 50), (45, 46)]))
+        self.assertEqual(merged, [(0, 30), (40, 50)])
+    
+    def test_overnight_sleep_is_split_across_days(self):
+        """测试跨夜睡眠拆分到前后两天，并统计最长睡眠和清醒时长"""
+        summary = summarize_sleep([
+            (self._at(0, 13), self._at(0, 14)),  # 白天小睡 60 分钟
+            (self._at(0, 21), self._at(1, 5)),  # 夜间睡眠 8 小时
+            (self._at(0, 22), self._at(0, 23)),  # 与夜间睡眠重叠的重复记录
+        ], datetime(2026, 10, 1), datetime(2026, 10, 3))
+        
+        self.assertEqual(summary.record_count, 3)
+        self.assertEqual(summary.session_count, 2)
+        self.assertAlmostEqual(summary.total_minutes, 540)
+        self.assertEqual(summary.daily_minutes, {'2026-10-01': 240, '2026-10-02': 300})
+        self.assertEqual(summary.daily_day_minutes, {'2026-10-01': 60})
+        self.assertEqual(summary.daily_night_minutes, {'2026-10-01': 180, '2026-10-02': 300})
+        self.assertAlmostEqual(summary.longest_stretch_minutes, 480)
+        self.assertEqual(summary.wake_windows, [420])
+    
+    def test_sleep_stats_clip_to_period(self):
+        """测试统计期间之前开始的睡眠只计入期间内的部分"""
+        service = HealthService(mock.MagicMock())
+        service.sleep_repo.iter_intervals = mock.Mock(return_value=iter([
+            (self._at(0, 22), self._at(1, 6))
+        ]))
+        
+        summary = service.get_sleep_summary('baby', datetime(2026, 10, 2), datetime(2026, 10, 3))
+        self.assertEqual(summary.daily_minutes, {'2026-10-02': 360})
+    
+    def test_weekly_average_sleep_counts_days_with_sleep(self):
+        """测试一周平均睡眠时长按有睡眠记录的日子计算（小时）"""
+        service = HealthService(mock.MagicMock())
+        service.sleep_repo.iter_intervals = mock.Mock(return_value=iter([
+            (self._at(0, 22), self._at(1, 6)),
+            (self._at(1, 13), self._at(1, 15)),
+        ]))
+        
+        self.assertAlmostEqual(service.get_weekly_average_sleep('baby', datetime(2026, 10, 3)), 5.0)
+    
+    def test_repository_weekly_average_delegates_to_service(self):
+        """测试仓储上保留的一周平均睡眠时长与 HealthService 的计算一致"""
+        from baby_tracker.repositories import SleepRepository
+        
+        intervals = [(self._at(0, 22), self._at(1, 6)), (self._at(1, 13), self._at(1, 15))]
+        with mock.patch.object(SleepRepository, 'iter_intervals', return_value=iter(intervals)):
+            average = SleepRepository(mock.MagicMock()).get_weekly_average_sleep('baby', datetime(2026, 10, 3))
+        self.assertAlmostEqual(average, 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
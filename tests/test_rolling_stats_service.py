@@ -0,0 +1,75 @@
+"""
+滚动统计服务测试：在内存 SQLite 上用替身模型验证窗口函数 SQL
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from baby_tracker.repositories import FormulaRepository
+from baby_tracker.services.rolling_stats_service import RollingStatsService
+from tests.stand_ins import FormulaRow, sqlite_session, stand_in
+
+
+class RollingStatsTest(unittest.TestCase):
+    """测试 get_rolling_stats"""
+    
+    def setUp(self):
+        self.session = sqlite_session()
+        self.service = RollingStatsService(self.session)
+        self.service.repositories['formula'] = stand_in(FormulaRepository, FormulaRow)(self.session)
+        
+        # 10月1日起每天两次，每隔三天缺一天；另一个宝宝的记录不应计入
+        start = datetime(2026, 10, 1)
+        for day in range(20):
+            if day % 3 == 2:
+                continue
+            for hour in (8, 20):
+                time = (start + timedelta(days=day, hours=hour)).timestamp()
+                self.session.add(FormulaRow(id=f"{day}-{hour}", baby_id='baby', time=time, amount=100 + day))
+        self.session.add(FormulaRow(id='other', baby_id='other', time=start.timestamp() + 3600, amount=999))
+        self.session.commit()
+    
+    def tearDown(self):
+        self.session.close()
+    
+    def test_moving_windows(self):
+        """测试移动合计、日均和记录数与逐日计算的结果一致"""
+        stats = self.service.get_rolling_stats(
+            'baby', 'formula_amount', datetime(2026, 10, 5), datetime(2026, 10, 12), windows=(3, 7)
+        )
+        
+        daily = {day: (0.0 if day % 3 == 2 else 2 * (100 + day)) for day in range(-10, 20)}
+        self.assertEqual(len(stats.dates), 8)
+        self.assertEqual(str(stats.dates[0]), '2026-10-05')
+        self.assertEqual(stats.daily_values.tolist(), [daily[day] for day in range(4, 12)])
+        for window in (3, 7):
+            expected = [
+                sum(daily[d] for d in range(day - window + 1, day + 1) if d >= 0) for day in range(4, 12)
+            ]
+            self.assertEqual(stats.moving_sum[window].tolist(), expected)
+            for average, total in zip(stats.moving_average[window], expected):
+                self.assertAlmostEqual(average, total / window)
+        
+        # 10月5日的 7 日窗口包含 10月1日至5日，其中 10月3日没有记录
+        self.assertEqual(stats.moving_count[7][0], 8)
+        self.assertEqual(stats.to_dict()['windows']['3']['count'][0], 4)
+    
+    def test_count_metric_and_empty_range(self):
+        """测试按记录数统计的指标以及没有记录的日期范围"""
+        stats = self.service.get_rolling_stats(
+            'baby', 'formula_count', datetime(2026, 10, 1), datetime(2026, 10, 3), windows=(2,)
+        )
+        self.assertEqual(stats.daily_values.tolist(), [2, 2, 0])
+        self.assertEqual(stats.moving_sum[2].tolist(), [2, 4, 2])
+        self.assertEqual(stats.moving_average[2].tolist(), [1, 2, 1])
+        
+        empty = self.service.get_rolling_stats(
+            'baby', 'formula_amount', datetime(2027, 1, 1), datetime(2027, 1, 3), windows=(7,)
+        )
+        self.assertEqual(empty.moving_sum[7].tolist(), [0, 0, 0])
+        
+        with self.assertRaises(ValueError):
+            self.service.get_rolling_stats('baby', 'unknown', datetime(2026, 10, 1), datetime(2026, 10, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
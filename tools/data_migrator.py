@@ -4,12 +4,18 @@
 """
 import os
 import sys
+import json
+import hashlib
 import sqlite3
 import uuid
 import logging
 import argparse
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 # 添加项目根目录到 Python 路径
@@ -18,38 +24,174 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'
 from baby_tracker.database import engine, get_db
 from baby_tracker.models.dto import (
     BabyDTO, NursingDTO, FormulaDTO, SleepDTO, DiaperDTO,
-    WeightDTO, HeightDTO, TemperatureDTO, Gender, FinishSide,
+    WeightDTO, HeightDTO, HeadDTO, TemperatureDTO, Gender, FinishSide,
     PlaytimeDTO, BathDTO, PhotoDTO, VideoDTO
 )
 from baby_tracker.services import (
     BabyService, FeedingService, HealthService, ActivityService
 )
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("data_migration.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("data_migration")
 
+# 缺失或为 NULL 时使用迁移时刻的时间戳
+CURRENT_TIMESTAMP = object()
+
+# 记录表的公共列：(列名, 缺失或为 NULL 时的默认值)
+RECORD_COLUMNS = [('ID', None), ('BabyID', None), ('Time', None), ('Note', None), ('HasPicture', 0)]
+
+# 批量迁移的数据表（按依赖顺序）：统计键 -> (表名, 列)，新旧数据库中表名和列名一致
+TABLE_MAPPINGS = {
+    'baby': ('Baby', [
+        ('ID', None), ('Name', None), ('DOB', None), ('DueDay', None), ('Gender', 0),
+        ('Picture', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'nursing': ('Nursing', RECORD_COLUMNS + [
+        ('DescID', None), ('FinishSide', 2), ('LeftDuration', 0), ('RightDuration', 0),
+        ('BothDuration', 0), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'formula': ('Formula', RECORD_COLUMNS + [
+        ('DescID', None), ('Amount', 0.0), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'sleep': ('Sleep', RECORD_COLUMNS + [
+        ('DescID', None), ('Duration', 0), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'diaper': ('Diaper', RECORD_COLUMNS + [
+        ('DescID', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'weight': ('Weight', RECORD_COLUMNS + [('Weight', None), ('Timestamp', CURRENT_TIMESTAMP)]),
+    'height': ('Height', RECORD_COLUMNS + [('Height', None), ('Timestamp', CURRENT_TIMESTAMP)]),
+    'head': ('Head', RECORD_COLUMNS + [('Head', None), ('Timestamp', CURRENT_TIMESTAMP)]),
+    'temperature': ('Temperature', RECORD_COLUMNS + [
+        ('Temperature', None), ('Location', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'playtime': ('Playtime', RECORD_COLUMNS + [
+        ('Duration', 0), ('PlayType', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'bath': ('Bath', RECORD_COLUMNS + [
+        ('Duration', 0), ('WaterTemperature', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'photo': ('Photo', RECORD_COLUMNS + [
+        ('FilePath', None), ('Description', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+    'video': ('Video', RECORD_COLUMNS + [
+        ('FilePath', None), ('Duration', 0), ('Description', None), ('Timestamp', CURRENT_TIMESTAMP)
+    ]),
+}
+
+# 查找表及其列
+LOOKUP_TABLES = ['DiaperDesc', 'NursingDesc', 'FormulaDesc', 'SleepDesc']
+LOOKUP_COLUMNS = [('ID', None), ('Name', None), ('DisplayOrder', 0)]
+
+# 批量迁移在目标数据库中记录进度和失败记录的表
+CHECKPOINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS MigrationCheckpoint (
+    SourceTable TEXT PRIMARY KEY,
+    LastRowID INTEGER NOT NULL DEFAULT 0,
+    Migrated INTEGER NOT NULL DEFAULT 0,
+    Failed INTEGER NOT NULL DEFAULT 0,
+    Finished INTEGER NOT NULL DEFAULT 0,
+    Timestamp REAL NOT NULL
+)
+"""
+REJECT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS MigrationReject (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    SourceTable TEXT NOT NULL,
+    SourceRowID INTEGER NOT NULL,
+    RecordID TEXT,
+    Error TEXT,
+    Data TEXT,
+    Timestamp REAL NOT NULL
+)
+"""
+# 加载期间删除的索引：与删除索引在同一事务中写入，重建后删除；进程中途退出时下次运行开始时重建
+PENDING_INDEX_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS MigrationPendingIndex (
+    Name TEXT PRIMARY KEY,
+    TableName TEXT NOT NULL,
+    SQL TEXT NOT NULL,
+    Timestamp REAL NOT NULL
+)
+"""
+
+
+def _get_mapping_columns(table):
+    """表的列映射（在工作进程中按表名查找，保证默认值哨兵是同一个对象）"""
+    if table in LOOKUP_TABLES:
+        return LOOKUP_COLUMNS
+    for mapped_table, columns in TABLE_MAPPINGS.values():
+        if mapped_table == table:
+            return columns
+    raise ValueError(f"未知的迁移表: {table}")
+
+
+def _stage_table_range(old_db_path, staging_path, table, first_rowid, last_rowid, batch_size):
+    """
+    工作进程：把旧表中一个 rowid 区间的数据转换后写入独立的暂存 SQLite 文件
+    
+    暂存表没有任何约束，写入不会失败；约束冲突在合并阶段处理。
+    每行附带旧表中的 rowid（SourceRowID 列），用于记录失败的行。返回写入的行数。
+    """
+    columns = _get_mapping_columns(table)
+    old_conn = sqlite3.connect(f"file:{old_db_path}?mode=ro", uri=True)
+    staging = sqlite3.connect(staging_path)
+    try:
+        source_columns = DataMigrator._get_table_columns(old_conn, table)
+        select_list = ", ".join(
+            f'"{name}"' if name in source_columns else "NULL" for name, _ in columns
+        )
+        staging.execute("PRAGMA journal_mode=OFF")
+        staging.execute("PRAGMA synchronous=OFF")
+        staged_columns = [('SourceRowID', None)] + list(columns)
+        names = ", ".join(f'"{name}"' for name, _ in staged_columns)
+        staging.execute(f'CREATE TABLE "{table}" ({names})')
+        insert_sql = DataMigrator._insert_sql(table, staged_columns)
+        
+        now = datetime.now().timestamp()
+        count = 0
+        cursor = old_conn.execute(
+            f'SELECT rowid, {select_list} FROM "{table}" WHERE rowid BETWEEN ? AND ? ORDER BY rowid',
+            (first_rowid, last_rowid)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            staging.executemany(insert_sql, [
+                (row[0],) + DataMigrator._apply_defaults(row[1:], columns, now) for row in rows
+            ])
+            count += len(rows)
+        staging.commit()
+        return count
+    finally:
+        old_conn.close()
+        staging.close()
+
 
 class DataMigrator:
     """数据迁移工具类"""
     
-    def __init__(self, old_db_path, new_db_url=None):
+    # 批量模式下每写入多少行提交一次事务
+    commit_rows = 100000
+    # 并行模式下大表按 rowid 拆分，每个区间约包含的行数
+    parallel_chunk_rows = 250000
+    
+    def __init__(self, old_db_path, new_db_url=None, batch_size=5000, progress_every=100000, resume=False):
         """
         初始化迁移工具
         
         Args:
             old_db_path (str): 旧数据库文件路径
             new_db_url (str): 新数据库URL，如果为None则使用默认URL
+            batch_size (int): 批量模式每批读取和写入的行数
+            progress_every (int): 批量模式每迁移多少行输出一次进度
+            resume (bool): 批量模式从上次中断的检查点继续迁移
         """
         self.old_db_path = old_db_path
         self.new_db_url = new_db_url or "sqlite:///data/baby_tracker_new.db"
+        self.batch_size = batch_size
+        self.progress_every = progress_every
+        self.resume = resume
         self.old_conn = None
         self.new_engine = None
         self.session = None
@@ -67,6 +209,7 @@ class DataMigrator:
             'diaper': {'total': 0, 'migrated': 0, 'failed': 0},
             'weight': {'total': 0, 'migrated': 0, 'failed': 0},
             'height': {'total': 0, 'migrated': 0, 'failed': 0},
+            'head': {'total': 0, 'migrated': 0, 'failed': 0},
             'temperature': {'total': 0, 'migrated': 0, 'failed': 0},
             'playtime': {'total': 0, 'migrated': 0, 'failed': 0},
             'bath': {'total': 0, 'migrated': 0, 'failed': 0},
@@ -477,50 +620,25 @@ class DataMigrator:
         """迁移查找表数据"""
         logger.info("开始迁移查找表数据...")
         
-        # 迁移尿布描述
+        names = {
+            'DiaperDesc': "尿布描述",
+            'NursingDesc': "喂养描述",
+            'FormulaDesc': "配方奶描述",
+            'SleepDesc': "睡眠描述",
+        }
         cursor = self.old_conn.cursor()
-        cursor.execute("SELECT * FROM DiaperDesc")
-        rows = cursor.fetchall()
-        for row in rows:
-            try:
-                query = f"INSERT INTO DiaperDesc (ID, Name, DisplayOrder) VALUES ('{row['ID']}', '{row['Name']}', {row.get('DisplayOrder', 0)})"
-                self.session.execute(query)
-                logger.info(f"迁移尿布描述成功: {row['Name']}")
-            except Exception as e:
-                logger.error(f"迁移尿布描述失败: {row['ID']} - {e}")
-        
-        # 迁移喂养描述
-        cursor.execute("SELECT * FROM NursingDesc")
-        rows = cursor.fetchall()
-        for row in rows:
-            try:
-                query = f"INSERT INTO NursingDesc (ID, Name, DisplayOrder) VALUES ('{row['ID']}', '{row['Name']}', {row.get('DisplayOrder', 0)})"
-                self.session.execute(query)
-                logger.info(f"迁移喂养描述成功: {row['Name']}")
-            except Exception as e:
-                logger.error(f"迁移喂养描述失败: {row['ID']} - {e}")
-        
-        # 迁移配方奶描述
-        cursor.execute("SELECT * FROM FormulaDesc")
-        rows = cursor.fetchall()
-        for row in rows:
-            try:
-                query = f"INSERT INTO FormulaDesc (ID, Name, DisplayOrder) VALUES ('{row['ID']}', '{row['Name']}', {row.get('DisplayOrder', 0)})"
-                self.session.execute(query)
-                logger.info(f"迁移配方奶描述成功: {row['Name']}")
-            except Exception as e:
-                logger.error(f"迁移配方奶描述失败: {row['ID']} - {e}")
-        
-        # 迁移睡眠描述
-        cursor.execute("SELECT * FROM SleepDesc")
-        rows = cursor.fetchall()
-        for row in rows:
-            try:
-                query = f"INSERT INTO SleepDesc (ID, Name, DisplayOrder) VALUES ('{row['ID']}', '{row['Name']}', {row.get('DisplayOrder', 0)})"
-                self.session.execute(query)
-                logger.info(f"迁移睡眠描述成功: {row['Name']}")
-            except Exception as e:
-                logger.error(f"迁移睡眠描述失败: {row['ID']} - {e}")
+        for table in LOOKUP_TABLES:
+            query = text(self._insert_sql(table, LOOKUP_COLUMNS, named=True))
+            cursor.execute(f'SELECT * FROM "{table}"')
+            for row in cursor.fetchall():
+                try:
+                    params = {name: row[name] if name in row.keys() else None for name, _ in LOOKUP_COLUMNS}
+                    if params['DisplayOrder'] is None:
+                        params['DisplayOrder'] = 0
+                    self.session.execute(query, params)
+                    logger.info(f"迁移{names[table]}成功: {row['Name']}")
+                except Exception as e:
+                    logger.error(f"迁移{names[table]}失败: {row['ID']} - {e}")
         
         self.session.commit()
         logger.info("查找表数据迁移完成")
@@ -570,6 +688,675 @@ class DataMigrator:
             if self.session:
                 self.session.close()
     
+    def migrate_bulk(self):
+        """
+        批量迁移所有数据
+        
+        不经过服务层：用 fetchmany 分批读取旧表，用 executemany 分批写入新表，
+        每 commit_rows 行提交一次事务；加载期间删除目标表的索引，加载完成后重建。
+        目标数据库需为已建好表结构的 SQLite 数据库。
+        
+        每次提交时在 MigrationCheckpoint 表中记录各源表已迁移到的 rowid，
+        resume 为 True 时从检查点继续；无法写入的行记录到 MigrationReject 表，不中止迁移。
+        """
+        try:
+            logger.info(f"连接到旧数据库: {self.old_db_path}")
+            self.old_conn = sqlite3.connect(self.old_db_path)
+            logger.info(f"连接到新数据库: {self.new_db_url}")
+            target = self._connect_target()
+        except Exception as e:
+            logger.error(f"连接数据库失败: {e}")
+            return False
+        
+        try:
+            self._prepare_checkpoints(target)
+            self._restore_pending_indexes(target)
+            
+            # 先迁移查找表和宝宝数据，再迁移其他数据
+            for table in LOOKUP_TABLES:
+                self._bulk_copy_table(target, table, LOOKUP_COLUMNS)
+            for category, (table, columns) in TABLE_MAPPINGS.items():
+                self._bulk_copy_table(target, table, columns, self.stats[category])
+            
+            self.print_stats()
+            logger.info("所有数据批量迁移完成")
+            return True
+        except Exception as e:
+            logger.error(f"批量迁移过程中出错: {e}")
+            return False
+        finally:
+            self.old_conn.close()
+            target.close()
+    
+    def migrate_parallel(self, workers):
+        """
+        并行迁移所有数据
+        
+        各表（大表按 rowid 区间拆分）在进程池中转换并写入各自的暂存 SQLite 文件，
+        随后由单个写入者按依赖顺序 ATTACH 暂存文件，用 INSERT … SELECT 合并到新数据库。
+        
+        与批量模式共用 MigrationCheckpoint 表：每个分片与检查点在同一事务中提交，
+        resume 为 True 时只暂存检查点之后的行；与目标库主键冲突或违反约束的行记录到
+        MigrationReject 表并计为失败。
+        """
+        try:
+            logger.info(f"连接到旧数据库: {self.old_db_path}")
+            self.old_conn = sqlite3.connect(self.old_db_path)
+            logger.info(f"连接到新数据库: {self.new_db_url}")
+            target = self._connect_target()
+        except Exception as e:
+            logger.error(f"连接数据库失败: {e}")
+            return False
+        
+        target_path = make_url(self.new_db_url).database
+        staging_dir = tempfile.mkdtemp(prefix="migration-", dir=os.path.dirname(os.path.abspath(target_path)))
+        try:
+            self._prepare_checkpoints(target)
+            self._restore_pending_indexes(target)
+            tasks = self._plan_staging_tasks(target, staging_dir)
+            self.old_conn.close()
+            logger.info(f"使用 {workers} 个进程暂存 {len(tasks)} 个数据分片")
+            
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        _stage_table_range, self.old_db_path, staging_path,
+                        table, first_rowid, last_rowid, self.batch_size
+                    )
+                    for table, staging_path, first_rowid, last_rowid in tasks
+                ]
+                # 按依赖顺序合并，已完成的分片在其他分片暂存期间即可写入
+                self._merge_staged_tables(target, tasks, futures)
+            
+            # 统计包含之前运行中已迁移的部分
+            for category, (table, _) in TABLE_MAPPINGS.items():
+                _, migrated, failed, _ = self._load_checkpoint(target, table)
+                self.stats[category]['total'] += migrated + failed
+                self.stats[category]['migrated'] += migrated
+                self.stats[category]['failed'] += failed
+            
+            self.print_stats()
+            logger.info("所有数据并行迁移完成")
+            return True
+        except Exception as e:
+            logger.error(f"并行迁移过程中出错: {e}")
+            return False
+        finally:
+            self.old_conn.close()
+            if target.in_transaction:
+                target.rollback()
+            target.close()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    def _plan_staging_tasks(self, target, staging_dir):
+        """按依赖顺序列出检查点之后需要暂存的分片: (表名, 暂存文件, 起始rowid, 结束rowid)"""
+        tables = LOOKUP_TABLES + [table for table, _ in TABLE_MAPPINGS.values()]
+        tasks = []
+        for table in tables:
+            if not self._get_table_columns(self.old_conn, table):
+                logger.warning(f"旧数据库中没有 {table} 表，跳过")
+                continue
+            last_rowid, _, _, finished = self._load_checkpoint(target, table)
+            if finished:
+                logger.info(f"{table} 已在上次运行中迁移完成，跳过")
+                continue
+            if last_rowid:
+                logger.info(f"从检查点继续迁移 {table}: rowid > {last_rowid}")
+            first, last, count = self.old_conn.execute(
+                f'SELECT MIN(rowid), MAX(rowid), COUNT(*) FROM "{table}" WHERE rowid > ?', (last_rowid,)
+            ).fetchone()
+            if not count:
+                continue
+            
+            chunks = max(1, -(-count // self.parallel_chunk_rows))
+            step = -(-(last - first + 1) // chunks)
+            for index, start in enumerate(range(first, last + 1, step)):
+                staging_path = os.path.join(staging_dir, f"{table}_{index}.db")
+                tasks.append((table, staging_path, start, min(start + step - 1, last)))
+        return tasks
+    
+    def _merge_staged_tables(self, target, tasks, futures):
+        """
+        单个写入者把暂存文件逐个合并到新数据库，同一个表的分片共用一次删除/重建索引
+        
+        每个分片合并后在同一事务中保存检查点（最后一个分片标记该表已完成）。
+        """
+        position = 0
+        while position < len(tasks):
+            table = tasks[position][0]
+            end = position
+            while end < len(tasks) and tasks[end][0] == table:
+                end += 1
+            
+            columns = _get_mapping_columns(table)
+            _, migrated, failed, _ = self._load_checkpoint(target, table)
+            indexes = self._drop_indexes(target, table)
+            try:
+                for index in range(position, end):
+                    _, staging_path, _, last_rowid = tasks[index]
+                    futures[index].result()
+                    target.execute("ATTACH DATABASE ? AS stage", (staging_path,))
+                    try:
+                        inserted, rejected = self._merge_stage(target, table, columns)
+                        migrated += inserted
+                        failed += rejected
+                        self._save_checkpoint(
+                            target, table, last_rowid, migrated, failed, finished=index == end - 1
+                        )
+                        target.commit()
+                    except Exception:
+                        target.rollback()
+                        raise
+                    finally:
+                        target.execute("DETACH DATABASE stage")
+                    os.remove(staging_path)
+            finally:
+                self._create_indexes(target, indexes)
+            
+            logger.info(f"{table} 合并完成: {migrated}/{migrated + failed} 成功")
+            position = end
+    
+    def _merge_stage(self, target, table, columns):
+        """
+        把附加为 stage 的暂存表写入目标表（不提交），返回 (成功行数, 失败行数)
+        
+        先在保存点内用一条 INSERT … SELECT 写入；因约束冲突失败时回滚到保存点，
+        改为分批写入，失败的行按旧表 rowid 记录到 MigrationReject 表。
+        """
+        names = ", ".join(f'"{name}"' for name, _ in columns)
+        if not target.in_transaction:
+            target.execute("BEGIN")
+        target.execute("SAVEPOINT stage_merge")
+        try:
+            cursor = target.execute(
+                f'INSERT INTO main."{table}" ({names}) '
+                f'SELECT {names} FROM stage."{table}" ORDER BY "SourceRowID"'
+            )
+            target.execute("RELEASE SAVEPOINT stage_merge")
+            return cursor.rowcount, 0
+        except sqlite3.IntegrityError:
+            target.execute("ROLLBACK TO SAVEPOINT stage_merge")
+            target.execute("RELEASE SAVEPOINT stage_merge")
+        
+        # 未限定库名的表名优先解析为 main 中的表
+        insert_sql = self._insert_sql(table, columns)
+        migrated = failed = 0
+        cursor = target.execute(f'SELECT "SourceRowID", {names} FROM stage."{table}" ORDER BY "SourceRowID"')
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            inserted = self._insert_batch(
+                target, table, columns, insert_sql, [row[0] for row in rows], [row[1:] for row in rows]
+            )
+            migrated += inserted
+            failed += len(rows) - inserted
+        return migrated, failed
+    
+    def migrate_attached(self):
+        """
+        在 SQL 中完成迁移
+        
+        将旧数据库 ATTACH 到新数据库上，每个表执行一条 INSERT … SELECT，
+        列映射和默认值（COALESCE）都在 SQLite 内完成，数据不经过 Python。
+        与目标库主键冲突或违反约束的行被跳过并计为失败。
+        """
+        try:
+            logger.info(f"连接到新数据库: {self.new_db_url}")
+            target = self._connect_target()
+        except Exception as e:
+            logger.error(f"连接数据库失败: {e}")
+            return False
+        
+        try:
+            self._restore_pending_indexes(target)
+            logger.info(f"附加旧数据库: {self.old_db_path}")
+            target.execute("ATTACH DATABASE ? AS old", (self.old_db_path,))
+            
+            for table in LOOKUP_TABLES:
+                self._copy_attached_table(target, table, LOOKUP_COLUMNS)
+            for category, (table, columns) in TABLE_MAPPINGS.items():
+                self._copy_attached_table(target, table, columns, self.stats[category])
+            
+            self.print_stats()
+            logger.info("所有数据迁移完成")
+            return True
+        except Exception as e:
+            logger.error(f"数据迁移过程中出错: {e}")
+            return False
+        finally:
+            if target.in_transaction:
+                target.rollback()
+            target.close()
+    
+    def _copy_attached_table(self, target, table, columns, stats=None):
+        """用一条 INSERT … SELECT 从附加的旧数据库复制一个表，返回 (成功行数, 失败行数)"""
+        source_columns = self._get_table_columns(target, table, schema='old')
+        if not source_columns:
+            logger.warning(f"旧数据库中没有 {table} 表，跳过")
+            return 0, 0
+        
+        logger.info(f"开始迁移 {table} ...")
+        now = datetime.now().timestamp()
+        expressions = []
+        params = []
+        for name, default in columns:
+            if default is CURRENT_TIMESTAMP:
+                default = now
+            if name not in source_columns:
+                expressions.append("?")
+                params.append(default)
+            elif default is None:
+                expressions.append(f'"{name}"')
+            else:
+                expressions.append(f'COALESCE("{name}", ?)')
+                params.append(default)
+        
+        names = ", ".join(f'"{name}"' for name, _ in columns)
+        indexes = self._drop_indexes(target, table)
+        try:
+            total = target.execute(f'SELECT COUNT(*) FROM old."{table}"').fetchone()[0]
+            cursor = target.execute(
+                f'INSERT OR IGNORE INTO main."{table}" ({names}) '
+                f'SELECT {", ".join(expressions)} FROM old."{table}"',
+                params
+            )
+            migrated = cursor.rowcount
+            target.commit()
+        except Exception:
+            target.rollback()
+            raise
+        finally:
+            self._create_indexes(target, indexes)
+        
+        failed = total - migrated
+        if stats is not None:
+            stats['total'] += total
+            stats['migrated'] += migrated
+            stats['failed'] += failed
+        logger.info(f"{table} 迁移完成: {migrated}/{total} 成功")
+        return migrated, failed
+    
+    def _connect_target(self):
+        """以原生 sqlite3 连接打开目标数据库"""
+        url = make_url(self.new_db_url)
+        if url.get_backend_name() != 'sqlite' or not url.database:
+            raise ValueError(f"批量迁移仅支持 SQLite 文件数据库: {self.new_db_url}")
+        target = sqlite3.connect(url.database)
+        # 加载期间不等待每次写入落盘，全部提交后数据仍是完整的
+        target.execute("PRAGMA synchronous=OFF")
+        return target
+    
+    def _bulk_copy_table(self, target, table, columns, stats=None):
+        """分批复制一个表（从检查点继续），返回 (成功行数, 失败行数)"""
+        source_columns = self._get_table_columns(self.old_conn, table)
+        if not source_columns:
+            logger.warning(f"旧数据库中没有 {table} 表，跳过")
+            return 0, 0
+        
+        last_rowid, migrated, failed, finished = self._load_checkpoint(target, table)
+        if finished:
+            logger.info(f"{table} 已在上次运行中迁移完成，跳过")
+        else:
+            if last_rowid:
+                logger.info(f"从检查点继续迁移 {table}: rowid > {last_rowid}")
+            else:
+                logger.info(f"开始批量迁移 {table} ...")
+            migrated, failed = self._bulk_copy_rows(
+                target, table, columns, source_columns, last_rowid, migrated, failed
+            )
+        
+        if stats is not None:
+            stats['total'] += migrated + failed
+            stats['migrated'] += migrated
+            stats['failed'] += failed
+        logger.info(f"{table} 批量迁移完成: {migrated}/{migrated + failed} 成功")
+        return migrated, failed
+    
+    def _bulk_copy_rows(self, target, table, columns, source_columns, last_rowid, migrated, failed):
+        """按 rowid 顺序复制 last_rowid 之后的行，每次提交时一并保存检查点"""
+        # 旧表中缺失的列读取为 NULL，写入时替换为默认值
+        select_list = ", ".join(
+            f'"{name}"' if name in source_columns else "NULL" for name, _ in columns
+        )
+        insert_sql = self._insert_sql(table, columns)
+        now = datetime.now().timestamp()
+        uncommitted = 0
+        next_progress = migrated + failed + self.progress_every
+        
+        indexes = self._drop_indexes(target, table)
+        try:
+            cursor = self.old_conn.execute(
+                f'SELECT rowid, {select_list} FROM "{table}" WHERE rowid > ? ORDER BY rowid',
+                (last_rowid,)
+            )
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                
+                rowids = [row[0] for row in rows]
+                params = [self._apply_defaults(row[1:], columns, now) for row in rows]
+                inserted = self._insert_batch(target, table, columns, insert_sql, rowids, params)
+                migrated += inserted
+                failed += len(params) - inserted
+                last_rowid = rowids[-1]
+                
+                uncommitted += len(params)
+                if uncommitted >= self.commit_rows:
+                    self._save_checkpoint(target, table, last_rowid, migrated, failed)
+                    target.commit()
+                    uncommitted = 0
+                
+                if migrated + failed >= next_progress:
+                    logger.info(f"{table}: 已处理 {migrated + failed} 行，失败 {failed} 行")
+                    next_progress += self.progress_every
+            self._save_checkpoint(target, table, last_rowid, migrated, failed, finished=True)
+            target.commit()
+        except Exception:
+            target.rollback()
+            raise
+        finally:
+            self._create_indexes(target, indexes)
+        
+        return migrated, failed
+    
+    def _insert_batch(self, target, table, columns, insert_sql, rowids, params):
+        """
+        在保存点内写入一批记录，返回写入的行数
+        
+        整批因约束冲突失败时回滚到保存点，改为逐行写入，失败的行记录到 MigrationReject 表。
+        """
+        if not target.in_transaction:
+            target.execute("BEGIN")
+        target.execute("SAVEPOINT batch")
+        try:
+            target.executemany(insert_sql, params)
+            target.execute("RELEASE SAVEPOINT batch")
+            return len(params)
+        except (sqlite3.IntegrityError, sqlite3.InterfaceError):
+            target.execute("ROLLBACK TO SAVEPOINT batch")
+            target.execute("RELEASE SAVEPOINT batch")
+        
+        inserted = 0
+        for rowid, row in zip(rowids, params):
+            try:
+                target.execute(insert_sql, row)
+                inserted += 1
+            except (sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+                logger.warning(f"迁移 {table} 记录失败: {row[0]} - {e}")
+                self._save_reject(target, table, columns, rowid, row, e)
+        return inserted
+    
+    def _prepare_checkpoints(self, target):
+        """创建检查点表和失败记录表；不续传时清空上次的检查点"""
+        target.execute(CHECKPOINT_TABLE_SQL)
+        target.execute(REJECT_TABLE_SQL)
+        if not self.resume:
+            target.execute("DELETE FROM MigrationCheckpoint")
+        target.commit()
+    
+    @staticmethod
+    def _load_checkpoint(target, table):
+        """读取源表的检查点，返回 (最后迁移的rowid, 成功行数, 失败行数, 是否已完成)"""
+        row = target.execute(
+            "SELECT LastRowID, Migrated, Failed, Finished FROM MigrationCheckpoint WHERE SourceTable = ?",
+            (table,)
+        ).fetchone()
+        if row is None:
+            return 0, 0, 0, False
+        return row[0], row[1], row[2], bool(row[3])
+    
+    @staticmethod
+    def _save_checkpoint(target, table, last_rowid, migrated, failed, finished=False):
+        """在当前事务中保存检查点，与本批数据一起提交"""
+        target.execute(
+            "INSERT OR REPLACE INTO MigrationCheckpoint "
+            "(SourceTable, LastRowID, Migrated, Failed, Finished, Timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (table, last_rowid, migrated, failed, int(finished), datetime.now().timestamp())
+        )
+    
+    @staticmethod
+    def _save_reject(target, table, columns, rowid, row, error):
+        """记录无法写入的行（原始数据保存为 JSON）"""
+        data = json.dumps(
+            {name: value for (name, _), value in zip(columns, row)},
+            ensure_ascii=False, default=str
+        )
+        target.execute(
+            "INSERT INTO MigrationReject (SourceTable, SourceRowID, RecordID, Error, Data, Timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (table, rowid, str(row[0]), str(error), data, datetime.now().timestamp())
+        )
+    
+    @staticmethod
+    def _apply_defaults(row, columns, now):
+        """把缺失或为 NULL 的列替换为默认值"""
+        return tuple(
+            value if value is not None else (now if default is CURRENT_TIMESTAMP else default)
+            for value, (_, default) in zip(row, columns)
+        )
+    
+    @staticmethod
+    def _insert_sql(table, columns, named=False):
+        """参数化的 INSERT 语句（named 为 True 时使用 :列名 形式的命名参数）"""
+        names = ", ".join(f'"{name}"' for name, _ in columns)
+        placeholders = ", ".join(f":{name}" if named else "?" for name, _ in columns)
+        return f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})'
+    
+    @staticmethod
+    def _get_table_columns(conn, table, schema='main'):
+        """表的列名集合（表不存在时为空）"""
+        return {row[1] for row in conn.execute(f'PRAGMA {schema}.table_info("{table}")')}
+    
+    @staticmethod
+    def _drop_indexes(target, table):
+        """
+        删除表上的二级索引，返回 (索引名, 建索引语句) 以便之后重建
+        
+        建索引语句与删除索引在同一事务中写入 MigrationPendingIndex 表，
+        进程在加载中途被强制结束（finally 不会执行）时，下一次运行开始时会重建这些索引。
+        """
+        target.execute(PENDING_INDEX_TABLE_SQL)
+        indexes = target.execute(
+            "SELECT name, sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        ).fetchall()
+        now = datetime.now().timestamp()
+        target.executemany(
+            "INSERT OR REPLACE INTO MigrationPendingIndex (Name, TableName, SQL, Timestamp) VALUES (?, ?, ?, ?)",
+            [(name, table, sql, now) for name, sql in indexes]
+        )
+        for name, _ in indexes:
+            target.execute(f'DROP INDEX main."{name}"')
+        target.commit()
+        return indexes
+    
+    @staticmethod
+    def _create_indexes(target, indexes):
+        """重建加载前删除的索引（已存在的跳过），并清除对应的待重建记录"""
+        for name, sql in indexes:
+            exists = target.execute(
+                "SELECT 1 FROM main.sqlite_master WHERE type = 'index' AND name = ?", (name,)
+            ).fetchone()
+            if not exists:
+                target.execute(sql)
+            target.execute("DELETE FROM MigrationPendingIndex WHERE Name = ?", (name,))
+        target.commit()
+    
+    def _restore_pending_indexes(self, target):
+        """重建上一次运行删除后未能重建的索引"""
+        target.execute(PENDING_INDEX_TABLE_SQL)
+        pending = target.execute("SELECT Name, SQL FROM MigrationPendingIndex").fetchall()
+        if pending:
+            logger.warning(f"重建上次迁移中断时未重建的索引: {', '.join(name for name, _ in pending)}")
+        self._create_indexes(target, pending)
+    
+    def verify(self, diff_path="data_migration_diff.txt"):
+        """
+        校验迁移结果
+        
+        对每个表按 ID 顺序同时流式读取新旧数据库，一次顺序扫描完成归并比对，
+        统计行数并计算与顺序无关的校验和（各行规范化字段哈希之和）。
+        不一致的记录 ID 写入 diff_path，每行为 "表名<TAB>类型<TAB>ID"，
+        类型为 missing（新库缺少）、extra（新库多出）或 changed（内容不同）。
+        Timestamp 在旧库中为空时由迁移时刻填充，无法比对，因此不参与校验。
+        
+        Returns:
+            bool: 所有表的行数和校验和都一致时为 True，详细结果保存在 self.verification
+        """
+        try:
+            self.old_conn = sqlite3.connect(self.old_db_path)
+            target = self._connect_target()
+        except Exception as e:
+            logger.error(f"连接数据库失败: {e}")
+            return False
+        
+        self.verification = {}
+        tables = [(table, LOOKUP_COLUMNS) for table in LOOKUP_TABLES] + list(TABLE_MAPPINGS.values())
+        try:
+            with open(diff_path, 'w', encoding='utf-8') as diff_file:
+                for table, columns in tables:
+                    result = self._verify_table(target, table, columns, diff_file)
+                    if result is not None:
+                        self.verification[table] = result
+        except Exception as e:
+            logger.error(f"校验过程中出错: {e}")
+            return False
+        finally:
+            self.old_conn.close()
+            target.close()
+        
+        logger.info("========== 迁移校验结果 ==========")
+        for table, result in self.verification.items():
+            status = "一致" if result['match'] else "不一致"
+            logger.info(
+                f"{table}: 旧库 {result['old_count']} 行, 新库 {result['new_count']} 行, "
+                f"缺少 {result['missing']}, 多出 {result['extra']}, 不同 {result['changed']} - {status}"
+            )
+        logger.info("=================================")
+        
+        success = all(result['match'] for result in self.verification.values())
+        if not success:
+            logger.warning(f"不一致的记录已写入 {diff_path}")
+        return success
+    
+    def _verify_table(self, target, table, columns, diff_file):
+        """归并比对一个表，返回统计结果（旧库中没有该表时返回 None）"""
+        source_columns = self._get_table_columns(self.old_conn, table)
+        if not source_columns:
+            return None
+        
+        result = {
+            'old_count': 0, 'new_count': 0, 'old_checksum': 0, 'new_checksum': 0,
+            'missing': 0, 'extra': 0, 'changed': 0
+        }
+        if not self._get_table_columns(target, table):
+            result['old_count'] = self.old_conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            result['missing'] = result['old_count']
+            result['match'] = result['old_count'] == 0
+            logger.error(f"新数据库中没有 {table} 表")
+            return result
+        
+        compared = [(name, default) for name, default in columns if default is not CURRENT_TIMESTAMP]
+        old_rows = self._iter_row_digests(self.old_conn, table, compared, source_columns)
+        new_rows = self._iter_row_digests(target, table, compared)
+        old_row = next(old_rows, None)
+        new_row = next(new_rows, None)
+        while old_row is not None or new_row is not None:
+            if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+                kind, record_id = 'missing', old_row[1]
+            elif old_row is None or new_row[0] < old_row[0]:
+                kind, record_id = 'extra', new_row[1]
+            else:
+                kind, record_id = ('changed' if old_row[2] != new_row[2] else None), old_row[1]
+            
+            if kind != 'extra':
+                result['old_count'] += 1
+                result['old_checksum'] = (result['old_checksum'] + old_row[2]) % 2 ** 64
+                old_row = next(old_rows, None)
+            if kind != 'missing':
+                result['new_count'] += 1
+                result['new_checksum'] = (result['new_checksum'] + new_row[2]) % 2 ** 64
+                new_row = next(new_rows, None)
+            
+            if kind is not None:
+                result[kind] += 1
+                diff_file.write(f"{table}\t{kind}\t{record_id}\n")
+        
+        result['match'] = (
+            result['old_count'] == result['new_count'] and result['old_checksum'] == result['new_checksum']
+        )
+        return result
+    
+    def _iter_row_digests(self, conn, table, columns, source_columns=None):
+        """
+        按 ID 顺序流式读取表，逐行产出 (排序键, ID, 行哈希)
+        
+        source_columns 不为 None 时按旧库处理：缺失的列读取为 NULL 并替换为迁移时使用的默认值。
+        """
+        available = source_columns if source_columns is not None else {name for name, _ in columns}
+        select_list = ", ".join(f'"{name}"' if name in available else "NULL" for name, _ in columns)
+        cursor = conn.execute(f'SELECT {select_list} FROM "{table}" ORDER BY "ID"')
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            for row in rows:
+                if source_columns is not None:
+                    row = self._apply_defaults(row, columns, None)
+                fields = [self._normalize_value(value) for value in row]
+                digest = hashlib.sha256("\x1f".join(fields).encode('utf-8')).digest()
+                yield self._sort_key(row[0]), row[0], int.from_bytes(digest[:8], 'big')
+    
+    @staticmethod
+    def _sort_key(value):
+        """与 SQLite 排序规则一致的排序键：NULL < 数值 < 文本 < BLOB"""
+        if value is None:
+            return (0, 0)
+        if isinstance(value, (int, float)):
+            return (1, value)
+        if isinstance(value, str):
+            return (2, value.encode('utf-8'))
+        return (3, bytes(value))
+    
+    @staticmethod
+    def _normalize_value(value):
+        """规范化字段值，使新旧库中等价的值（如 5 和 5.0）得到相同的文本"""
+        if value is None:
+            return '\x00'
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            return format(float(value), '.12g')
+        if isinstance(value, bytes):
+            return value.hex()
+        return str(value)
+    
+    def rebuild_derived_data(self):
+        """
+        迁移完成后按新数据库中的记录重建派生数据（喂养节律等）
+        
+        批量和 SQL 模式不经过服务层，逐条迁移时记录也不按时间顺序写入，因此总是重建一次。
+        重建失败不影响已迁移的数据，可以之后运行 tools/rebuild_derived_data.py 重试。
+        """
+        from baby_tracker.services.derived_data import DerivedDataService
+        
+        logger.info("开始重建派生数据...")
+        new_engine = create_engine(self.new_db_url)
+        session = sessionmaker(bind=new_engine)()
+        try:
+            count = DerivedDataService(session).rebuild_all()
+            logger.info(f"派生数据重建完成: {count} 个宝宝")
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"重建派生数据失败: {e}，请运行 tools/rebuild_derived_data.py 重试")
+            return False
+        finally:
+            session.close()
+            new_engine.dispose()
+    
     def print_stats(self):
         """打印统计结果"""
         logger.info("========== 数据迁移统计 ==========")
@@ -585,14 +1372,50 @@ class DataMigrator:
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="宝宝追踪器数据迁移工具")
+    parser.add_argument("command", nargs="?", choices=["migrate", "verify"], default="migrate",
+                        help="migrate: 迁移数据（默认）; verify: 校验新旧数据库内容是否一致")
     parser.add_argument("--old-db", type=str, default="data/EasyLog.db", help="旧数据库文件路径")
     parser.add_argument("--new-db", type=str, default="sqlite:///data/baby_tracker_new.db", help="新数据库URL")
+    parser.add_argument("--bulk", action="store_true", help="批量迁移模式（不经过服务层，分批读写，加载期间删除索引）")
+    parser.add_argument("--batch-size", type=int, default=5000, help="批量模式每批读取和写入的行数")
+    parser.add_argument("--progress-every", type=int, default=100000, help="批量模式每迁移多少行输出一次进度")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的检查点继续批量或并行迁移（未指定 --workers 时隐含 --bulk）")
+    parser.add_argument("--workers", type=int, default=1, help="并行迁移的进程数（大于1时各表并行暂存后合并）")
+    parser.add_argument("--sql", action="store_true", help="SQL 迁移模式（ATTACH 旧数据库，每个表一条 INSERT … SELECT）")
+    parser.add_argument("--skip-derived", action="store_true", help="迁移完成后不重建派生数据（喂养节律等）")
+    parser.add_argument("--diff-file", type=str, default="data_migration_diff.txt", help="校验时写入不一致记录ID的文件")
     args = parser.parse_args()
     
-    migrator = DataMigrator(args.old_db, args.new_db)
-    success = migrator.migrate_all()
+    # 配置日志
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("data_migration.log"),
+            logging.StreamHandler()
+        ]
+    )
+    
+    migrator = DataMigrator(args.old_db, args.new_db, args.batch_size, args.progress_every, args.resume)
+    if args.command == "verify":
+        if migrator.verify(args.diff_file):
+            logger.info("数据校验通过")
+            sys.exit(0)
+        logger.error("数据校验未通过")
+        sys.exit(1)
+    
+    if args.workers > 1:
+        success = migrator.migrate_parallel(args.workers)
+    elif args.sql:
+        success = migrator.migrate_attached()
+    elif args.bulk or args.resume:
+        success = migrator.migrate_bulk()
+    else:
+        success = migrator.migrate_all()
     
     if success:
+        if not args.skip_derived:
+            migrator.rebuild_derived_data()
         logger.info("数据迁移成功完成")
         sys.exit(0)
     else:
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+派生数据重建脚本 - 按原始记录重建喂养节律等派生表
+
+派生表上线前已有的记录，以及批量导入、数据迁移写入的记录，运行一次即可补齐派生数据。
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from baby_tracker.database import SessionLocal
+from baby_tracker.services.derived_data import DerivedDataService
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="宝宝追踪器派生数据重建工具")
+    parser.add_argument("--baby-id", action="append", dest="baby_ids",
+                        help="只重建指定宝宝的派生数据（可重复指定，默认全部宝宝）")
+    args = parser.parse_args()
+    
+    service = DerivedDataService(SessionLocal())
+    try:
+        count = service.rebuild_all(args.baby_ids)
+    finally:
+        service.close()
+    print(f"派生数据重建完成: {count} 个宝宝")
+
+
+if __name__ == "__main__":
+    main()